@@ -1,11 +1,61 @@
-from django.contrib import admin
-from .models import Agendamento
+from django.contrib import admin, messages
+from .busca import buscar_ids
+from .models import Agendamento, AgendamentoArquivado, OrcamentoArquivado
+from .views import processar_agendamentos_em_massa
 
 @admin.register(Agendamento)
 class AgendamentoAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'data', 'hora', 'email', 'telefone')
-    list_filter = ('data',)
+    list_display = ('nome', 'data', 'hora', 'email', 'telefone', 'status')
+    list_filter = ('status', 'data')
     search_fields = ('nome', 'email')
+    actions = ['aceitar_selecionados', 'recusar_selecionados']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usa o índice de texto (app/busca.py) em vez de icontains em cada coluna
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=buscar_ids('agendamento', search_term)), False
+
+    def _processar(self, request, queryset, acao):
+        atualizados, erros = processar_agendamentos_em_massa(
+            list(queryset.values_list('pk', flat=True)), acao, request.user
+        )
+        if atualizados:
+            self.message_user(request, f"{len(atualizados)} agendamento(s) atualizados. E-mails em envio.")
+        for agendamento, erro in erros:
+            self.message_user(request, f"{agendamento}: {erro}", level=messages.ERROR)
+
+    @admin.action(description="Aceitar agendamentos selecionados")
+    def aceitar_selecionados(self, request, queryset):
+        self._processar(request, queryset, 'aceito')
+
+    @admin.action(description="Recusar agendamentos selecionados")
+    def recusar_selecionados(self, request, queryset):
+        self._processar(request, queryset, 'recusado')
+
+
+class ArquivoAdmin(admin.ModelAdmin):
+    """Tabelas frias: só consulta (o arquivamento é feito pelo comando arquivar_historico)"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(AgendamentoArquivado)
+class AgendamentoArquivadoAdmin(ArquivoAdmin):
+    list_display = ('nome', 'data', 'hora', 'email', 'status', 'arquivado_em')
+    list_filter = ('status',)
+    search_fields = ('=email', 'nome')
+    date_hierarchy = 'data'
+
+@admin.register(OrcamentoArquivado)
+class OrcamentoArquivadoAdmin(ArquivoAdmin):
+    list_display = ('id', 'nome', 'email', 'tipo_evento', 'data_criacao', 'preco_final', 'arquivado_em')
+    list_filter = ('tipo_evento',)
+    search_fields = ('=email', 'nome')
+    date_hierarchy = 'data_criacao'
 
 # agendamento/admin.py
 from django.contrib import admin
@@ -0,0 +1,148 @@
+# app/agenda.py
+"""Feed iCalendar (.ics) das visitas aceitas, assinado por cada staff no celular.
+
+O link leva o id do usuário e um token (HMAC do id com o hash da senha): trocar a
+senha invalida o link antigo. Clientes de calendário consultam o feed a cada poucos
+minutos, então a resposta tem ETag/Last-Modified tirados da "versão da agenda": o
+último atualizado_em/excluido_em de agendamento, guardado no cache e descartado a cada
+alteração (signals, ação em massa, arquivamento). O 304 sai sem tocar na tabela de
+agendamentos; ela só é lida uma vez depois de cada alteração e para gerar o feed.
+
+Com cache por processo (LocMem) um worker só enxerga as alterações feitas nele até a
+versão expirar (VERSAO_TTL_SEGUNDOS); com um cache compartilhado (REDIS_URL) a
+invalidação vale para todos na hora.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import Agendamento, RegistroExclusao
+
+CONFIGURACAO_PADRAO = {
+    'NOME': 'Visitas - Sabina Decorações',
+    'DIAS_PASSADOS': 30,  # visitas recentes continuam no calendário
+    'DURACAO_MINUTOS': 60,
+    'VERSAO_TTL_SEGUNDOS': 300,
+    'TAMANHO_LOTE': 500,
+}
+
+CHAVE_VERSAO = 'agenda:versao'
+SAL_TOKEN = 'app.agenda.feed'
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'AGENDA_ICS', {}))
+    return configuracao
+
+
+# --- Token por staff ---
+
+def gerar_token(usuario):
+    return salted_hmac(SAL_TOKEN, f'{usuario.pk}:{usuario.password}', algorithm='sha256').hexdigest()[:32]
+
+
+def verificar_token(usuario, token):
+    return constant_time_compare(gerar_token(usuario), token)
+
+
+def url_feed(usuario):
+    return reverse('agenda_ics', kwargs={'usuario_id': usuario.pk, 'token': gerar_token(usuario)})
+
+
+# --- Versão da agenda ---
+
+def marcar_alteracao():
+    """Chamado depois do commit de qualquer alteração de agendamento: a próxima leitura
+    recalcula a versão, que assim sai sempre dos dados (igual antes e depois de um reinício)"""
+    cache.delete(CHAVE_VERSAO)
+
+
+def versao_atual():
+    """Momento da última alteração de agendamento (do cache; do banco na primeira leitura após mudar)"""
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        candidatos = [
+            Agendamento.objects.aggregate(ultimo=Max('atualizado_em'))['ultimo'],
+            RegistroExclusao.objects.filter(modelo='agendamento').aggregate(ultimo=Max('excluido_em'))['ultimo'],
+        ]
+        versao = max((c for c in candidatos if c), default=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+        cache.add(CHAVE_VERSAO, versao, timeout=obter_configuracao()['VERSAO_TTL_SEGUNDOS'])
+    return versao
+
+
+def etag(versao, hoje):
+    # O dia entra na ETag porque a janela (DIAS_PASSADOS) anda mesmo sem alterações
+    return '"' + hashlib.md5(f'{versao.timestamp()}:{hoje}'.encode()).hexdigest() + '"'
+
+
+# --- Geração do .ics ---
+
+def _escapar(texto):
+    return (str(texto).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _linha(nome, valor):
+    """Linha de conteúdo com dobra em 75 octetos (RFC 5545, 3.1)"""
+    dados = f'{nome}:{valor}'.encode()
+    partes = []
+    while len(dados) > 75:
+        corte = 75 if not partes else 74
+        # Não corta um caractere UTF-8 ao meio
+        while corte and (dados[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(dados[:corte])
+        dados = dados[corte:]
+    partes.append(dados)
+    return (b'\r\n '.join(partes) + b'\r\n').decode()
+
+
+def _utc(momento):
+    return momento.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def visitas(hoje=None):
+    configuracao = obter_configuracao()
+    hoje = hoje or timezone.localdate()
+    return (
+        Agendamento.objects.filter(status='aceito', data__gte=hoje - timedelta(days=configuracao['DIAS_PASSADOS']))
+        .order_by('data', 'hora')
+        .only('id', 'nome', 'email', 'telefone', 'data', 'hora', 'mensagem', 'atualizado_em')
+    )
+
+
+def gerar_ics(queryset, dominio):
+    """Gera o calendário em blocos: cabeçalho, um VEVENT por visita e o rodapé"""
+    configuracao = obter_configuracao()
+    duracao = timedelta(minutes=configuracao['DURACAO_MINUTOS'])
+    yield (
+        _linha('BEGIN', 'VCALENDAR') + _linha('VERSION', '2.0')
+        + _linha('PRODID', '-//Sabina Decorações//Agenda de visitas//PT-BR')
+        + _linha('CALSCALE', 'GREGORIAN') + _linha('METHOD', 'PUBLISH')
+        + _linha('X-WR-CALNAME', _escapar(configuracao['NOME']))
+        + _linha('X-WR-TIMEZONE', settings.TIME_ZONE)
+    )
+    for agendamento in queryset.iterator(chunk_size=configuracao['TAMANHO_LOTE']):
+        inicio = agendamento.data_hora()
+        descricao = f'Telefone: {agendamento.telefone}\nE-mail: {agendamento.email}'
+        if agendamento.mensagem:
+            descricao += f'\n\n{agendamento.mensagem}'
+        yield (
+            _linha('BEGIN', 'VEVENT')
+            + _linha('UID', f'agendamento-{agendamento.pk}@{dominio}')
+            + _linha('DTSTAMP', _utc(agendamento.atualizado_em))
+            + _linha('LAST-MODIFIED', _utc(agendamento.atualizado_em))
+            + _linha('DTSTART', _utc(inicio))
+            + _linha('DTEND', _utc(inicio + duracao))
+            + _linha('SUMMARY', _escapar(f'Visita: {agendamento.nome}'))
+            + _linha('DESCRIPTION', _escapar(descricao))
+            + _linha('END', 'VEVENT')
+        )
+    yield _linha('END', 'VCALENDAR')
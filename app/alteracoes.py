@@ -0,0 +1,102 @@
+# app/alteracoes.py
+"""Feed incremental de agendamentos/orçamentos alterados e excluídos desde um cursor."""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Agendamento, Orcamento, RegistroExclusao
+
+CONFIGURACAO_PADRAO = {
+    'LIMITE': 200,
+    # Linhas salvas nos últimos segundos ficam para a próxima consulta: uma transação
+    # ainda aberta pode gravar um atualizado_em anterior ao cursor já entregue.
+    # 2 s cobre as transações das views e do admin (um save por requisição); se um
+    # comando ou tarefa gravar em transações mais longas, aumente em settings.ALTERACOES,
+    # senão o feed pode pular linhas. O custo é o feed ficar esse tempo atrás do banco.
+    'ESTABILIZACAO_SEGUNDOS': 2,
+    'SSE_INTERVALO': 5,
+    'SSE_DURACAO': 55,
+}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'ALTERACOES', {}))
+    return configuracao
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def codificar_cursor(momento):
+    """Cursor opaco: microssegundos desde a época (seguro em URLs).
+
+    Aritmética inteira: via timestamp() em float, .999999 pode arredondar para o
+    microssegundo vizinho e o feed repetiria ou pularia linhas.
+    """
+    return str((momento - EPOCA) // timedelta(microseconds=1))
+
+
+def decodificar_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return EPOCA + timedelta(microseconds=int(cursor))
+    except (TypeError, ValueError, OverflowError):
+        raise CursorInvalido(f"Cursor inválido: {cursor}")
+
+
+def _pagina(queryset, campo, desde, ate, limite):
+    """Busca até `limite` linhas com desde < campo <= ate, sem cortar um grupo de mesmo horário ao meio.
+
+    Retorna (linhas, horario_de_corte) — o corte é None quando não havia mais linhas.
+    """
+    if desde is not None:
+        queryset = queryset.filter(**{f'{campo}__gt': desde})
+    queryset = queryset.filter(**{f'{campo}__lte': ate}).order_by(campo, 'pk')
+    linhas = list(queryset[:limite + 1])
+    if len(linhas) <= limite:
+        return linhas, None
+    linhas = linhas[:limite]
+    corte = getattr(linhas[-1], campo)
+    linhas += list(queryset.filter(**{campo: corte, 'pk__gt': linhas[-1].pk}))
+    return linhas, corte
+
+
+def buscar_alteracoes(desde=None, limite=None, agendamentos=None, orcamentos=None):
+    """Retorna agendamentos e orçamentos alterados e as exclusões posteriores a `desde`.
+
+    `agendamentos`/`orcamentos` permitem passar querysets já otimizados (only/select_related).
+    O dicionário retornado inclui o cursor para a próxima chamada e se ainda há mais páginas.
+    """
+    configuracao = obter_configuracao()
+    limite = limite or configuracao['LIMITE']
+    ate = timezone.now() - timedelta(seconds=configuracao['ESTABILIZACAO_SEGUNDOS'])
+
+    fontes = {
+        'agendamentos': (agendamentos if agendamentos is not None else Agendamento.objects.all(), 'atualizado_em'),
+        'orcamentos': (orcamentos if orcamentos is not None else Orcamento.objects.all(), 'atualizado_em'),
+        'excluidos': (RegistroExclusao.objects.all(), 'excluido_em'),
+    }
+    paginas, cortes = {}, []
+    for nome, (queryset, campo) in fontes.items():
+        linhas, corte = _pagina(queryset, campo, desde, ate, limite)
+        paginas[nome] = linhas
+        if corte is not None:
+            cortes.append(corte)
+
+    if cortes:
+        # Alguma fonte foi truncada: o cursor para no menor corte e o restante vem na próxima página
+        cursor = min(cortes)
+        for nome, (_, campo) in fontes.items():
+            paginas[nome] = [linha for linha in paginas[nome] if getattr(linha, campo) <= cursor]
+    else:
+        # Tudo até `ate` já foi entregue
+        cursor = ate
+
+    return {**paginas, 'cursor': codificar_cursor(cursor), 'mais': bool(cortes)}
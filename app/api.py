@@ -0,0 +1,183 @@
+# app/api.py
+"""API REST somente leitura (v1) sobre agendamentos, orçamentos e galeria."""
+import hashlib
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.urls import reverse
+
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework import permissions, routers, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import alteracoes, arquivamento, busca
+from .models import Agendamento, FotoGaleria, Orcamento
+from .serializers import AgendamentoSerializer, FotoGaleriaSerializer, OrcamentoSerializer
+
+
+class PaginacaoCursor(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'tamanho'
+    max_page_size = 200
+    ordering = '-id'
+
+
+class LeituraOtimizadaViewSet(viewsets.ReadOnlyModelViewSet):
+    """Base das views da API.
+
+    - ?campos=a,b limita o JSON e as colunas buscadas (only + select_related só do necessário);
+    - a resposta leva ETag e devolve 304 quando o cliente já tem a mesma versão.
+    """
+
+    pagination_class = PaginacaoCursor
+    filtros = ()
+    somente_leitura = True  # GET lê da réplica (app/roteamento.py)
+
+    def campos_pedidos(self):
+        campos = [c.strip() for c in self.request.query_params.get('campos', '').split(',') if c.strip()]
+        return self.serializer_class.campos_validos(campos)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('campos', self.campos_pedidos())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        colunas, relacionados = self.serializer_class.colunas_e_relacionados(self.campos_pedidos())
+        queryset = self.queryset.select_related(*relacionados).only(*colunas)
+        for filtro in self.filtros:
+            valor = self.request.query_params.get(filtro)
+            if valor:
+                # Converte pelo campo do modelo: valor inválido (data, id) vira 400 em vez de erro no banco
+                try:
+                    valor = self.queryset.model._meta.get_field(filtro).to_python(valor)
+                except DjangoValidationError as e:
+                    raise ValidationError({filtro: e.messages})
+                queryset = queryset.filter(**{filtro: valor})
+        return queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            response.render()
+            response['ETag'] = quote_etag(hashlib.md5(response.content).hexdigest())
+            response = get_conditional_response(request, etag=response['ETag'], response=response)
+        return response
+
+
+class AgendamentoViewSet(LeituraOtimizadaViewSet):
+    queryset = Agendamento.objects.all()
+    serializer_class = AgendamentoSerializer
+    permission_classes = [permissions.IsAdminUser]
+    filtros = ('status', 'data')
+
+
+class OrcamentoViewSet(LeituraOtimizadaViewSet):
+    queryset = Orcamento.objects.all()
+    serializer_class = OrcamentoSerializer
+    permission_classes = [permissions.IsAdminUser]
+    filtros = ('tipo_evento',)
+
+
+class FotoGaleriaViewSet(LeituraOtimizadaViewSet):
+    queryset = FotoGaleria.objects.filter(ativo=True)
+    serializer_class = FotoGaleriaSerializer
+    permission_classes = [permissions.AllowAny]
+    filtros = ('categoria',)
+
+
+def consultar_alteracoes(desde_cursor, limite=None):
+    """Executa o feed de alterações e serializa o resultado (usado pela API e pelo SSE)"""
+    desde = alteracoes.decodificar_cursor(desde_cursor)
+    resultado = alteracoes.buscar_alteracoes(
+        desde=desde,
+        limite=limite,
+        agendamentos=Agendamento.objects.select_related('aceito_por', 'recusado_por'),
+    )
+    return {
+        'cursor': resultado['cursor'],
+        'mais': resultado['mais'],
+        'agendamentos': AgendamentoSerializer(resultado['agendamentos'], many=True).data,
+        'orcamentos': OrcamentoSerializer(resultado['orcamentos'], many=True).data,
+        'excluidos': [
+            {'modelo': registro.modelo, 'id': registro.objeto_id, 'excluido_em': registro.excluido_em}
+            for registro in resultado['excluidos']
+        ],
+    }
+
+
+class AlteracoesView(APIView):
+    """Linhas criadas/alteradas e tombstones de exclusão desde ?desde=<cursor>.
+
+    Sem cursor, devolve tudo (paginado). O cliente guarda `cursor` e repete com ele;
+    enquanto `mais` for true ainda há páginas a buscar.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            limite = int(request.query_params.get('limite', 0))
+        except ValueError:
+            limite = -1
+        if limite < 0:
+            raise ValidationError({'limite': "Informe um número inteiro positivo."})
+        try:
+            return Response(consultar_alteracoes(request.query_params.get('desde'), min(limite, 1000) or None))
+        except alteracoes.CursorInvalido as e:
+            raise ValidationError({'desde': str(e)})
+
+
+class BuscaView(APIView):
+    """Busca de texto em orçamentos e agendamentos: ?q=<termo>[&modelo=orcamento|agendamento]"""
+
+    permission_classes = [permissions.IsAdminUser]
+    rotas_detalhe = {
+        'agendamento': ('edita_agendamento', 'pk'),
+        'orcamento': ('detalhes_orcamento', 'orcamento_id'),
+    }
+
+    def get(self, request):
+        modelo = request.query_params.get('modelo')
+        if modelo and modelo not in self.rotas_detalhe:
+            raise ValidationError({'modelo': f"Use um de: {', '.join(self.rotas_detalhe)}"})
+        documentos = busca.buscar_documentos(request.query_params.get('q', ''), modelos=[modelo] if modelo else None)
+        resultados = []
+        for documento in documentos:
+            rota, argumento = self.rotas_detalhe[documento.modelo]
+            resultados.append({
+                'modelo': documento.modelo,
+                'id': documento.objeto_id,
+                'titulo': documento.titulo,
+                'url': reverse(rota, kwargs={argumento: documento.objeto_id}),
+            })
+        return Response({'resultados': resultados})
+
+
+class HistoricoView(APIView):
+    """Histórico completo de um cliente (?email=), juntando tabelas quentes e arquivo"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        email = request.query_params.get('email', '').strip()
+        if not email:
+            raise ValidationError({'email': "Informe o e-mail do cliente"})
+        historico = arquivamento.historico_cliente(email)
+        return Response({
+            'agendamentos': [
+                {**AgendamentoSerializer(agendamento).data, 'arquivado': agendamento.arquivado}
+                for agendamento in historico['agendamentos']
+            ],
+            'orcamentos': [
+                {**OrcamentoSerializer(orcamento).data, 'arquivado': orcamento.arquivado}
+                for orcamento in historico['orcamentos']
+            ],
+        })
+
+
+router = routers.DefaultRouter()
+router.register('agendamentos', AgendamentoViewSet, basename='api-agendamento')
+router.register('orcamentos', OrcamentoViewSet, basename='api-orcamento')
+router.register('galeria', FotoGaleriaViewSet, basename='api-foto')
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
-    verbose_name = 'Sabina Decorações'
\ No newline at end of file
+    verbose_name = 'Sabina Decorações'
+
+    def ready(self):
+        from . import signals  # noqa: F401
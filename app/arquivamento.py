@@ -0,0 +1,174 @@
+# app/arquivamento.py
+"""Arquivamento de agendamentos e orçamentos antigos em tabelas frias.
+
+Linhas além do horizonte (data da visita para agendamentos, data de criação para
+orçamentos) saem das tabelas quentes, que as listas, a checagem de conflito e a
+disponibilidade percorrem, e vão para AgendamentoArquivado/OrcamentoArquivado com o
+mesmo id. Cada lote é uma transação curta (cópia + exclusão); entre lotes há uma pausa,
+então o comando pode rodar com o site no ar e parar a qualquer momento.
+
+Leitura unificada: `historico()` e `obter()` devolvem instâncias dos modelos quentes,
+vindas de qualquer uma das tabelas; as arquivadas têm `arquivado = True` e são somente
+leitura.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import agenda
+from .models import (
+    Agendamento, AgendamentoArquivado, DocumentoBusca, LembreteEnviado, Orcamento, OrcamentoArquivado,
+    RegistroExclusao,
+)
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACAO_PADRAO = {
+    'HORIZONTE_AGENDAMENTOS_DIAS': 365,
+    'HORIZONTE_ORCAMENTOS_DIAS': 730,
+    'LOTE': 500,
+    'PAUSA_SEGUNDOS': 0.1,
+}
+
+ARQUIVOS = {Agendamento: AgendamentoArquivado, Orcamento: OrcamentoArquivado}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'ARQUIVAMENTO', {}))
+    return configuracao
+
+
+def _colunas(modelo):
+    return [campo.attname for campo in modelo._meta.concrete_fields]
+
+
+# --- Leitura unificada ---
+
+def restaurar(modelo, arquivado):
+    """Instância (não salva) do modelo quente com os dados da linha arquivada"""
+    instancia = modelo(**{coluna: getattr(arquivado, coluna) for coluna in _colunas(modelo)
+                          if coluna in arquivado.__dict__})
+    # Reaproveita o select_related feito no arquivo (aceito_por, recusado_por)
+    campos_arquivo = {campo.name: campo for campo in arquivado._meta.concrete_fields}
+    for campo in modelo._meta.concrete_fields:
+        campo_arquivo = campos_arquivo.get(campo.name)
+        if campo.is_relation and getattr(campo_arquivo, 'is_relation', False) and campo_arquivo.is_cached(arquivado):
+            campo.set_cached_value(instancia, campo_arquivo.get_cached_value(arquivado))
+    instancia._state.adding = False
+    instancia.arquivado = True
+    instancia.arquivado_em = arquivado.__dict__.get('arquivado_em')
+    return instancia
+
+
+def historico(modelo, *filtros, campos=None, relacionados=(), **condicoes):
+    """Linhas quentes e depois as arquivadas de `modelo` que atendem aos filtros.
+
+    Os filtros, `campos` (only) e `relacionados` (select_related) usam os nomes do modelo
+    quente, que o arquivo repete.
+    """
+    for queryset, arquivada in ((modelo.objects.all(), False), (ARQUIVOS[modelo].objects.all(), True)):
+        queryset = queryset.filter(*filtros, **condicoes)
+        if campos:
+            queryset = queryset.only(*campos)
+        if relacionados:
+            queryset = queryset.select_related(*relacionados)
+        for linha in queryset.iterator(chunk_size=1000):
+            if arquivada:
+                yield restaurar(modelo, linha)
+            else:
+                linha.arquivado = False
+                yield linha
+
+
+def obter(modelo, pk):
+    """Busca por id na tabela quente e depois no arquivo; levanta modelo.DoesNotExist"""
+    instancia = modelo.objects.filter(pk=pk).first()
+    if instancia is not None:
+        instancia.arquivado = False
+        return instancia
+    arquivado = ARQUIVOS[modelo].objects.filter(pk=pk).first()
+    if arquivado is None:
+        raise modelo.DoesNotExist(f"{modelo._meta.object_name} #{pk} não existe nem no arquivo")
+    return restaurar(modelo, arquivado)
+
+
+def historico_cliente(email):
+    """Todos os agendamentos e orçamentos de um e-mail, mais recentes primeiro"""
+    email = email.strip()
+    agendamentos = sorted(
+        historico(Agendamento, relacionados=('aceito_por', 'recusado_por'), email__iexact=email),
+        key=lambda a: (a.data, a.hora), reverse=True,
+    )
+    orcamentos = sorted(historico(Orcamento, email__iexact=email), key=lambda o: o.data_criacao, reverse=True)
+    return {'agendamentos': agendamentos, 'orcamentos': orcamentos}
+
+
+# --- Arquivamento ---
+
+def _mover(modelo, candidatos, lote, pausa, max_lotes, limpar_dependentes):
+    arquivo = ARQUIVOS[modelo]
+    colunas = _colunas(modelo)
+    nome = modelo._meta.model_name
+    movidos, lotes, ultimo_id = 0, 0, 0
+    while max_lotes is None or lotes < max_lotes:
+        with transaction.atomic():
+            # skip_locked: linha sendo editada agora fica para a próxima rodada, sem esperar a trava
+            linhas = list(
+                candidatos.filter(pk__gt=ultimo_id).order_by('pk').select_for_update(skip_locked=True)[:lote]
+            )
+            if not linhas:
+                break
+            ids = [linha.pk for linha in linhas]
+            agora = timezone.now()
+            arquivo.objects.bulk_create([
+                arquivo(arquivado_em=agora, **{coluna: getattr(linha, coluna) for coluna in colunas})
+                for linha in linhas
+            ])
+            limpar_dependentes(ids)
+            DocumentoBusca.objects.filter(modelo=nome, objeto_id__in=ids).delete()
+            # Para o feed de alterações a linha saiu do conjunto quente, como numa exclusão
+            RegistroExclusao.objects.bulk_create(
+                [RegistroExclusao(modelo=nome, objeto_id=pk, excluido_em=agora) for pk in ids]
+            )
+            # Exclusão direta, sem signals: os resumos diários continuam valendo (resumos.py
+            # também lê o arquivo) e os dependentes já foram tratados acima
+            modelo.objects.filter(pk__in=ids)._raw_delete(modelo.objects.db)
+        movidos += len(ids)
+        lotes += 1
+        ultimo_id = ids[-1]
+        logger.info("Arquivados %s %s(s) até o id %s", len(ids), nome, ultimo_id)
+        if pausa:
+            time.sleep(pausa)
+    return movidos
+
+
+def arquivar(agora=None, lote=None, max_lotes=None, pausa=None):
+    """Move para o arquivo o que passou do horizonte; retorna {'agendamentos': n, 'orcamentos': n}"""
+    configuracao = obter_configuracao()
+    agora = agora or timezone.now()
+    lote = lote or configuracao['LOTE']
+    pausa = configuracao['PAUSA_SEGUNDOS'] if pausa is None else pausa
+
+    limite_visitas = timezone.localdate(agora) - timedelta(days=configuracao['HORIZONTE_AGENDAMENTOS_DIAS'])
+    agendamentos = _mover(
+        Agendamento, Agendamento.objects.filter(data__lt=limite_visitas), lote, pausa, max_lotes,
+        lambda ids: LembreteEnviado.objects.filter(agendamento_id__in=ids).delete(),
+    )
+    if agendamentos:
+        agenda.marcar_alteracao()  # a exclusão direta não passa pelos signals
+
+    # Orçamento ainda ligado a um agendamento quente fica onde está até o agendamento sair
+    limite_orcamentos = agora - timedelta(days=configuracao['HORIZONTE_ORCAMENTOS_DIAS'])
+    orcamentos = _mover(
+        Orcamento,
+        Orcamento.objects.filter(data_criacao__lt=limite_orcamentos)
+        .exclude(Exists(Agendamento.objects.filter(orcamento_associado=OuterRef('pk')))),
+        lote, pausa, max_lotes, lambda ids: None,
+    )
+    return {'agendamentos': agendamentos, 'orcamentos': orcamentos}
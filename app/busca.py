@@ -0,0 +1,166 @@
+# app/busca.py
+"""Busca de texto em orçamentos e agendamentos (nome, e-mail, telefone, ideias, mensagem).
+
+Cada objeto vira um DocumentoBusca com o texto já normalizado em Python: sem acentos,
+minúsculo, pontuação como espaço e o telefone em dígitos (com e sem DDI/DDD). A consulta
+passa pela mesma normalização, então "jose" encontra "José" e "98765-4321" encontra
+"(11) 98765-4321" em qualquer banco. O motor depende do banco:
+
+- PostgreSQL: to_tsvector('simple', texto) com índice GIN;
+- SQLite: tabela FTS5 de conteúdo externo (app_documentobusca_fts);
+- outros (ou SQLite sem FTS5): icontains no texto normalizado.
+"""
+import re
+import unicodedata
+
+from django.db import connection, transaction
+
+from .models import Agendamento, DocumentoBusca, Orcamento
+
+LIMITE_RESULTADOS = 50
+TABELA_FTS = 'app_documentobusca_fts'
+
+_fts_sqlite_disponivel = None
+
+
+# --- Normalização ---
+
+def normalizar(texto):
+    """'José da Silva-Sá' -> 'jose da silva sa'"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texto))
+
+
+def tokens_telefone(telefone):
+    """Dígitos do telefone completos e sem DDI/DDD, para casar buscas com ou sem eles"""
+    digitos = re.sub(r'\D', '', telefone or '')
+    if not digitos:
+        return []
+    variantes = [digitos]
+    if digitos.startswith('55') and len(digitos) > 11:
+        variantes.append(digitos[2:])
+    if len(variantes[-1]) > 9:
+        variantes.append(variantes[-1][2:])
+    return variantes
+
+
+def texto_agendamento(agendamento):
+    partes = [agendamento.nome, agendamento.email, agendamento.mensagem, *tokens_telefone(agendamento.telefone)]
+    return normalizar(' '.join(partes))
+
+
+def texto_orcamento(orcamento):
+    partes = [
+        orcamento.nome, orcamento.email, orcamento.ideias, dict(Orcamento.TIPO_EVENTO_CHOICES).get(orcamento.tipo_evento, ''),
+        *tokens_telefone(orcamento.telefone),
+    ]
+    return normalizar(' '.join(partes))
+
+
+def titulo_agendamento(agendamento):
+    return f"{agendamento.nome} — visita {agendamento.data:%d/%m/%Y} {agendamento.hora:%H:%M}"
+
+
+def titulo_orcamento(orcamento):
+    return f"{orcamento.nome} — {dict(Orcamento.TIPO_EVENTO_CHOICES).get(orcamento.tipo_evento, orcamento.tipo_evento)}"
+
+
+# --- Indexação ---
+
+def documento(instancia):
+    """(modelo, titulo, texto) do DocumentoBusca correspondente à instância"""
+    if isinstance(instancia, Agendamento):
+        return 'agendamento', titulo_agendamento(instancia), texto_agendamento(instancia)
+    return 'orcamento', titulo_orcamento(instancia), texto_orcamento(instancia)
+
+
+def indexar(instancia):
+    modelo, titulo, texto = documento(instancia)
+    DocumentoBusca.objects.update_or_create(
+        modelo=modelo, objeto_id=instancia.pk, defaults={'titulo': titulo[:255], 'texto': texto},
+    )
+
+
+def remover(modelo, objeto_id):
+    DocumentoBusca.objects.filter(modelo=modelo, objeto_id=objeto_id).delete()
+
+
+def reindexar(tamanho_lote=500):
+    """Reconstrói todos os documentos de busca; retorna quantos foram gravados"""
+    total = 0
+    with transaction.atomic():
+        DocumentoBusca.objects.all().delete()
+        for queryset in (Agendamento.objects.all(), Orcamento.objects.all()):
+            lote = []
+            for instancia in queryset.iterator(chunk_size=tamanho_lote):
+                modelo, titulo, texto = documento(instancia)
+                lote.append(DocumentoBusca(modelo=modelo, objeto_id=instancia.pk, titulo=titulo[:255], texto=texto))
+                if len(lote) >= tamanho_lote:
+                    DocumentoBusca.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            DocumentoBusca.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+# --- Consulta ---
+
+def _fts_sqlite():
+    global _fts_sqlite_disponivel
+    if _fts_sqlite_disponivel is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [TABELA_FTS])
+            _fts_sqlite_disponivel = cursor.fetchone() is not None
+    return _fts_sqlite_disponivel
+
+
+def palavras_busca(termo):
+    """Palavras normalizadas do termo; um telefone digitado com pontuação vira um só número"""
+    if re.fullmatch(r'[\d\s()+.-]+', termo or '') and len(re.sub(r'\D', '', termo)) >= 4:
+        digitos = re.sub(r'\D', '', termo)
+        return [digitos[2:] if digitos.startswith('55') and len(digitos) > 11 else digitos]
+    return normalizar(termo).split()
+
+
+def buscar_documentos(termo, modelos=None, limite=LIMITE_RESULTADOS):
+    """DocumentoBusca que contêm todas as palavras do termo (por prefixo), mais relevantes primeiro"""
+    palavras = palavras_busca(termo)
+    if not palavras:
+        return []
+    documentos = DocumentoBusca.objects.all()
+    if modelos:
+        documentos = documentos.filter(modelo__in=modelos)
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        # Mesma expressão do índice GIN criado na migration 0006
+        vetor = SearchVector('texto', config='simple')
+        consulta = SearchQuery(' & '.join(f'{p}:*' for p in palavras), config='simple', search_type='raw')
+        return list(
+            documentos.annotate(vetor=vetor, relevancia=SearchRank(vetor, consulta))
+            .filter(vetor=consulta).order_by('-relevancia')[:limite]
+        )
+
+    if connection.vendor == 'sqlite' and _fts_sqlite():
+        sql = f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s"
+        parametros = [' AND '.join(f'"{p}"*' for p in palavras)]
+        if modelos:
+            sql += f" AND modelo IN ({', '.join(['%s'] * len(modelos))})"
+            parametros += list(modelos)
+        with connection.cursor() as cursor:
+            cursor.execute(sql + " ORDER BY rank LIMIT %s", parametros + [limite])
+            ids = [linha[0] for linha in cursor.fetchall()]
+        por_id = DocumentoBusca.objects.in_bulk(ids)
+        return [por_id[i] for i in ids if i in por_id]
+
+    for palavra in palavras:
+        documentos = documentos.filter(texto__icontains=palavra)
+    return list(documentos[:limite])
+
+
+def buscar_ids(modelo, termo, limite=1000):
+    """IDs de `modelo` ('agendamento'/'orcamento') que casam com o termo (usado pelo admin)"""
+    return [doc.objeto_id for doc in buscar_documentos(termo, modelos=[modelo], limite=limite)]
@@ -0,0 +1,92 @@
+# app/calendario.py
+"""Calendário mensal de agendamentos para o staff.
+
+O mês inteiro sai de uma única consulta agregada (contagem por dia e status, mais as
+visitas aceitas ligadas a um orçamento com preço final), então o custo não cresce com
+o número de agendamentos. Os agendamentos de um dia só são lidos quando o staff abre
+o dia (visitas_do_dia, carregado sob demanda pela página).
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Agendamento
+
+PRIMEIRO_DIA_SEMANA = calendar.SUNDAY
+
+
+def _vazio():
+    return {'total': 0, 'pendente': 0, 'aceito': 0, 'recusado': 0, 'orcamentos_fechados': 0}
+
+
+def contagens_por_dia(inicio, fim):
+    """{dia: {'total', 'pendente', 'aceito', 'recusado', 'orcamentos_fechados'}} entre inicio e fim"""
+    linhas = (
+        Agendamento.objects.filter(data__range=(inicio, fim))
+        .values('data', 'status')
+        .annotate(
+            quantidade=Count('pk'),
+            fechados=Count('pk', filter=Q(orcamento_associado__preco_final__isnull=False)),
+        )
+        .order_by()
+    )
+    dias = defaultdict(_vazio)
+    for linha in linhas:
+        contagem = dias[linha['data']]
+        contagem['total'] += linha['quantidade']
+        contagem[linha['status']] += linha['quantidade']
+        if linha['status'] == 'aceito':
+            contagem['orcamentos_fechados'] += linha['fechados']
+    return dias
+
+
+def montar_mes(ano, mes):
+    """Semanas completas (com os dias vizinhos) do mês, cada dia com suas contagens"""
+    semanas = calendar.Calendar(PRIMEIRO_DIA_SEMANA).monthdatescalendar(ano, mes)
+    contagens = contagens_por_dia(semanas[0][0], semanas[-1][-1])
+    hoje = timezone.localdate()
+    inicio = date(ano, mes, 1)
+    return {
+        'inicio': inicio,
+        'anterior': date(ano - 1, 12, 1) if mes == 1 else date(ano, mes - 1, 1),
+        'proximo': date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1),
+        'semanas': [
+            [
+                {'data': dia, 'do_mes': dia.month == mes, 'hoje': dia == hoje, **contagens.get(dia, _vazio())}
+                for dia in semana
+            ]
+            for semana in semanas
+        ],
+        'totais': {
+            chave: sum(c[chave] for dia, c in contagens.items() if dia.month == mes)
+            for chave in _vazio()
+        },
+    }
+
+
+def visitas_do_dia(dia):
+    agendamentos = (
+        Agendamento.objects.filter(data=dia)
+        .select_related('orcamento_associado')
+        .only('id', 'nome', 'telefone', 'hora', 'status', 'orcamento_associado__id',
+              'orcamento_associado__preco_final')
+        .order_by('hora')
+    )
+    return [
+        {
+            'id': agendamento.pk,
+            'hora': f'{agendamento.hora:%H:%M}',
+            'nome': agendamento.nome,
+            'telefone': agendamento.telefone,
+            'status': agendamento.status,
+            'status_display': agendamento.get_status_display(),
+            'orcamento_id': agendamento.orcamento_associado_id,
+            'preco_final': (
+                agendamento.orcamento_associado.preco_final if agendamento.orcamento_associado_id else None
+            ),
+        }
+        for agendamento in agendamentos
+    ]
@@ -0,0 +1,144 @@
+# app/compressao.py
+"""Compressão das respostas dinâmicas e GET condicional das páginas públicas.
+
+O WhiteNoise já serve os estáticos comprimidos; aqui entram o HTML e o JSON das views.
+Usa brotli quando o pacote está instalado e o navegador aceita, senão gzip (com os bytes
+aleatórios do Django contra BREACH; o token CSRF já sai mascarado a cada resposta).
+Respostas em streaming (exportações, .ics, PDF), curtas ou já codificadas passam direto.
+
+Páginas públicas (visitante sem sessão, sem cookie novo na resposta e sem private/no-store)
+ganham uma ETag fraca com o hash do corpo: se o navegador já tem a mesma página, recebe
+304 sem corpo, antes mesmo de comprimir. A ETag é fraca porque vale para qualquer
+codificação do mesmo conteúdo.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote, só gzip
+    brotli = None
+
+CONFIGURACAO_PADRAO = {
+    'ATIVA': True,
+    'MINIMO_BYTES': 1024,  # abaixo disso os cabeçalhos comem o ganho
+    'TIPOS': (
+        'text/html', 'text/plain', 'text/css', 'text/csv', 'text/calendar', 'text/javascript',
+        'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+    ),
+    # 4-6 é o equilíbrio para conteúdo gerado a cada pedido (11 é para arquivos pré-comprimidos)
+    'QUALIDADE_BROTLI': 5,
+    'ETAG_PAGINAS_PUBLICAS': True,
+}
+
+# Mesmo valor do GZipMiddleware do Django
+MAX_BYTES_ALEATORIOS = 100
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'COMPRESSAO', {}))
+    return configuracao
+
+
+# --- Negociação ---
+
+def codificacoes_aceitas(cabecalho):
+    """{'gzip': 1.0, 'br': 0.5, ...} a partir do Accept-Encoding"""
+    aceitas = {}
+    for parte in cabecalho.split(','):
+        nome, _, parametros = parte.partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        peso = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        aceitas[nome] = peso
+    return aceitas
+
+
+def escolher_codificacao(cabecalho):
+    aceitas = codificacoes_aceitas(cabecalho)
+    curinga = aceitas.get('*', 0.0)
+    for codificacao in (('br', 'gzip') if brotli else ('gzip',)):
+        if aceitas.get(codificacao, curinga) > 0:
+            return codificacao
+    return None
+
+
+# --- ETag das páginas públicas ---
+
+def pagina_publica(request, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.streaming:
+        return False
+    if response.has_header('ETag') or response.cookies or 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    # Visitante anônimo não tem sessão (as mensagens dele vão em cookie, ver app/mensagens.py);
+    # olhar o cookie em vez de request.user evita carregar sessão e usuário só para decidir
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    cache_control = response.get('Cache-Control', '').lower()
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def etag_fraca(conteudo):
+    return f'W/"{hashlib.md5(conteudo).hexdigest()}"'
+
+
+# --- Resposta ---
+
+def comprimivel(response, configuracao):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if len(response.content) < configuracao['MINIMO_BYTES']:
+        return False
+    tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return tipo in configuracao['TIPOS']
+
+
+def comprimir(conteudo, codificacao, configuracao):
+    if codificacao == 'br':
+        return brotli.compress(conteudo, quality=configuracao['QUALIDADE_BROTLI'])
+    return compress_string(conteudo, max_random_bytes=MAX_BYTES_ALEATORIOS)
+
+
+def processar(request, response):
+    """304 para a página pública que o navegador já tem; senão a resposta comprimida quando vale a pena"""
+    configuracao = obter_configuracao()
+    if not configuracao['ATIVA']:
+        return response
+
+    if configuracao['ETAG_PAGINAS_PUBLICAS'] and pagina_publica(request, response):
+        response['ETag'] = etag_fraca(response.content)
+        condicional = get_conditional_response(request, etag=response['ETag'], response=response)
+        if condicional is not response:
+            if comprimivel(response, configuracao):
+                patch_vary_headers(condicional, ('Accept-Encoding',))
+            return condicional
+
+    if not comprimivel(response, configuracao):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if codificacao is None:
+        return response
+    comprimido = comprimir(response.content, codificacao, configuracao)
+    if len(comprimido) >= len(response.content):
+        return response
+    response.content = comprimido
+    response['Content-Length'] = str(len(comprimido))
+    response['Content-Encoding'] = codificacao
+    # A ETag forte de quem gerou a resposta (ex.: API) passa a valer só como fraca
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
@@ -0,0 +1,168 @@
+# app/diagnostico.py
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CACHE = 'diagnostico'
+
+# Intervalos em segundos. None = a sonda só roda sob demanda (comando `diagnostico_email` ou,
+# no caso do envio, a página de teste). O envio manda um e-mail de verdade: com cache por
+# processo (LocMem) cada worker do gunicorn mandaria o seu, então fica fora do agendador.
+CONFIGURACAO_PADRAO = {
+    'HOST': 'smtp.gmail.com',
+    'PORTA': 587,
+    'TIMEOUT': 10,
+    'AGENDADOR_ATIVO': True,
+    'SONDAS': {
+        'dns': {'funcao': 'app.diagnostico.sonda_dns', 'intervalo': 300},
+        'conexao': {'funcao': 'app.diagnostico.sonda_conexao_smtp', 'intervalo': 300},
+        'envio': {'funcao': 'app.diagnostico.sonda_envio_email', 'intervalo': None},
+    },
+}
+
+
+def obter_configuracao():
+    """Mescla settings.DIAGNOSTICO com os valores padrão"""
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'DIAGNOSTICO', {}))
+    return configuracao
+
+
+# --- Sondas ---
+# Cada sonda recebe a configuração e retorna (sucesso, mensagem).
+
+def sonda_dns(configuracao):
+    host = configuracao['HOST']
+    try:
+        socket.gethostbyname(host)
+        return True, f"DNS de {host} resolvido"
+    except Exception as e:
+        return False, f"Falha no DNS: {e}"
+
+
+def sonda_conexao_smtp(configuracao):
+    host, porta = configuracao['HOST'], configuracao['PORTA']
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(configuracao['TIMEOUT'])
+            resultado = sock.connect_ex((host, porta))
+        if resultado == 0:
+            return True, f"Conexão com {host}:{porta}"
+        return False, f"Falha na conexão (código: {resultado})"
+    except Exception as e:
+        return False, f"Erro de socket: {e}"
+
+
+def sonda_envio_email(configuracao):
+    try:
+        send_mail(
+            subject='Teste de Conexão - Sabina Decorações',
+            message='Teste de conexão bem-sucedido.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[settings.DEFAULT_FROM_EMAIL],
+            fail_silently=False,
+        )
+        return True, "Conexão bem-sucedida"
+    except Exception as e:
+        return False, f"Falha na conexão: {e}"
+
+
+# --- Execução e cache dos resultados ---
+
+def _chave(nome):
+    return f'{PREFIXO_CACHE}:resultado:{nome}'
+
+
+def executar_sonda(nome, configuracao=None):
+    """Executa uma sonda e grava o resultado (com horário) no cache"""
+    configuracao = configuracao or obter_configuracao()
+    definicao = configuracao['SONDAS'][nome]
+    inicio = time.monotonic()
+    try:
+        sucesso, mensagem = import_string(definicao['funcao'])(configuracao)
+    except Exception as e:
+        sucesso, mensagem = False, f"Erro inesperado: {e}"
+
+    resultado = {
+        'nome': nome,
+        'sucesso': sucesso,
+        'mensagem': mensagem,
+        'verificado_em': timezone.now(),
+        'duracao_ms': round((time.monotonic() - inicio) * 1000, 1),
+    }
+    cache.set(_chave(nome), resultado, timeout=None)
+    if not sucesso:
+        logger.warning("Diagnóstico %s falhou: %s", nome, mensagem)
+    return resultado
+
+
+def executar_sondas(nomes=None):
+    configuracao = obter_configuracao()
+    nomes = nomes or list(configuracao['SONDAS'])
+    return [executar_sonda(nome, configuracao) for nome in nomes]
+
+
+def obter_resultados(nomes):
+    """Lê do cache os últimos resultados (None para sondas ainda não executadas)"""
+    encontrados = cache.get_many([_chave(nome) for nome in nomes])
+    return {nome: encontrados.get(_chave(nome)) for nome in nomes}
+
+
+# --- Agendador em segundo plano ---
+
+class Agendador:
+    """Thread daemon que executa cada sonda quando seu intervalo vence.
+
+    Um lock no cache (cache.add) evita que vários workers que compartilham o
+    mesmo cache executem a mesma sonda ao mesmo tempo.
+    """
+
+    PASSO = 5
+
+    def __init__(self):
+        self._thread = None
+        self._pid = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        with self._lock:
+            # Após um fork (gunicorn --preload) a thread do processo pai não existe no filho
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._parar.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._executar, name='diagnostico-agendador', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            configuracao = obter_configuracao()
+            for nome, definicao in configuracao['SONDAS'].items():
+                intervalo = definicao.get('intervalo')
+                if not intervalo:
+                    continue
+                if cache.add(f'{PREFIXO_CACHE}:lock:{nome}', os.getpid(), timeout=intervalo):
+                    executar_sonda(nome, configuracao)
+            self._parar.wait(self.PASSO)
+
+
+agendador = Agendador()
+
+
+def iniciar_agendador():
+    if obter_configuracao()['AGENDADOR_ATIVO']:
+        agendador.iniciar()
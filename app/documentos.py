@@ -0,0 +1,206 @@
+# app/documentos.py
+"""PDF do orçamento final, gerado uma vez por versão e guardado no storage.
+
+A versão é um hash do que aparece como proposta (preço final, pacote e serviços):
+mudou algum deles, o próximo pedido gera um arquivo novo e apaga os antigos; qualquer
+outro download ou reenvio lê o arquivo pronto. A geração roda numa fila em segundo plano
+(disparada ao salvar o preço final) e, se o arquivo ainda não existir quando for pedido,
+no próprio pedido.
+
+O PDF é escrito à mão (texto em Helvetica, uma coluna, quebra de página automática),
+como o .xlsx de app/exportacao.py, para não depender de biblioteca de renderização.
+"""
+import hashlib
+import json
+import logging
+import textwrap
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from . import fila_email
+from .models import CONSTANTES_PACOTES, Orcamento
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACAO_PADRAO = {
+    'PASTA': 'orcamentos',
+}
+
+# Mude ao alterar o layout: todos os PDFs são refeitos sob demanda
+LAYOUT = 1
+
+fila = fila_email.FilaEmail(nome='fila-documentos', limitar=False)
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'DOCUMENTOS', {}))
+    return configuracao
+
+
+# --- Versão e caminho ---
+
+def versao(orcamento):
+    dados = [LAYOUT, orcamento.pk, f'{orcamento.preco_final:.2f}', orcamento.pacote_selecionado,
+             sorted(orcamento.get_servicos_list())]
+    return hashlib.sha256(json.dumps(dados).encode()).hexdigest()[:16]
+
+
+def _pasta(orcamento_id):
+    return f"{obter_configuracao()['PASTA']}/{orcamento_id}"
+
+
+def caminho(orcamento):
+    return f'{_pasta(orcamento.pk)}/orcamento-{orcamento.pk}-{versao(orcamento)}.pdf'
+
+
+def nome_arquivo(orcamento):
+    return f'orcamento-{orcamento.pk}.pdf'
+
+
+# --- PDF mínimo ---
+
+LARGURA, ALTURA, MARGEM = 595, 842, 50  # A4 em pontos
+
+
+def _texto_pdf(texto):
+    dados = texto.encode('cp1252', errors='replace')  # WinAnsiEncoding cobre os acentos
+    return b'(' + dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _paginas(blocos):
+    """Distribui (texto, tamanho, negrito) em páginas de linhas já quebradas na largura"""
+    paginas, atual, y = [], [], ALTURA - MARGEM
+    for texto, tamanho, negrito in blocos:
+        # Helvetica tem em média ~0,5 em de largura por caractere
+        largura = max(int((LARGURA - 2 * MARGEM) / (tamanho * 0.5)), 20)
+        for linha in textwrap.wrap(texto, largura) or ['']:
+            entrelinha = tamanho * 1.4
+            if y - entrelinha < MARGEM:
+                paginas.append(atual)
+                atual, y = [], ALTURA - MARGEM
+            y -= entrelinha
+            atual.append((linha, tamanho, negrito, y))
+    paginas.append(atual)
+    return paginas
+
+
+def gerar_pdf(blocos, titulo=''):
+    objetos = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Pages, preenchido depois de saber os filhos
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Title ' + _texto_pdf(titulo) + b' /Producer (Sabina Decoracoes) >>',
+    ]
+    filhos = []
+    for linhas in _paginas(blocos):
+        conteudo = b''.join(
+            b'BT /%s %g Tf %d %.1f Td %s Tj ET\n' % (b'F2' if negrito else b'F1', tamanho, MARGEM, y, _texto_pdf(linha))
+            for linha, tamanho, negrito, y in linhas
+        )
+        objetos.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(conteudo), conteudo))
+        objetos.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>' % (LARGURA, ALTURA, len(objetos))
+        )
+        filhos.append(len(objetos))
+    objetos[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % numero for numero in filhos), len(filhos),
+    )
+
+    saida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b'%d 0 obj\n%s\nendobj\n' % (numero, objeto)
+    inicio_xref = len(saida)
+    saida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+    saida += b''.join(b'%010d 00000 n \n' % posicao for posicao in posicoes)
+    saida += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objetos) + 1, inicio_xref,
+    )
+    return bytes(saida)
+
+
+# --- Orçamento ---
+
+def _reais(valor):
+    return 'R$ ' + f'{valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def blocos_orcamento(orcamento):
+    pacote = CONSTANTES_PACOTES.get(orcamento.pacote_selecionado, {})
+    blocos = [
+        ('Sabina Decorações', 18, True),
+        (f'Orçamento #{orcamento.pk}', 14, True),
+        (f'Emitido em {timezone.localdate():%d/%m/%Y}', 10, False),
+        ('', 10, False),
+        ('Cliente', 12, True),
+        (f'{orcamento.nome}  |  {orcamento.email}  |  {orcamento.telefone}', 11, False),
+        ('', 10, False),
+        ('Evento', 12, True),
+        (f'{orcamento.get_tipo_evento_display()} para {orcamento.num_convidados} convidados, '
+         f'{orcamento.get_local_evento_display().lower()}', 11, False),
+        ('', 10, False),
+        (f"Pacote {pacote.get('nome', orcamento.pacote_selecionado)}", 12, True),
+        (pacote.get('descricao', ''), 11, False),
+    ]
+    servicos = orcamento.get_servicos_detalhados()
+    if servicos:
+        blocos += [('', 10, False), ('Serviços adicionais', 12, True)]
+        blocos += [(f"- {servico['nome']}", 11, False) for servico in servicos]
+    if orcamento.ideias:
+        blocos += [('', 10, False), ('Ideias', 12, True), (orcamento.ideias, 11, False)]
+    blocos += [
+        ('', 10, False),
+        (f'Preço final: {_reais(orcamento.preco_final)}', 14, True),
+        ('', 10, False),
+        ('Dúvidas ou ajustes: responda ao e-mail deste orçamento.', 9, False),
+    ]
+    return blocos
+
+
+def renderizar(orcamento):
+    return gerar_pdf(blocos_orcamento(orcamento), titulo=f'Orçamento #{orcamento.pk}')
+
+
+def obter_pdf(orcamento):
+    """Caminho no storage do PDF da versão atual, gerando-o só se ainda não existir"""
+    if orcamento.preco_final is None:
+        raise ValueError(f"Orçamento #{orcamento.pk} sem preço final")
+    destino = caminho(orcamento)
+    if default_storage.exists(destino):
+        return destino
+    inicio = time.perf_counter()
+    conteudo = renderizar(orcamento)
+    if not default_storage.exists(destino):  # outro worker pode ter terminado antes
+        default_storage.save(destino, ContentFile(conteudo))
+    logger.info("PDF do orçamento #%s gerado em %.0f ms", orcamento.pk, (time.perf_counter() - inicio) * 1000)
+    _remover_versoes_antigas(orcamento.pk, destino)
+    return destino
+
+
+def _remover_versoes_antigas(orcamento_id, atual):
+    pasta = _pasta(orcamento_id)
+    try:
+        _, arquivos = default_storage.listdir(pasta)
+    except FileNotFoundError:
+        return
+    for arquivo in arquivos:
+        if f'{pasta}/{arquivo}' != atual:
+            default_storage.delete(f'{pasta}/{arquivo}')
+
+
+def gerar_em_segundo_plano(orcamento_id):
+    fila.enfileirar(_tarefa_gerar, args=(orcamento_id,), orcamento_id=orcamento_id)
+
+
+def _tarefa_gerar(orcamento_id):
+    orcamento = Orcamento.objects.filter(pk=orcamento_id).first()
+    if orcamento is not None and orcamento.preco_final is not None:
+        obter_pdf(orcamento)
@@ -56,11 +56,11 @@ class EmailService:
                 fail_silently=False,
             )
             
-            logger.info(f"✅ E-mail de {tipo} enviado para {agendamento.email}")
+            logger.info("E-mail de %s enviado para %s", tipo, agendamento.email)
             return True, "E-mail enviado com sucesso"
             
         except Exception as e:
-            logger.error(f"❌ Erro ao enviar e-mail: {str(e)}")
+            logger.error("Erro ao enviar e-mail de %s para %s: %s", tipo, agendamento.email, e)
             # Tentar fallback simples
             return EmailService._enviar_fallback(agendamento, tipo, str(e))
     
@@ -102,9 +102,9 @@ Sabina Decorações"""
                 fail_silently=True,
             )
             
-            logger.info(f"✅ E-mail fallback de {tipo} enviado")
+            logger.info("E-mail fallback de %s enviado para %s", tipo, agendamento.email)
             return True, "E-mail fallback enviado"
             
         except Exception as e:
-            logger.error(f"❌ Falha total no envio: {str(e)}")
+            logger.error("Falha total no envio de %s para %s: %s", tipo, agendamento.email, e)
             return False, f"Falha total: {str(e)}"
\ No newline at end of file
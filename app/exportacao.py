@@ -0,0 +1,216 @@
+# app/exportacao.py
+"""Exportação em streaming (CSV e XLSX) de orçamentos e agendamentos.
+
+As linhas vêm de queryset.iterator(chunk_size=...) e cada bloco gerado é entregue
+ao cliente antes de ler o próximo, então a memória não cresce com o número de linhas.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from .models import Agendamento, Orcamento
+
+TAMANHO_LOTE = 500
+
+# Texto que o Excel/LibreOffice interpretaria como fórmula (nome ou mensagem vindos do site)
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+# Caracteres de controle que o XML 1.0 não aceita (deixariam o .xlsx corrompido)
+CONTROLE_INVALIDO_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+# --- Filtros compartilhados com as listas ---
+
+def filtrar_orcamentos(parametros):
+    orcamentos = Orcamento.objects.all().order_by('-data_criacao')
+    tipo_evento_filtro = parametros.get('tipo_evento')
+    if tipo_evento_filtro:
+        orcamentos = orcamentos.filter(tipo_evento=tipo_evento_filtro)
+    return orcamentos
+
+
+def filtrar_agendamentos(parametros):
+    agendamentos = Agendamento.objects.all().order_by('-data', '-hora')
+    status_filtro = parametros.get('status')
+    if status_filtro:
+        agendamentos = agendamentos.filter(status=status_filtro)
+    return agendamentos
+
+
+# --- Colunas ---
+
+def _data_hora_local(valor):
+    return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') if valor else ''
+
+
+COLUNAS_ORCAMENTO = [
+    ('ID', lambda o: o.id),
+    ('Cliente', lambda o: o.nome),
+    ('E-mail', lambda o: o.email),
+    ('Telefone', lambda o: o.telefone),
+    ('Tipo de evento', lambda o: o.get_tipo_evento_display()),
+    ('Convidados', lambda o: o.num_convidados),
+    ('Local', lambda o: o.get_local_evento_display()),
+    ('Pacote', lambda o: o.get_pacote_selecionado_display()),
+    ('Serviços', lambda o: ', '.join(s['nome'] for s in o.get_servicos_detalhados())),
+    ('Ideias', lambda o: o.ideias),
+    ('Criado em', lambda o: _data_hora_local(o.data_criacao)),
+    ('Orçamento estimado', lambda o: o.calcular_orcamento_estimado()),
+    ('Preço final', lambda o: o.preco_final if o.preco_final is not None else ''),
+]
+
+COLUNAS_AGENDAMENTO = [
+    ('ID', lambda a: a.id),
+    ('Nome', lambda a: a.nome),
+    ('E-mail', lambda a: a.email),
+    ('Telefone', lambda a: a.telefone),
+    ('Data', lambda a: a.data.strftime('%d/%m/%Y')),
+    ('Hora', lambda a: a.hora.strftime('%H:%M')),
+    ('Status', lambda a: a.get_status_display()),
+    ('Mensagem', lambda a: a.mensagem),
+    ('Orçamento associado', lambda a: a.orcamento_associado_id or ''),
+    ('Aceito por', lambda a: a.aceito_por.username if a.aceito_por_id else ''),
+    ('Recusado por', lambda a: a.recusado_por.username if a.recusado_por_id else ''),
+]
+
+
+def linhas_orcamentos(queryset):
+    queryset = queryset.only(
+        'id', 'nome', 'email', 'telefone', 'tipo_evento', 'num_convidados', 'local_evento',
+        'pacote_selecionado', 'servicos_adicionais', 'ideias', 'data_criacao', 'preco_final',
+    )
+    for orcamento in queryset.iterator(chunk_size=TAMANHO_LOTE):
+        yield [valor(orcamento) for _, valor in COLUNAS_ORCAMENTO]
+
+
+def linhas_agendamentos(queryset):
+    queryset = queryset.select_related('aceito_por', 'recusado_por').only(
+        'id', 'nome', 'email', 'telefone', 'data', 'hora', 'status', 'mensagem', 'orcamento_associado',
+        'aceito_por__username', 'recusado_por__username',
+    )
+    for agendamento in queryset.iterator(chunk_size=TAMANHO_LOTE):
+        yield [valor(agendamento) for _, valor in COLUNAS_AGENDAMENTO]
+
+
+# --- Formatos ---
+
+def _texto_seguro(valor):
+    """Prefixa com ' o texto que a planilha abriria como fórmula (só no CSV)"""
+    return "'" + valor if valor.startswith(INICIO_FORMULA) else valor
+
+
+class _Buffer:
+    """Arquivo só de escrita cujo conteúdo é recolhido (e esvaziado) a cada bloco"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(dados)
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def recolher(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+
+def gerar_csv(titulos, linhas):
+    class Eco:
+        def write(self, valor):
+            return valor
+
+    escritor = csv.writer(Eco())
+    yield '﻿' + escritor.writerow(titulos)  # BOM para o Excel reconhecer UTF-8
+    for linha in linhas:
+        yield escritor.writerow([_texto_seguro(valor) if isinstance(valor, str) else valor for valor in linha])
+
+
+def _referencia_coluna(indice):
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _linha_xlsx(numero, valores):
+    celulas = []
+    for indice, valor in enumerate(valores):
+        referencia = f'{_referencia_coluna(indice)}{numero}'
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) and not hasattr(valor, 'as_tuple'):
+            # inlineStr nunca é avaliada como fórmula: o texto vai como está
+            texto = escape(CONTROLE_INVALIDO_XML.sub('', str(valor))).replace('\n', '&#10;')
+            celulas.append(f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>')
+        else:
+            celulas.append(f'<c r="{referencia}"><v>{valor}</v></c>')
+    return f'<row r="{numero}">{"".join(celulas)}</row>'
+
+
+ARQUIVOS_FIXOS_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+        'officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+        'worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def gerar_xlsx(titulos, linhas, nome_planilha='Dados'):
+    """Gera um .xlsx mínimo (uma planilha, strings inline) escrevendo o zip em streaming"""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, conteudo in ARQUIVOS_FIXOS_XLSX.items():
+            arquivo_zip.writestr(nome, conteudo)
+        arquivo_zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(nome_planilha)}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        yield buffer.recolher()
+
+        with arquivo_zip.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilha.write(_linha_xlsx(1, titulos).encode())
+            for numero, linha in enumerate(linhas, start=2):
+                planilha.write(_linha_xlsx(numero, linha).encode())
+                if numero % TAMANHO_LOTE == 0:
+                    yield buffer.recolher()
+            planilha.write(b'</sheetData></worksheet>')
+    yield buffer.recolher()
+
+
+FORMATOS = {
+    'csv': (gerar_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (gerar_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,110 @@
+# app/fila_email.py
+"""Fila de envio de e-mails em segundo plano, respeitando o limitador.
+
+As views enfileiram a tarefa e retornam na hora. Uma thread por processo executa as
+tarefas em ordem; quando o limitador nega (provedor ou destinatário sem tokens), a
+tarefa volta para a fila com o atraso indicado em vez de falhar. A fila é em memória:
+tarefas pendentes se perdem se o processo reiniciar, como acontecia com as threads avulsas.
+"""
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from . import limitador, logs
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class Tarefa:
+    quando: float
+    sequencia: int
+    funcao: object = field(compare=False)
+    args: tuple = field(compare=False, default=())
+    destinatario: str = field(compare=False, default=None)
+    ids: dict = field(compare=False, default_factory=dict)
+    contexto: contextvars.Context = field(compare=False, default=None)
+    adiamentos: int = field(compare=False, default=0)
+
+
+class FilaEmail:
+    """`limitar=False` cria uma fila igual para tarefas que não enviam e-mail (ex.: app/documentos.py)"""
+
+    def __init__(self, nome='fila-email', limitar=True):
+        self.nome = nome
+        self.limitar = limitar
+        self._tarefas = []
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def enfileirar(self, funcao, args=(), destinatario=None, **ids):
+        """Agenda funcao(*args); `destinatario` entra no limite por destinatário"""
+        tarefa = Tarefa(time.monotonic(), next(self._sequencia), funcao, tuple(args), destinatario, ids,
+                        contextvars.copy_context())
+        with self._condicao:
+            heapq.heappush(self._tarefas, tarefa)
+            self._iniciar()
+            self._condicao.notify()
+        return tarefa
+
+    def pendentes(self):
+        with self._condicao:
+            return len(self._tarefas)
+
+    def _iniciar(self):
+        # Após um fork (gunicorn --preload) a thread do processo pai não existe no filho
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._executar, name=self.nome, daemon=True)
+        self._thread.start()
+
+    def _proxima(self):
+        with self._condicao:
+            while True:
+                if self._tarefas:
+                    espera = self._tarefas[0].quando - time.monotonic()
+                    if espera <= 0:
+                        return heapq.heappop(self._tarefas)
+                    self._condicao.wait(espera)
+                else:
+                    self._condicao.wait()
+
+    def processar(self, tarefa):
+        """Executa a tarefa ou a devolve à fila se o limitador pedir para esperar"""
+        with logs.correlacionar(**tarefa.ids):
+            try:
+                if self.limitar:
+                    limitador.reservar_envio(tarefa.destinatario)
+            except limitador.LimiteExcedido as e:
+                tarefa.quando = time.monotonic() + e.espera
+                tarefa.adiamentos += 1
+                logger.info("E-mail adiado %.1fs pelo limite de envio (%sº adiamento)", e.espera, tarefa.adiamentos)
+                with self._condicao:
+                    heapq.heappush(self._tarefas, tarefa)
+                    self._condicao.notify()
+                return False
+            try:
+                tarefa.funcao(*tarefa.args)
+            except Exception:
+                logger.exception("Erro na tarefa %s (%s)", getattr(tarefa.funcao, '__name__', tarefa.funcao), self.nome)
+            return True
+
+    def _executar(self):
+        while True:
+            tarefa = self._proxima()
+            tarefa.contexto.run(self.processar, tarefa)
+
+
+fila = FilaEmail()
+
+
+def enfileirar(funcao, args=(), destinatario=None, **ids):
+    return fila.enfileirar(funcao, args, destinatario, **ids)
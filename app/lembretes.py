@@ -0,0 +1,169 @@
+# app/lembretes.py
+"""Lembretes de visitas aceitas (ex.: 24h e 2h antes), por e-mail e opcionalmente SMS.
+
+`despachar_lembretes()` é chamado em loop pelo comando enviar_lembretes. Cada envio é
+precedido da gravação de um LembreteEnviado (único por agendamento/antecedência/canal):
+se dois processos rodarem ao mesmo tempo, só quem gravar a marca envia.
+"""
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from . import limitador, logs
+from .models import Agendamento, LembreteEnviado
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACAO_PADRAO = {
+    # nome -> minutos antes da visita
+    'ANTECEDENCIAS': {'24h': 24 * 60, '2h': 2 * 60},
+    'CANAIS': ['email'],
+    'TRANSPORTES': {
+        'email': 'app.lembretes.TransporteEmail',
+        'sms': 'app.lembretes.TransporteSMS',
+    },
+    'LOTE': 100,
+    'INTERVALO_SEGUNDOS': 300,
+}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'LEMBRETES', {}))
+    return configuracao
+
+
+# --- Transportes ---
+
+def telefone_e164(telefone):
+    """Número no formato do Twilio (+55DDDNÚMERO), aceitando a máscara do formulário"""
+    digitos = re.sub(r'\D', '', telefone)
+    return f"+{digitos}" if digitos.startswith('55') else f"+55{digitos}"
+
+
+class TransporteEmail:
+    def enviar(self, agendamento, antecedencia):
+        contexto = {
+            'nome': agendamento.nome,
+            'data': agendamento.data.strftime('%d/%m/%Y'),
+            'hora': agendamento.hora.strftime('%H:%M'),
+            'antecedencia': antecedencia,
+        }
+        html_message = render_to_string('app/email_lembrete.html', contexto)
+        limitador.reservar_envio(agendamento.email)
+        send_mail(
+            subject='Lembrete da sua visita - Sabina Decorações',
+            message=strip_tags(html_message),
+            html_message=html_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[agendamento.email],
+            fail_silently=False,
+        )
+
+
+class TransporteSMS:
+    """SMS pelo Twilio (requer TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN e TWILIO_NUMERO)"""
+
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.cliente = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self.remetente = settings.TWILIO_NUMERO
+
+    def enviar(self, agendamento, antecedencia):
+        self.cliente.messages.create(
+            to=telefone_e164(agendamento.telefone),
+            from_=self.remetente,
+            body=(f"Sabina Decorações: lembrete da sua visita em {agendamento.data:%d/%m} "
+                  f"às {agendamento.hora:%H:%M}. Até lá!"),
+        )
+
+
+class TransporteFalso:
+    """Guarda os envios em memória (testes e ambiente local)"""
+
+    enviados = []
+
+    def enviar(self, agendamento, antecedencia):
+        TransporteFalso.enviados.append((agendamento.pk, antecedencia))
+
+
+# --- Despacho ---
+
+def antecedencia_devida(agendamento, agora, antecedencias):
+    """A menor antecedência cuja janela já abriu para a visita (None se nenhuma ou se já passou)"""
+    faltam = agendamento.data_hora() - agora
+    if faltam <= timedelta(0):
+        return None
+    devidas = [(minutos, nome) for nome, minutos in antecedencias.items() if faltam <= timedelta(minutes=minutos)]
+    return min(devidas)[1] if devidas else None
+
+
+def _marcar(agendamento, antecedencia, canal):
+    try:
+        with transaction.atomic():
+            return LembreteEnviado.objects.create(agendamento=agendamento, antecedencia=antecedencia, canal=canal)
+    except IntegrityError:
+        return None  # outro processo já enviou (ou está enviando)
+
+
+def despachar_lembretes(agora=None):
+    """Envia os lembretes devidos; retorna {'enviados': n, 'adiados': n, 'falhas': n}
+
+    Adiados são os barrados pelo limite de envio de e-mail: ficam para a próxima rodada.
+    """
+    configuracao = obter_configuracao()
+    agora = agora or timezone.now()
+    antecedencias = configuracao['ANTECEDENCIAS']
+    transportes = {canal: import_string(configuracao['TRANSPORTES'][canal])() for canal in configuracao['CANAIS']}
+
+    limite = agora + timedelta(minutes=max(antecedencias.values()))
+    agora_local, limite_local = timezone.localtime(agora), timezone.localtime(limite)
+    # Usa o índice (status, data, hora); o recorte fino por horário é feito em Python
+    candidatos = Agendamento.objects.filter(
+        status='aceito', data__gte=agora_local.date(), data__lte=limite_local.date(),
+    ).only('id', 'nome', 'email', 'telefone', 'data', 'hora')
+
+    resultado = {'enviados': 0, 'adiados': 0, 'falhas': 0}
+    ultimo_id = 0
+    while True:
+        lote = list(candidatos.filter(id__gt=ultimo_id).order_by('id')[:configuracao['LOTE']])
+        if not lote:
+            break
+        ultimo_id = lote[-1].id
+        ja_enviados = set(
+            LembreteEnviado.objects.filter(agendamento__in=lote).values_list('agendamento_id', 'antecedencia', 'canal')
+        )
+        for agendamento in lote:
+            antecedencia = antecedencia_devida(agendamento, agora, antecedencias)
+            if antecedencia is None:
+                continue
+            for canal, transporte in transportes.items():
+                if (agendamento.id, antecedencia, canal) in ja_enviados:
+                    continue
+                marca = _marcar(agendamento, antecedencia, canal)
+                if marca is None:
+                    continue
+                with logs.correlacionar(agendamento_id=agendamento.id):
+                    try:
+                        transporte.enviar(agendamento, antecedencia)
+                    except limitador.LimiteExcedido:
+                        marca.delete()
+                        resultado['adiados'] += 1
+                    except Exception:
+                        # Remove a marca para tentar de novo na próxima rodada
+                        marca.delete()
+                        resultado['falhas'] += 1
+                        logger.exception("Falha no lembrete %s por %s", antecedencia, canal)
+                    else:
+                        resultado['enviados'] += 1
+                        logger.info("Lembrete %s enviado por %s", antecedencia, canal)
+    return resultado
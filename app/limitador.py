@@ -0,0 +1,97 @@
+# app/limitador.py
+"""Token bucket de envio de e-mail, por provedor e por destinatário.
+
+O estado dos baldes fica no cache, então é compartilhado entre os workers do gunicorn
+quando o cache também é (banco, Redis, Memcached; o LocMem padrão vale só por processo).
+A leitura-e-escrita de cada balde é protegida por uma trava com cache.add, que é atômico
+em todos os backends.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIXO_CACHE = 'limitador'
+
+CONFIGURACAO_PADRAO = {
+    # capacidade = rajada máxima; por_segundo = reposição contínua de tokens
+    'PROVEDOR': {'capacidade': 10, 'por_segundo': 0.5},
+    'DESTINATARIO': {'capacidade': 3, 'por_segundo': 1 / 600},
+    'ESPERA_TRAVA_SEGUNDOS': 1.0,
+}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'LIMITE_EMAIL', {}))
+    return configuracao
+
+
+class LimiteExcedido(Exception):
+    """Sem tokens agora; `espera` é quantos segundos faltam para o próximo"""
+
+    def __init__(self, espera):
+        super().__init__(f"Rate limit: tente de novo em {espera:.1f}s")
+        self.espera = espera
+
+
+def _travar(chaves, espera_maxima):
+    obtidas = []
+    limite = time.monotonic() + espera_maxima
+    for chave in sorted(chaves):  # ordem fixa evita deadlock entre baldes
+        while not cache.add(f'{chave}:trava', 1, timeout=5):
+            if time.monotonic() > limite:
+                _destravar(obtidas)
+                return None
+            time.sleep(0.01)
+        obtidas.append(chave)
+    return obtidas
+
+
+def _destravar(chaves):
+    cache.delete_many([f'{chave}:trava' for chave in chaves])
+
+
+def consumir(regras, agora=None):
+    """Tira um token de cada balde em `regras` ({chave: {'capacidade', 'por_segundo'}}) ou de nenhum.
+
+    Retorna 0 se consumiu, senão os segundos até todos os baldes terem um token.
+    """
+    agora = time.time() if agora is None else agora
+    obtidas = _travar(regras, obter_configuracao()['ESPERA_TRAVA_SEGUNDOS'])
+    if obtidas is None:
+        return 0.1  # outro worker está mexendo nos mesmos baldes
+    try:
+        estados = cache.get_many(list(regras))
+        novos, espera = {}, 0.0
+        for chave, regra in regras.items():
+            tokens, momento = estados.get(chave, (regra['capacidade'], agora))
+            tokens = min(regra['capacidade'], tokens + (agora - momento) * regra['por_segundo'])
+            if tokens < 1:
+                espera = max(espera, (1 - tokens) / regra['por_segundo'])
+            novos[chave] = (tokens - 1, agora)
+        if espera:
+            return espera
+        for chave, estado in novos.items():
+            # Depois de capacidade/por_segundo o balde estaria cheio de novo: pode expirar
+            regra = regras[chave]
+            cache.set(chave, estado, timeout=math.ceil(regra['capacidade'] / regra['por_segundo']))
+        return 0
+    finally:
+        _destravar(obtidas)
+
+
+def regras_email(destinatario):
+    configuracao = obter_configuracao()
+    regras = {f'{PREFIXO_CACHE}:provedor:{settings.EMAIL_BACKEND}': configuracao['PROVEDOR']}
+    if destinatario:
+        regras[f'{PREFIXO_CACHE}:destinatario:{destinatario.strip().lower()}'] = configuracao['DESTINATARIO']
+    return regras
+
+
+def reservar_envio(destinatario):
+    """Reserva um envio para `destinatario` ou levanta LimiteExcedido"""
+    espera = consumir(regras_email(destinatario))
+    if espera:
+        raise LimiteExcedido(espera)
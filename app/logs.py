@@ -0,0 +1,141 @@
+# app/logs.py
+"""Logging estruturado: JSON, IDs de correlação e escrita fora da thread da requisição.
+
+Este módulo é importado pelo dictConfig em settings.LOGGING, antes do Django
+carregar os apps, então só pode depender da biblioteca padrão.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_correlacao = contextvars.ContextVar('correlacao_log', default={})
+
+# Atributos padrão do LogRecord; o que não estiver aqui veio de `extra=` e vai para o JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'correlacao', 'request_id'}
+
+
+# --- IDs de correlação ---
+
+def novo_id():
+    return uuid.uuid4().hex
+
+
+def correlacao_atual():
+    return _correlacao.get()
+
+
+@contextmanager
+def correlacionar(**ids):
+    """Anexa IDs (request_id, agendamento_id, orcamento_id...) aos logs emitidos dentro do bloco"""
+    token = _correlacao.set({**_correlacao.get(), **{k: v for k, v in ids.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _correlacao.reset(token)
+
+
+def iniciar_thread(target, args=(), **ids):
+    """Inicia uma thread daemon que herda o contexto de correlação de quem a criou"""
+    contexto = contextvars.copy_context()
+
+    def executar():
+        with correlacionar(**ids):
+            target(*args)
+
+    thread = threading.Thread(target=contexto.run, args=(executar,), daemon=True)
+    thread.start()
+    return thread
+
+
+class FiltroCorrelacao(logging.Filter):
+    """Copia os IDs de correlação do contexto atual para o registro (na thread que emitiu o log)"""
+
+    def filter(self, record):
+        correlacao = _correlacao.get()
+        record.correlacao = correlacao
+        record.request_id = correlacao.get('request_id', '-')
+        return True
+
+
+# --- Formatação ---
+
+class FormatadorJSON(logging.Formatter):
+    def format(self, record):
+        dados = {
+            'momento': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+        }
+        dados.update(getattr(record, 'correlacao', {}))
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['excecao'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+# --- Handler assíncrono ---
+
+class HandlerFilaAssincrono(logging.handlers.QueueHandler):
+    """QueueHandler que entrega os registros a um QueueListener próprio.
+
+    A thread da requisição só enfileira; formatação JSON e escrita no stream
+    acontecem na thread do listener. O listener é (re)criado por PID, então
+    continua funcionando nos workers após o fork do gunicorn com preload.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.destino = logging.StreamHandler(stream or sys.stderr)
+        self._listener = None
+        self._pid = None
+        self._lock_listener = threading.Lock()
+        atexit.register(self.parar)
+
+    def setFormatter(self, fmt):
+        # O formatter configurado é usado pelo handler de destino, na thread do listener
+        self.destino.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve a mensagem (args podem mudar depois) mas deixa a formatação para o listener
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._iniciar_listener()
+        super().enqueue(record)
+
+    def _iniciar_listener(self):
+        with self._lock_listener:
+            if self._pid == os.getpid():
+                return
+            self._listener = logging.handlers.QueueListener(self.queue, self.destino, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def parar(self):
+        with self._lock_listener:
+            if self._listener and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from app import arquivamento
+
+
+class Command(BaseCommand):
+    help = (
+        "Move agendamentos e orçamentos além do horizonte (settings.ARQUIVAMENTO) para as tabelas "
+        "de arquivo, em lotes curtos. Pode ser interrompido e rodado de novo a qualquer momento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help="Linhas por transação (padrão: ARQUIVAMENTO['LOTE'])")
+        parser.add_argument('--max-lotes', type=int, help="Para depois de N lotes de cada tabela")
+        parser.add_argument('--pausa', type=float, help="Segundos entre lotes (padrão: ARQUIVAMENTO['PAUSA_SEGUNDOS'])")
+
+    def handle(self, *args, **options):
+        resultado = arquivamento.arquivar(lote=options['lote'], max_lotes=options['max_lotes'], pausa=options['pausa'])
+        for nome, quantidade in resultado.items():
+            self.stdout.write(self.style.SUCCESS(f"{nome}: {quantidade} arquivado(s)"))
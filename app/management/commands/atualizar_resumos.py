@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app import resumos
+
+
+class Command(BaseCommand):
+    help = "Atualiza os resumos diários do painel analítico (incremental por padrão)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help="Reconstrói todos os resumos do zero")
+
+    def handle(self, *args, **options):
+        resultado = resumos.atualizar_resumos(completo=options['completo'])
+        for nome, dias in resultado.items():
+            descricao = "reconstruído por completo" if dias is None else f"{dias} dia(s) recalculado(s)"
+            self.stdout.write(self.style.SUCCESS(f"{nome}: {descricao}"))
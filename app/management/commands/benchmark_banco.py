@@ -0,0 +1,161 @@
+import random
+import tempfile
+import threading
+import time
+from copy import deepcopy
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from .carga_funil import percentil
+
+TABELA = 'benchmark_banco'
+
+
+def variantes_sqlite(diretorio):
+    """Modo padrão do SQLite (rollback journal, BEGIN DEFERRED) contra SQLITE_OPCOES"""
+    return {
+        'sqlite_padrao': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(Path(diretorio) / 'padrao.sqlite3'),
+            'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE;', 'timeout': 5},
+            'CONN_MAX_AGE': 0,
+        },
+        'sqlite_ajustado': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(Path(diretorio) / 'ajustado.sqlite3'),
+            'OPTIONS': dict(settings.SQLITE_OPCOES),
+            'CONN_MAX_AGE': 600,
+        },
+    }
+
+
+def variantes_postgres():
+    """Uma conexão nova por requisição contra conexões persistentes com health check"""
+    return {
+        'postgres_sem_reuso': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+        'postgres_persistente': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+    }
+
+
+def registrar_alias(alias, sobrescritas):
+    configuracao = deepcopy(connections['default'].settings_dict)
+    configuracao.update(sobrescritas)
+    if configuracao['CONN_MAX_AGE']:
+        configuracao['OPTIONS'].pop('pool', None)  # o pool não aceita conexões persistentes
+    connections.settings[alias] = configuracao
+
+
+def executar_carga(alias, threads, duracao, proporcao_escrita, semente):
+    """Leituras e escritas concorrentes; cada operação termina como uma requisição
+    (close_if_unusable_or_obsolete), então CONN_MAX_AGE pesa como em produção."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABELA}")
+        cursor.execute(f"CREATE TABLE {TABELA} (id integer PRIMARY KEY, dia integer NOT NULL, texto varchar(64))")
+        cursor.execute(f"CREATE INDEX {TABELA}_dia ON {TABELA} (dia)")
+    connections[alias].close()
+
+    proximo_id = iter(range(1, 10 ** 9))
+    trava_id = threading.Lock()
+    resultados = {'leitura': [], 'escrita': [], 'erros': 0}
+    trava_resultados = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def trabalhador(indice):
+        sorteio = random.Random(semente + indice)
+        latencias = {'leitura': [], 'escrita': []}
+        erros = 0
+        conexao = connections[alias]
+        while time.monotonic() < fim:
+            tipo = 'escrita' if sorteio.random() < proporcao_escrita else 'leitura'
+            inicio = time.perf_counter()
+            try:
+                if tipo == 'escrita':
+                    with trava_id:
+                        novo_id = next(proximo_id)
+                    with transaction.atomic(using=alias), conexao.cursor() as cursor:
+                        cursor.execute(f"SELECT count(*) FROM {TABELA} WHERE dia = %s", [novo_id % 30])
+                        cursor.execute(
+                            f"INSERT INTO {TABELA} (id, dia, texto) VALUES (%s, %s, %s)",
+                            [novo_id, novo_id % 30, f'visita {novo_id}'],
+                        )
+                else:
+                    with conexao.cursor() as cursor:
+                        cursor.execute(f"SELECT id, texto FROM {TABELA} WHERE dia = %s", [sorteio.randrange(30)])
+                        cursor.fetchall()
+                latencias[tipo].append((time.perf_counter() - inicio) * 1000)
+            except OperationalError:
+                erros += 1
+            conexao.close_if_unusable_or_obsolete()
+        conexao.close()
+        with trava_resultados:
+            resultados['leitura'] += latencias['leitura']
+            resultados['escrita'] += latencias['escrita']
+            resultados['erros'] += erros
+
+    trabalhadores = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    for thread in trabalhadores:
+        thread.start()
+    for thread in trabalhadores:
+        thread.join()
+
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"DROP TABLE {TABELA}")
+    connections[alias].close()
+    return resultados
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede leituras e escritas concorrentes no banco configurado, comparando o modo padrão "
+        "com o ajustado: SQLite com rollback journal x WAL (em arquivos temporários) ou "
+        "PostgreSQL com conexão nova por requisição x conexões persistentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Requisições simultâneas")
+        parser.add_argument('--duracao', type=float, default=5.0, help="Segundos por variante")
+        parser.add_argument('--proporcao-escrita', type=float, default=0.2, help="Fração das operações que escrevem")
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument(
+            '--confirmar', action='store_true',
+            help=f"Necessário fora do SQLite: as variantes usam o banco configurado e criam/apagam a tabela {TABELA}",
+        )
+
+    def handle(self, *args, **options):
+        motor = connections['default'].vendor
+        with tempfile.TemporaryDirectory() as temporario:
+            if motor == 'sqlite':
+                variantes = variantes_sqlite(temporario)
+            elif not options['confirmar']:
+                raise CommandError(
+                    f"O benchmark vai criar e apagar a tabela {TABELA} no banco {motor} configurado "
+                    f"({connections['default'].settings_dict['NAME']}). Use um banco descartável e passe --confirmar."
+                )
+            elif motor == 'postgresql':
+                variantes = variantes_postgres()
+            else:
+                variantes = {f'{motor}_atual': {}}
+
+            for alias, sobrescritas in variantes.items():
+                registrar_alias(alias, sobrescritas)
+                try:
+                    resultados = executar_carga(
+                        alias, options['threads'], options['duracao'], options['proporcao_escrita'],
+                        options['semente'],
+                    )
+                finally:
+                    # O alias é só desta execução
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+                total = len(resultados['leitura']) + len(resultados['escrita'])
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{alias}: {total / options['duracao']:.0f} op/s"))
+                for tipo in ('leitura', 'escrita'):
+                    latencias = resultados[tipo]
+                    self.stdout.write(
+                        f"  {tipo:8} {len(latencias):6} ops  p50 {percentil(latencias, 50):7.2f} ms  "
+                        f"p95 {percentil(latencias, 95):7.2f} ms  p99 {percentil(latencias, 99):7.2f} ms"
+                    )
+                estilo = self.style.ERROR if resultados['erros'] else self.style.SUCCESS
+                self.stdout.write(estilo(f"  erros (banco travado/conexão): {resultados['erros']}"))
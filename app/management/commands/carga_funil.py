@@ -0,0 +1,311 @@
+import http.cookiejar
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+ETAPAS = ('simulador_get', 'simulador_post', 'agendamento_get', 'disponibilidade', 'agendamento_post')
+RE_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+class SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    """Devolve o 302 em vez de segui-lo: é ele que diz se o formulário foi aceito"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class VisitanteVirtual:
+    """Percorre o funil público como um navegador: cookies próprios e token CSRF de cada formulário"""
+
+    def __init__(self, url_base, rotas, aleatorio, timeout):
+        self.url_base = url_base.rstrip('/')
+        self.rotas = rotas
+        self.aleatorio = aleatorio
+        self.timeout = timeout
+        self.cliente = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), SemRedirecionamento,
+        )
+
+    def _requisicao(self, caminho, dados=None):
+        url = self.url_base + caminho
+        corpo = None
+        cabecalhos = {'User-Agent': 'carga-funil/1.0'}
+        if dados is not None:
+            corpo = urllib.parse.urlencode(dados, doseq=True).encode()
+            cabecalhos['Referer'] = url  # exigido pelo CSRF em HTTPS
+        try:
+            resposta = self.cliente.open(urllib.request.Request(url, data=corpo, headers=cabecalhos), timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if not 300 <= e.code < 400:
+                raise
+            resposta = e
+        with resposta:
+            return resposta.status, resposta.read().decode('utf-8', errors='replace')
+
+    def percorrer(self, registrar):
+        """Executa o funil completo; registrar(etapa, segundos, erro) recebe cada medição"""
+        contexto = {}
+
+        def etapa(nome, funcao, esperado=200):
+            # Os POSTs aceitos redirecionam; um 200 é o formulário de volta com erros
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                status, corpo = funcao()
+                if status >= 400:
+                    erro = f'HTTP {status}'
+                elif status != esperado:
+                    erro = 'formulario_recusado' if status == 200 else f'HTTP {status} (esperado {esperado})'
+            except urllib.error.HTTPError as e:
+                erro, corpo = f'HTTP {e.code}', ''
+            except Exception as e:
+                erro, corpo = type(e).__name__, ''
+            registrar(nome, time.perf_counter() - inicio, erro)
+            return erro is None, corpo
+
+        def token(corpo):
+            encontrado = RE_CSRF.search(corpo)
+            return encontrado.group(1) if encontrado else ''
+
+        ok, corpo = etapa('simulador_get', lambda: self._requisicao(self.rotas['simulador']))
+        if not ok:
+            return
+        n = self.aleatorio.randint(1, 10 ** 6)
+        ok, _ = etapa('simulador_post', lambda: self._requisicao(self.rotas['simulador'], {
+            'csrfmiddlewaretoken': token(corpo),
+            'nome': f'Visitante {n}',
+            'telefone': '(11) 98765-4321',
+            'email': f'visitante{n}@example.com',
+            'tipoEvento': 'casamento',
+            'numeroConvidados': self.aleatorio.randint(20, 300),
+            'localEvento': 'interno',
+            'pacoteSelecionado': self.aleatorio.choice(['basico', 'premium', 'luxo']),
+            'servicos': self.aleatorio.sample(['dj', 'buffet', 'fotografo'], 2),
+            'ideias': 'Teste de carga',
+        }), esperado=302)
+        if not ok:
+            return
+
+        ok, corpo = etapa('agendamento_get', lambda: self._requisicao(self.rotas['agendamento']))
+        if not ok:
+            return
+        dia = date.today() + timedelta(days=self.aleatorio.randint(2, 90))
+        if dia.weekday() == 6:
+            dia += timedelta(days=1)
+        contexto['dia'] = dia.isoformat()
+        ok, disponibilidade = etapa('disponibilidade', lambda: self._requisicao(
+            self.rotas['disponibilidade'] + '?' + urllib.parse.urlencode({'data': contexto['dia']})
+        ))
+        if not ok:
+            return
+        ocupados = set(json.loads(disponibilidade or '{}').get('ocupados', []))
+        livres = [f'{h:02d}:{m:02d}' for h in range(9, 18) for m in (0, 30) if f'{h:02d}:{m:02d}' not in ocupados]
+        etapa('agendamento_post', lambda: self._requisicao(self.rotas['agendamento'], {
+            'csrfmiddlewaretoken': token(corpo),
+            'nome': f'Visitante {n}',
+            'email': f'visitante{n}@example.com',
+            'telefone': '11987654321',
+            'data': contexto['dia'],
+            'hora': self.aleatorio.choice(livres or ['09:00']),
+            'mensagem': 'Teste de carga',
+        }), esperado=302)
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera carga sintética no funil público (simulador → agendamento → disponibilidade) "
+        "e relata vazão, latência p50/p95/p99 e taxa de erros por nível de concorrência. "
+        "Com --url, o servidor alvo precisa de PROTECAO_ATIVA=False (senão os POSTs são barrados)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="URL base de um servidor já em execução (ex.: http://127.0.0.1:8000)")
+        parser.add_argument(
+            '--banco', action='append', default=[], metavar='DATABASE_URL',
+            help="Sobe um gunicorn local para cada DATABASE_URL e compara os resultados. "
+                 "Use 'sqlite' para um arquivo SQLite temporário. Pode ser repetido.",
+        )
+        parser.add_argument('--concorrencia', default='1,5,10', help="Níveis de visitantes simultâneos (ex.: 1,5,10)")
+        parser.add_argument('--duracao', type=float, default=20.0, help="Segundos de carga por nível")
+        parser.add_argument('--workers', type=int, default=2, help="Workers do gunicorn local")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Timeout de cada requisição")
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--saida', help="Grava o relatório completo em JSON neste arquivo")
+
+    def handle(self, *args, **options):
+        if bool(options['url']) == bool(options['banco']):
+            raise CommandError("Informe --url OU pelo menos um --banco.")
+        niveis = [int(n) for n in options['concorrencia'].split(',') if n.strip()]
+        rotas = {
+            'simulador': reverse('simulador_orcamento'),
+            'agendamento': reverse('cria_agendamento'),
+            'disponibilidade': reverse('api_verificar_disponibilidade'),
+        }
+
+        relatorio = {}
+        if options['url']:
+            relatorio[options['url']] = self._executar_niveis(options['url'], rotas, niveis, options)
+        for banco in options['banco']:
+            with self._servidor_local(banco, options) as url:
+                relatorio[self._rotulo(banco)] = self._executar_niveis(url, rotas, niveis, options)
+
+        for alvo, niveis_resultado in relatorio.items():
+            self._imprimir(alvo, niveis_resultado)
+        if options['saida']:
+            Path(options['saida']).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Relatório gravado em {options['saida']}")
+
+    # --- Execução da carga ---
+
+    def _executar_niveis(self, url, rotas, niveis, options):
+        return {str(n): self._executar_nivel(url, rotas, n, options) for n in niveis}
+
+    def _executar_nivel(self, url, rotas, concorrencia, options):
+        latencias = defaultdict(list)
+        erros = defaultdict(lambda: defaultdict(int))
+        funis_completos = [0]
+        lock = threading.Lock()
+        fim = time.monotonic() + options['duracao']
+
+        def registrar(etapa, segundos, erro):
+            with lock:
+                latencias[etapa].append(segundos)
+                if erro:
+                    erros[etapa][erro] += 1
+                elif etapa == ETAPAS[-1]:
+                    funis_completos[0] += 1
+
+        def trabalhador(indice):
+            aleatorio = random.Random(options['semente'] + indice)
+            while time.monotonic() < fim:
+                VisitanteVirtual(url, rotas, aleatorio, options['timeout']).percorrer(registrar)
+
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(trabalhador, range(concorrencia)))
+        decorrido = time.monotonic() - inicio
+
+        total_requisicoes = sum(len(v) for v in latencias.values())
+        total_erros = sum(sum(e.values()) for e in erros.values())
+        todas = [s for etapa in ETAPAS for s in latencias[etapa]]
+        return {
+            'concorrencia': concorrencia,
+            'duracao_s': round(decorrido, 2),
+            'requisicoes': total_requisicoes,
+            'requisicoes_por_s': round(total_requisicoes / decorrido, 2),
+            'funis_por_s': round(funis_completos[0] / decorrido, 2),
+            'taxa_erros': round(total_erros / total_requisicoes, 4) if total_requisicoes else 0.0,
+            'geral': self._resumo(todas, total_erros),
+            'etapas': {
+                etapa: self._resumo(latencias[etapa], sum(erros[etapa].values()), dict(erros[etapa]))
+                for etapa in ETAPAS
+            },
+        }
+
+    @staticmethod
+    def _resumo(valores, n_erros, detalhes_erros=None):
+        resumo = {
+            'n': len(valores),
+            'p50_ms': round(percentil(valores, 50) * 1000, 1),
+            'p95_ms': round(percentil(valores, 95) * 1000, 1),
+            'p99_ms': round(percentil(valores, 99) * 1000, 1),
+            'erros': n_erros,
+        }
+        if detalhes_erros:
+            resumo['detalhes_erros'] = detalhes_erros
+        return resumo
+
+    # --- Servidor local por banco de dados ---
+
+    @staticmethod
+    def _rotulo(banco):
+        if banco == 'sqlite':
+            return 'sqlite'
+        return banco.split(':', 1)[0]
+
+    @contextmanager
+    def _servidor_local(self, banco, options):
+        with tempfile.TemporaryDirectory() as temporario:
+            if banco == 'sqlite':
+                database_url = f"sqlite:///{Path(temporario) / 'carga.sqlite3'}"
+            else:
+                database_url = banco
+            # Sem a proteção contra abuso: a carga sintética é um robô enviando em rajada
+            ambiente = dict(os.environ, DATABASE_URL=database_url, PROTECAO_ATIVA='False')
+
+            self.stdout.write(f"[{self._rotulo(banco)}] aplicando migrações...")
+            subprocess.run(
+                [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'migrate', '--noinput'],
+                env=ambiente, check=True, stdout=subprocess.DEVNULL,
+            )
+
+            with socket.socket() as sock:
+                sock.bind(('127.0.0.1', 0))
+                porta = sock.getsockname()[1]
+            processo = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'sabina_decor.wsgi', '--bind', f'127.0.0.1:{porta}',
+                 '--workers', str(options['workers']), '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=ambiente,
+            )
+            try:
+                url = f'http://127.0.0.1:{porta}'
+                self._aguardar_servidor(url)
+                yield url
+            finally:
+                processo.terminate()
+                processo.wait(timeout=30)
+
+    @staticmethod
+    def _aguardar_servidor(url, tentativas=50):
+        for _ in range(tentativas):
+            try:
+                urllib.request.urlopen(url + reverse('inicio'), timeout=2).close()
+                return
+            except Exception:
+                time.sleep(0.2)
+        raise CommandError(f"Servidor local não respondeu em {url}")
+
+    # --- Relatório ---
+
+    def _imprimir(self, alvo, niveis):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {alvo} =="))
+        self.stdout.write(f"{'conc.':>6} {'req/s':>8} {'funis/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'erros':>7}")
+        for resultado in niveis.values():
+            geral = resultado['geral']
+            self.stdout.write(
+                f"{resultado['concorrencia']:>6} {resultado['requisicoes_por_s']:>8} {resultado['funis_por_s']:>8} "
+                f"{geral['p50_ms']:>7}ms {geral['p95_ms']:>7}ms {geral['p99_ms']:>7}ms "
+                f"{resultado['taxa_erros']:>7.2%}"
+            )
+            for etapa, resumo in resultado['etapas'].items():
+                self.stdout.write(
+                    f"{'':>6} {etapa:<17} p50 {resumo['p50_ms']}ms  p95 {resumo['p95_ms']}ms  "
+                    f"p99 {resumo['p99_ms']}ms  erros {resumo['erros']}"
+                )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from app import diagnostico
+
+
+class Command(BaseCommand):
+    help = "Executa as sondas de diagnóstico de e-mail e atualiza os resultados em cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('sondas', nargs='*', help="Sondas a executar (padrão: todas)")
+
+    def handle(self, *args, **options):
+        for resultado in diagnostico.executar_sondas(options['sondas'] or None):
+            estilo = self.style.SUCCESS if resultado['sucesso'] else self.style.ERROR
+            self.stdout.write(estilo(f"{resultado['nome']}: {resultado['mensagem']} ({resultado['duracao_ms']} ms)"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app import lembretes
+
+
+class Command(BaseCommand):
+    help = "Envia os lembretes de visitas aceitas que estão dentro da janela (use --loop para rodar continuamente)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Repete a cada --intervalo segundos")
+        parser.add_argument('--intervalo', type=int, default=None,
+                            help="Segundos entre rodadas no modo --loop (padrão: LEMBRETES['INTERVALO_SEGUNDOS'])")
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo'] or lembretes.obter_configuracao()['INTERVALO_SEGUNDOS']
+        while True:
+            resultado = lembretes.despachar_lembretes()
+            self.stdout.write(
+                f"{resultado['enviados']} lembrete(s) enviado(s), {resultado['adiados']} adiado(s), "
+                f"{resultado['falhas']} falha(s)"
+            )
+            if not options['loop']:
+                break
+            time.sleep(intervalo)
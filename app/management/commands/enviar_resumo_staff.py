@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app import notificacoes
+
+
+class Command(BaseCommand):
+    help = ("Envia o resumo de pedidos novos ao staff quando o intervalo ou o limite de itens foi atingido "
+            "(use --loop para rodar continuamente)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Repete a cada --intervalo segundos")
+        parser.add_argument('--intervalo', type=int, default=60, help="Segundos entre verificações no modo --loop")
+        parser.add_argument('--forcar', action='store_true', help="Envia os pendentes mesmo antes do intervalo")
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = notificacoes.despachar_resumo(forcar=options['forcar'])
+            self.stdout.write(
+                f"{resultado['itens']} item(ns) no resumo, {resultado['canais']} canal(is), "
+                f"{resultado['falhas']} falha(s)"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,74 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+RE_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def medir_importacoes(modulos, settings_modulo):
+    """Roda `python -X importtime` num processo novo: django.setup() e depois cada módulo.
+
+    Retorna (total_ms, {modulo: ms}, [(nome, proprio_ms, cumulativo_ms, nivel)]).
+    """
+    codigo = "import django; django.setup()\n" + "".join(f"import {modulo}\n" for modulo in modulos)
+    ambiente = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_modulo)
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, env=ambiente,
+    )
+    if processo.returncode != 0:
+        raise CommandError(f"Falha ao importar: {processo.stderr.strip().splitlines()[-1]}")
+
+    importacoes = []
+    for linha in processo.stderr.splitlines():
+        casamento = RE_IMPORTTIME.match(linha)
+        if casamento:
+            proprio, cumulativo, recuo, nome = casamento.groups()
+            importacoes.append((nome, int(proprio) / 1000, int(cumulativo) / 1000, len(recuo) // 2))
+    # Só os imports de nível 0 somam o tempo total sem contar duas vezes
+    total = sum(cumulativo for _, _, cumulativo, nivel in importacoes if nivel == 0)
+    por_modulo = {nome: cumulativo for nome, _, cumulativo, _ in importacoes if nome in modulos}
+    return total, por_modulo, importacoes
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de import no boot (django.setup() + módulos informados) num processo novo "
+        "e lista os pacotes e imports mais caros, para decidir o que importar sob demanda."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('modulos', nargs='*', default=['app.views', 'app.urls', 'sabina_decor.wsgi'])
+        parser.add_argument('--top', type=int, default=15, help="Quantos imports listar")
+        parser.add_argument(
+            '--limite-ms', type=float,
+            help="Falha (código de saída 1) se o boot passar deste tempo, para uso em CI",
+        )
+
+    def handle(self, *args, **options):
+        settings_modulo = os.environ.get('DJANGO_SETTINGS_MODULE', 'sabina_decor.settings')
+        total, por_modulo, importacoes = medir_importacoes(options['modulos'], settings_modulo)
+
+        self.stdout.write(f"Boot (imports): {total:.1f} ms")
+        for modulo in options['modulos']:
+            ms = por_modulo.get(modulo)
+            descricao = f"{ms:.1f} ms" if ms is not None else "já importado pelo django.setup()"
+            self.stdout.write(f"  {modulo}: {descricao}")
+
+        por_pacote = defaultdict(float)
+        for nome, proprio, _, _ in importacoes:
+            por_pacote[nome.split('.')[0]] += proprio
+        self.stdout.write("\nPacotes (tempo próprio somado):")
+        for pacote, ms in sorted(por_pacote.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {ms:8.1f} ms  {pacote}")
+
+        self.stdout.write("\nImports mais caros (cumulativo):")
+        for nome, _, cumulativo, nivel in sorted(importacoes, key=lambda item: -item[2])[:options['top']]:
+            self.stdout.write(f"  {cumulativo:8.1f} ms  {'  ' * min(nivel, 10)}{nome}")
+
+        if options['limite_ms'] is not None and total > options['limite_ms']:
+            raise CommandError(f"Boot de {total:.1f} ms acima do limite de {options['limite_ms']:.1f} ms")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app import busca
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os documentos da busca de texto a partir de agendamentos e orçamentos"
+
+    def handle(self, *args, **options):
+        total = busca.reindexar()
+        self.stdout.write(self.style.SUCCESS(f"{total} documento(s) indexado(s)"))
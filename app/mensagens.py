@@ -0,0 +1,26 @@
+# app/mensagens.py
+"""Armazenamento das mensagens flash (django.contrib.messages) sem escrita de sessão à toa.
+
+As mensagens vão no cookie, como no FallbackStorage padrão. A diferença está no
+transbordo (cookie acima de ~2 KB): o padrão abre uma sessão para guardar o resto, o
+que num visitante anônimo significa uma linha nova em django_session e, dali em
+diante, leitura de sessão a cada página. Aqui a sessão só é usada quando já existe
+(staff logado); sem ela as mensagens mais antigas são descartadas e tudo fica no cookie.
+"""
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+
+class ArmazenamentoMensagens(FallbackStorage):
+    def _sessao_ativa(self):
+        sessao = getattr(self.request, 'session', None)
+        # is_empty() não carrega a sessão do banco/cache
+        return sessao is not None and not sessao.is_empty()
+
+    def _store(self, messages, response, *args, **kwargs):
+        if self._sessao_ativa():
+            return super()._store(messages, response, *args, **kwargs)
+        cookie = self.storages[0]
+        if not messages and cookie not in self._used_storages:
+            return []  # nada a gravar nem a apagar
+        self._used_storages.discard(cookie)
+        return cookie._store(messages, response, remove_oldest=True)
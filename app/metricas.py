@@ -0,0 +1,225 @@
+# app/metricas.py
+"""Coleta de métricas por requisição (SQL, templates, cache) e agregação por view."""
+import contextvars
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+# Limites (em segundos) dos buckets do histograma de duração
+BUCKETS_DURACAO = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_coleta_atual = contextvars.ContextVar('coleta_metricas', default=None)
+_AUSENTE = object()
+
+
+class ColetaRequisicao:
+    """Acumula o que acontece durante uma requisição"""
+
+    def __init__(self, max_sql):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.tempo_templates = 0.0
+        self.cache_acertos = 0
+        self.cache_falhas = 0
+        self.sql = []
+        self.max_sql = max_sql
+
+    def registrar_sql(self, sql, duracao):
+        self.consultas += 1
+        self.tempo_sql += duracao
+        if len(self.sql) < self.max_sql:
+            self.sql.append((sql, duracao))
+
+    def sql_repetidas(self, minimo=2):
+        """Consultas idênticas (mesmo SQL parametrizado) executadas várias vezes: indício de N+1"""
+        contagem = Counter(sql for sql, _ in self.sql)
+        return [(sql, n) for sql, n in contagem.most_common() if n >= minimo]
+
+
+def coleta_atual():
+    return _coleta_atual.get()
+
+
+def iniciar_coleta():
+    coleta = ColetaRequisicao(max_sql=obter_configuracao()['MAX_SQL_AMOSTRA'])
+    return coleta, _coleta_atual.set(coleta)
+
+
+def encerrar_coleta(token):
+    _coleta_atual.reset(token)
+
+
+def obter_configuracao():
+    configuracao = {'LIMIAR_LENTO_MS': 500, 'MAX_SQL_AMOSTRA': 50}
+    configuracao.update(getattr(settings, 'DESEMPENHO', {}))
+    return configuracao
+
+
+# --- Instrumentação ---
+
+def medir_sql(execute, sql, params, many, context):
+    """Wrapper para connection.execute_wrapper()"""
+    coleta = _coleta_atual.get()
+    if coleta is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        coleta.registrar_sql(sql, time.perf_counter() - inicio)
+
+
+def _instrumentar_templates():
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_instrumentado', False):
+        return
+    render_original = Template.render
+
+    def render(self, context=None, request=None):
+        coleta = _coleta_atual.get()
+        if coleta is None:
+            return render_original(self, context, request)
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, context, request)
+        finally:
+            coleta.tempo_templates += time.perf_counter() - inicio
+
+    render._instrumentado = True
+    Template.render = render
+
+
+def _instrumentar_cache():
+    from django.utils.module_loading import import_string
+
+    for configuracao in settings.CACHES.values():
+        backend = import_string(configuracao['BACKEND'])
+        if getattr(backend.get, '_instrumentado', False):
+            continue
+        get_original = backend.get
+
+        def get(self, key, default=None, version=None, _original=get_original):
+            valor = _original(self, key, _AUSENTE, version=version)
+            coleta = _coleta_atual.get()
+            if coleta is not None:
+                if valor is _AUSENTE:
+                    coleta.cache_falhas += 1
+                else:
+                    coleta.cache_acertos += 1
+            return default if valor is _AUSENTE else valor
+
+        get._instrumentado = True
+        backend.get = get
+
+
+_instalado = False
+_lock_instalacao = threading.Lock()
+
+
+def instalar():
+    """Instala os wrappers de template e cache (idempotente)"""
+    global _instalado
+    with _lock_instalacao:
+        if not _instalado:
+            _instrumentar_templates()
+            _instrumentar_cache()
+            _instalado = True
+
+
+# --- Agregação por view e exportação no formato Prometheus ---
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._bloqueios = Counter()
+
+    def registrar(self, view, status, duracao, coleta):
+        with self._lock:
+            dados = self._views.setdefault(view, {
+                'requisicoes': Counter(),
+                'buckets': [0] * len(BUCKETS_DURACAO),
+                'duracao_total': 0.0,
+                'consultas': 0,
+                'tempo_sql': 0.0,
+                'tempo_templates': 0.0,
+                'cache_acertos': 0,
+                'cache_falhas': 0,
+                'lentas': 0,
+            })
+            dados['requisicoes'][str(status)] += 1
+            dados['duracao_total'] += duracao
+            for i, limite in enumerate(BUCKETS_DURACAO):
+                if duracao <= limite:
+                    dados['buckets'][i] += 1
+            dados['consultas'] += coleta.consultas
+            dados['tempo_sql'] += coleta.tempo_sql
+            dados['tempo_templates'] += coleta.tempo_templates
+            dados['cache_acertos'] += coleta.cache_acertos
+            dados['cache_falhas'] += coleta.cache_falhas
+
+    def registrar_lenta(self, view):
+        with self._lock:
+            if view in self._views:
+                self._views[view]['lentas'] += 1
+
+    def registrar_bloqueio(self, view, motivo):
+        with self._lock:
+            self._bloqueios[(view, motivo)] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._views.clear()
+            self._bloqueios.clear()
+
+    def exportar_prometheus(self):
+        with self._lock:
+            views = {view: dict(dados, requisicoes=Counter(dados['requisicoes']), buckets=list(dados['buckets']))
+                     for view, dados in self._views.items()}
+            bloqueios = Counter(self._bloqueios)
+
+        linhas = []
+
+        def metrica(nome, tipo, ajuda):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+        metrica('app_requisicoes_total', 'counter', 'Requisições atendidas por view e status HTTP.')
+        for view, dados in sorted(views.items()):
+            for status, total in sorted(dados['requisicoes'].items()):
+                linhas.append(f'app_requisicoes_total{{view="{view}",status="{status}"}} {total}')
+
+        metrica('app_requisicao_duracao_segundos', 'histogram', 'Tempo total de resposta por view.')
+        for view, dados in sorted(views.items()):
+            total = sum(dados['requisicoes'].values())
+            for limite, acumulado in zip(BUCKETS_DURACAO, dados['buckets']):
+                linhas.append(f'app_requisicao_duracao_segundos_bucket{{view="{view}",le="{limite}"}} {acumulado}')
+            linhas.append(f'app_requisicao_duracao_segundos_bucket{{view="{view}",le="+Inf"}} {total}')
+            linhas.append(f'app_requisicao_duracao_segundos_sum{{view="{view}"}} {dados["duracao_total"]:.6f}')
+            linhas.append(f'app_requisicao_duracao_segundos_count{{view="{view}"}} {total}')
+
+        contadores = [
+            ('app_consultas_sql_total', 'consultas', 'Consultas SQL executadas.', False),
+            ('app_sql_duracao_segundos_total', 'tempo_sql', 'Tempo gasto em SQL.', True),
+            ('app_template_duracao_segundos_total', 'tempo_templates', 'Tempo gasto renderizando templates.', True),
+            ('app_cache_acertos_total', 'cache_acertos', 'Leituras de cache com acerto.', False),
+            ('app_cache_falhas_total', 'cache_falhas', 'Leituras de cache sem acerto.', False),
+            ('app_requisicoes_lentas_total', 'lentas', 'Requisições acima do limiar de lentidão.', False),
+        ]
+        for nome, chave, ajuda, decimal in contadores:
+            metrica(nome, 'counter', ajuda)
+            for view, dados in sorted(views.items()):
+                valor = f"{dados[chave]:.6f}" if decimal else dados[chave]
+                linhas.append(f'{nome}{{view="{view}"}} {valor}')
+
+        metrica('app_requisicoes_bloqueadas_total', 'counter', 'Envios de formulário barrados pela proteção contra abuso.')
+        for (view, motivo), total in sorted(bloqueios.items()):
+            linhas.append(f'app_requisicoes_bloqueadas_total{{view="{view}",motivo="{motivo}"}} {total}')
+
+        return "\n".join(linhas) + "\n"
+
+
+registro = RegistroMetricas()
@@ -0,0 +1,125 @@
+# app/middleware.py
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import compressao, logs, metricas, roteamento
+
+logger = logging.getLogger('app.desempenho')
+
+RE_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class CorrelacaoMiddleware:
+    """Gera (ou reaproveita o X-Request-ID recebido) um ID por requisição e o devolve no cabeçalho"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not RE_REQUEST_ID.match(request_id):
+            request_id = logs.novo_id()
+        request.request_id = request_id
+        with logs.correlacionar(request_id=request_id):
+            response = self.get_response(request)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class CompressaoMiddleware:
+    """gzip/brotli nas respostas de texto e 304 nas páginas públicas (ver app/compressao.py)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compressao.processar(request, self.get_response(request))
+
+
+class DesempenhoMiddleware:
+    """Mede tempo total, SQL, templates e cache de cada requisição, agregando por view.
+
+    Requisições acima de DESEMPENHO['LIMIAR_LENTO_MS'] têm o SQL registrado no log,
+    com as consultas repetidas em destaque para facilitar achar N+1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metricas.instalar()
+
+    def __call__(self, request):
+        coleta, token = metricas.iniciar_coleta()
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(metricas.medir_sql))
+                response = self.get_response(request)
+        finally:
+            metricas.encerrar_coleta(token)
+        duracao = time.perf_counter() - inicio
+
+        view = self._nome_view(request)
+        metricas.registro.registrar(view, response.status_code, duracao, coleta)
+        self._registrar_log(request, response, view, duracao, coleta)
+        return response
+
+    @staticmethod
+    def _nome_view(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return '<nao_resolvida>'
+        return resolver_match.view_name or resolver_match._func_path
+
+    def _registrar_log(self, request, response, view, duracao, coleta):
+        duracao_ms = duracao * 1000
+        lenta = duracao_ms >= metricas.obter_configuracao()['LIMIAR_LENTO_MS']
+        if not lenta and not logger.isEnabledFor(logging.INFO):
+            return
+
+        registro = {
+            'view': view,
+            'metodo': request.method,
+            'caminho': request.path,
+            'status': response.status_code,
+            'duracao_ms': round(duracao_ms, 2),
+            'consultas': coleta.consultas,
+            'sql_ms': round(coleta.tempo_sql * 1000, 2),
+            'templates_ms': round(coleta.tempo_templates * 1000, 2),
+            'cache_acertos': coleta.cache_acertos,
+            'cache_falhas': coleta.cache_falhas,
+        }
+        if lenta:
+            metricas.registro.registrar_lenta(view)
+            registro['sql'] = [{'sql': sql, 'ms': round(d * 1000, 2)} for sql, d in coleta.sql]
+            registro['sql_repetidas'] = [{'sql': sql, 'vezes': n} for sql, n in coleta.sql_repetidas()]
+            logger.warning("Requisição lenta: %s %.0f ms", view, duracao_ms, extra={'desempenho': registro})
+        else:
+            logger.info("Requisição: %s %.0f ms", view, duracao_ms, extra={'desempenho': registro})
+
+
+class ReplicaLeituraMiddleware:
+    """Manda as leituras das views @somente_leitura para a réplica (ver app/roteamento.py)
+    e fixa no primário, por cookie, quem acabou de escrever"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with roteamento.requisicao() as estado:
+            response = self.get_response(request)
+        configuracao = roteamento.obter_configuracao()
+        if estado.escreveu and roteamento.replica_configurada(configuracao):
+            segundos = configuracao['FIXAR_SEGUNDOS']
+            response.set_cookie(
+                configuracao['FIXAR_COOKIE'], str(int(time.time() + segundos)),
+                max_age=segundos, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        roteamento.usar_replica(request, view_func)
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_alter_agendamento_telefone_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroExclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('agendamento', 'Agendamento'), ('orcamento', 'Orçamento')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('excluido_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Registro de Exclusão',
+                'verbose_name_plural': 'Registros de Exclusão',
+            },
+        ),
+        migrations.AddField(
+            model_name='agendamento',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
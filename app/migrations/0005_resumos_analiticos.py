@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_alteracoes_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoAgendamentosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(unique=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('pendentes', models.PositiveIntegerField(default=0)),
+                ('aceitos', models.PositiveIntegerField(default=0)),
+                ('recusados', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Agendamentos',
+                'verbose_name_plural': 'Resumos Diários de Agendamentos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoOrcamentosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('tipo_evento', models.CharField(choices=[('casamento', 'Casamento'), ('aniversario', 'Aniversário'), ('corporativo', 'Evento Corporativo'), ('infantil', 'Festas Infantis'), ('outro', 'Outro')], max_length=20)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('total_estimado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade_com_preco', models.PositiveIntegerField(default=0)),
+                ('total_estimado_com_preco', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_preco_final', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('atualizado_em', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Orçamentos',
+                'verbose_name_plural': 'Resumos Diários de Orçamentos',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'tipo_evento'), name='resumo_orcamentos_dia_tipo')],
+            },
+        ),
+    ]
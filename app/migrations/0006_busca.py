@@ -0,0 +1,145 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:17
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+SQL_SQLITE = [
+    """CREATE VIRTUAL TABLE app_documentobusca_fts USING fts5(
+        texto, modelo UNINDEXED, content='app_documentobusca', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER app_documentobusca_ai AFTER INSERT ON app_documentobusca BEGIN
+        INSERT INTO app_documentobusca_fts(rowid, texto, modelo) VALUES (new.id, new.texto, new.modelo);
+    END""",
+    """CREATE TRIGGER app_documentobusca_ad AFTER DELETE ON app_documentobusca BEGIN
+        INSERT INTO app_documentobusca_fts(app_documentobusca_fts, rowid, texto, modelo)
+        VALUES ('delete', old.id, old.texto, old.modelo);
+    END""",
+    """CREATE TRIGGER app_documentobusca_au AFTER UPDATE ON app_documentobusca BEGIN
+        INSERT INTO app_documentobusca_fts(app_documentobusca_fts, rowid, texto, modelo)
+        VALUES ('delete', old.id, old.texto, old.modelo);
+        INSERT INTO app_documentobusca_fts(rowid, texto, modelo) VALUES (new.id, new.texto, new.modelo);
+    END""",
+]
+SQL_SQLITE_REVERSO = [
+    "DROP TRIGGER IF EXISTS app_documentobusca_au",
+    "DROP TRIGGER IF EXISTS app_documentobusca_ad",
+    "DROP TRIGGER IF EXISTS app_documentobusca_ai",
+    "DROP TABLE IF EXISTS app_documentobusca_fts",
+]
+# Mesma expressão que SearchVector('texto', config='simple') gera, para o índice ser usado
+SQL_POSTGRES = [
+    "CREATE INDEX app_documentobusca_texto_gin ON app_documentobusca "
+    "USING gin (to_tsvector('simple'::regconfig, COALESCE(texto, '')))",
+]
+SQL_POSTGRES_REVERSO = ["DROP INDEX IF EXISTS app_documentobusca_texto_gin"]
+
+
+def _fts5_disponivel(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        cursor.execute("PRAGMA module_list")
+        return any(linha[0] == 'fts5' for linha in cursor.fetchall())
+
+
+def criar_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        comandos = SQL_POSTGRES
+    elif vendor == 'sqlite' and _fts5_disponivel(schema_editor):
+        comandos = SQL_SQLITE
+    else:
+        return  # a busca usa icontains no texto normalizado
+    for comando in comandos:
+        schema_editor.execute(comando)
+
+
+def remover_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {'postgresql': SQL_POSTGRES_REVERSO, 'sqlite': SQL_SQLITE_REVERSO}.get(vendor, [])
+    for comando in comandos:
+        schema_editor.execute(comando)
+
+
+# Cópia congelada da normalização de app/busca.py: a migration não importa o código da app,
+# que pode mudar depois dela. Se a normalização mudar, `manage.py reindexar_busca` refaz os documentos.
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texto))
+
+
+def _tokens_telefone(telefone):
+    digitos = re.sub(r'\D', '', telefone or '')
+    if not digitos:
+        return []
+    variantes = [digitos]
+    if digitos.startswith('55') and len(digitos) > 11:
+        variantes.append(digitos[2:])
+    if len(variantes[-1]) > 9:
+        variantes.append(variantes[-1][2:])
+    return variantes
+
+
+def _documento_agendamento(agendamento):
+    titulo = f"{agendamento.nome} — visita {agendamento.data:%d/%m/%Y} {agendamento.hora:%H:%M}"
+    texto = ' '.join([agendamento.nome, agendamento.email, agendamento.mensagem, *_tokens_telefone(agendamento.telefone)])
+    return 'agendamento', titulo, _normalizar(texto)
+
+
+def _documento_orcamento(orcamento, tipos_evento):
+    tipo = tipos_evento.get(orcamento.tipo_evento, '')
+    titulo = f"{orcamento.nome} — {tipo or orcamento.tipo_evento}"
+    texto = ' '.join([orcamento.nome, orcamento.email, orcamento.ideias, tipo, *_tokens_telefone(orcamento.telefone)])
+    return 'orcamento', titulo, _normalizar(texto)
+
+
+def indexar_existentes(apps, schema_editor, tamanho_lote=500):
+    DocumentoBusca = apps.get_model('app', 'DocumentoBusca')
+    Orcamento = apps.get_model('app', 'Orcamento')
+    tipos_evento = dict(Orcamento._meta.get_field('tipo_evento').choices or [])
+    fontes = (
+        (apps.get_model('app', 'Agendamento'), _documento_agendamento),
+        (Orcamento, lambda orcamento: _documento_orcamento(orcamento, tipos_evento)),
+    )
+    for modelo_origem, documento in fontes:
+        lote = []
+        for instancia in modelo_origem.objects.iterator(chunk_size=tamanho_lote):
+            modelo, titulo, texto = documento(instancia)
+            lote.append(DocumentoBusca(modelo=modelo, objeto_id=instancia.pk, titulo=titulo[:255], texto=texto))
+            if len(lote) >= tamanho_lote:
+                DocumentoBusca.objects.bulk_create(lote)
+                lote = []
+        DocumentoBusca.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_resumos_analiticos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('agendamento', 'Agendamento'), ('orcamento', 'Orçamento')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('titulo', models.CharField(max_length=255)),
+                ('texto', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Documento de Busca',
+                'verbose_name_plural': 'Documentos de Busca',
+                'constraints': [models.UniqueConstraint(fields=('modelo', 'objeto_id'), name='documento_busca_objeto')],
+            },
+        ),
+        migrations.RunPython(criar_indice_texto, remover_indice_texto),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
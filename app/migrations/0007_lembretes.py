@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_busca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LembreteEnviado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('antecedencia', models.CharField(max_length=10)),
+                ('canal', models.CharField(max_length=10)),
+                ('enviado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Lembrete Enviado',
+                'verbose_name_plural': 'Lembretes Enviados',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['status', 'data', 'hora'], name='agendamento_status_data_hora'),
+        ),
+        migrations.AddField(
+            model_name='lembreteenviado',
+            name='agendamento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lembretes', to='app.agendamento'),
+        ),
+        migrations.AddConstraint(
+            model_name='lembreteenviado',
+            constraint=models.UniqueConstraint(fields=('agendamento', 'antecedencia', 'canal'), name='lembrete_unico'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_lembretes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrcamentoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100)),
+                ('telefone', models.CharField(max_length=20)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('tipo_evento', models.CharField(choices=[('casamento', 'Casamento'), ('aniversario', 'Aniversário'), ('corporativo', 'Evento Corporativo'), ('infantil', 'Festas Infantis'), ('outro', 'Outro')], max_length=20)),
+                ('num_convidados', models.PositiveIntegerField()),
+                ('local_evento', models.CharField(max_length=10)),
+                ('pacote_selecionado', models.CharField(max_length=20)),
+                ('servicos_adicionais', models.TextField(default='[]')),
+                ('ideias', models.TextField(blank=True)),
+                ('data_criacao', models.DateTimeField(db_index=True)),
+                ('preco_final', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('atualizado_em', models.DateTimeField()),
+                ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Orçamento Arquivado',
+                'verbose_name_plural': 'Orçamentos Arquivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='AgendamentoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=255)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('telefone', models.CharField(max_length=20)),
+                ('data', models.DateField(db_index=True)),
+                ('hora', models.TimeField()),
+                ('mensagem', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('aceito', 'Aceito'), ('recusado', 'Recusado')], max_length=10)),
+                ('orcamento_associado_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('atualizado_em', models.DateTimeField()),
+                ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('aceito_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recusado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Agendamento Arquivado',
+                'verbose_name_plural': 'Agendamentos Arquivados',
+                'db_table': 'agendamento_arquivado',
+            },
+        ),
+    ]
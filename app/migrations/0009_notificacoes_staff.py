@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 05:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_arquivamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacaoStaff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('orcamento', 'Novo orçamento'), ('agendamento', 'Novo agendamento'), ('preco_final', 'Preço final enviado')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('texto', models.CharField(max_length=255)),
+                ('criada_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('enviada_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Notificação do Staff',
+                'verbose_name_plural': 'Notificações do Staff',
+                'indexes': [models.Index(condition=models.Q(('enviada_em__isnull', True)), fields=['criada_em'], name='notificacao_staff_pendente')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_notificacoes_staff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroexclusao',
+            name='dia',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
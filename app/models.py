@@ -116,11 +116,17 @@ class Agendamento(models.Model):
         related_name="agendamentos_recusados"
     )   
 
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Atualizado em")
+
     class Meta:
         db_table = 'agendamento'
         verbose_name = "Agendamento de Visita"
         verbose_name_plural = "Agendamentos de Visitas"
         ordering = ['-data', '-hora']
+        indexes = [
+            # Busca de aceitos por período (lembretes, calendário)
+            models.Index(fields=['status', 'data', 'hora'], name='agendamento_status_data_hora'),
+        ]
 
     def clean(self):
         super().clean()
@@ -128,58 +134,59 @@ class Agendamento(models.Model):
         if not self.data or not self.hora:
             return
 
-        # 1. Validação de Dias da Semana (Bloqueia Domingo)
-        # Python weekday(): 0=Segunda ... 6=Domingo
-        if self.data.weekday() == 6:
-            raise ValidationError("Não realizamos agendamentos aos domingos. Por favor, escolha uma data de segunda a sábado.")
-
-        # 2. Validação de Horário Comercial (09:00 às 18:00)
-        hora_inicio = 9
-        hora_fim = 18
-        
-        # Bloqueia antes das 9h, depois das 18h, ou exatamente após 18:00 (ex: 18:01)
-        if self.hora.hour < hora_inicio or (self.hora.hour >= hora_fim and self.hora.minute > 0) or self.hora.hour > hora_fim:
-             raise ValidationError("O horário de agendamento deve ser entre 09:00 e 18:00.")
+        self.validar_dia_e_horario()
 
         try:
-            # Cria datetime aware
-            dt_input = datetime.combine(self.data, self.hora)
-            if timezone.is_naive(dt_input):
-                data_hora_agendamento = timezone.make_aware(dt_input)
-            else:
-                data_hora_agendamento = dt_input
-            
-            agora = timezone.now()
-
-            # Validação de data passada
-            if self.status in ['pendente', 'aceito'] and data_hora_agendamento < agora:
-                raise ValidationError("Não é possível agendar para datas ou horas passadas.")
+            self.validar_data_passada()
 
             # Validação de conflito de horário (Janela de 30 min antes e depois)
             if self.status == 'aceito':
-                # Define a janela de tempo ocupada por este agendamento
                 # Busca conflitos no banco
-                # Lógica: Se existe algum agendamento que comece ANTES deste terminar E termine DEPOIS deste começar
-                
                 conflitos = Agendamento.objects.filter(
                     data=self.data,
                     status='aceito'
                 ).exclude(pk=self.pk)
-
-                for conflito in conflitos:
-                    dt_conflito = datetime.combine(conflito.data, conflito.hora)
-                    if timezone.is_naive(dt_conflito):
-                        dt_conflito = timezone.make_aware(dt_conflito)
-                    
-                    # Diferença absoluta de tempo
-                    diff = abs((data_hora_agendamento - dt_conflito).total_seconds())
-                    
-                    if diff < 1800: # 1800 segundos = 30 minutos
-                        raise ValidationError(f"Conflito de horário: Já existe um agendamento às {conflito.hora}.")
+                self.validar_conflito(conflitos)
 
         except (ValueError, TypeError):
             raise ValidationError("O formato da data ou da hora fornecida é inválido.")
 
+    def validar_dia_e_horario(self):
+        # 1. Validação de Dias da Semana (Bloqueia Domingo)
+        # Python weekday(): 0=Segunda ... 6=Domingo
+        if self.data.weekday() == 6:
+            raise ValidationError("Não realizamos agendamentos aos domingos. Por favor, escolha uma data de segunda a sábado.")
+
+        # 2. Validação de Horário Comercial (09:00 às 18:00)
+        hora_inicio = 9
+        hora_fim = 18
+        
+        # Bloqueia antes das 9h, depois das 18h, ou exatamente após 18:00 (ex: 18:01)
+        if self.hora.hour < hora_inicio or (self.hora.hour >= hora_fim and self.hora.minute > 0) or self.hora.hour > hora_fim:
+             raise ValidationError("O horário de agendamento deve ser entre 09:00 e 18:00.")
+
+    def data_hora(self):
+        # Cria datetime aware
+        dt_input = datetime.combine(self.data, self.hora)
+        if timezone.is_naive(dt_input):
+            return timezone.make_aware(dt_input)
+        return dt_input
+
+    def validar_data_passada(self):
+        if self.status in ['pendente', 'aceito'] and self.data_hora() < timezone.now():
+            raise ValidationError("Não é possível agendar para datas ou horas passadas.")
+
+    def validar_conflito(self, aceitos):
+        """Valida contra agendamentos aceitos já carregados (sem consultar o banco)"""
+        data_hora_agendamento = self.data_hora()
+        for conflito in aceitos:
+            if conflito.pk == self.pk or conflito.data != self.data:
+                continue
+            # Diferença absoluta de tempo
+            diff = abs((data_hora_agendamento - conflito.data_hora()).total_seconds())
+            if diff < 1800: # 1800 segundos = 30 minutos
+                raise ValidationError(f"Conflito de horário: Já existe um agendamento às {conflito.hora}.")
+
     def save(self, *args, **kwargs):
         self.full_clean() # Força a validação antes de salvar
         super().save(*args, **kwargs)
@@ -237,6 +244,7 @@ class Orcamento(models.Model):
     ideias = models.TextField(blank=True)
     data_criacao = models.DateTimeField(default=timezone.now)
     preco_final = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Preço Final")
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Atualizado em")
 
     def get_status_display(self):
         if self.preco_final:
@@ -288,4 +296,172 @@ class Orcamento(models.Model):
         return CONSTANTES_PACOTES.get(self.pacote_selecionado, {}).get('nome', self.pacote_selecionado)
 
     def __str__(self):
-        return f"Orçamento #{self.id} - {self.nome}"
\ No newline at end of file
+        return f"Orçamento #{self.id} - {self.nome}"
+
+class RegistroExclusao(models.Model):
+    """Marca (tombstone) de um agendamento/orçamento excluído, usada pelo feed de alterações"""
+    MODELO_CHOICES = [
+        ('agendamento', 'Agendamento'),
+        ('orcamento', 'Orçamento'),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    excluido_em = models.DateTimeField(default=timezone.now, db_index=True)
+    # Dia do resumo diário que a linha excluída compunha (vazio quando ela só foi arquivada)
+    dia = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Registro de Exclusão"
+        verbose_name_plural = "Registros de Exclusão"
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} excluído em {self.excluido_em}"
+
+class ResumoOrcamentosDia(models.Model):
+    """Rollup diário de orçamentos por tipo de evento (dia = data de criação, no fuso local)"""
+    dia = models.DateField()
+    tipo_evento = models.CharField(max_length=20, choices=Orcamento.TIPO_EVENTO_CHOICES)
+    quantidade = models.PositiveIntegerField(default=0)
+    total_estimado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Só orçamentos com preço final: base da comparação estimado x fechado
+    quantidade_com_preco = models.PositiveIntegerField(default=0)
+    total_estimado_com_preco = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_preco_final = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Resumo Diário de Orçamentos"
+        verbose_name_plural = "Resumos Diários de Orçamentos"
+        constraints = [models.UniqueConstraint(fields=['dia', 'tipo_evento'], name='resumo_orcamentos_dia_tipo')]
+
+    def __str__(self):
+        return f"{self.dia} {self.tipo_evento}: {self.quantidade}"
+
+class ResumoAgendamentosDia(models.Model):
+    """Rollup diário de agendamentos por status (dia = data da visita)"""
+    dia = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    pendentes = models.PositiveIntegerField(default=0)
+    aceitos = models.PositiveIntegerField(default=0)
+    recusados = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Resumo Diário de Agendamentos"
+        verbose_name_plural = "Resumos Diários de Agendamentos"
+
+    def __str__(self):
+        return f"{self.dia}: {self.aceitos}/{self.total} aceitos"
+
+class DocumentoBusca(models.Model):
+    """Texto normalizado (sem acentos, minúsculo, telefone só dígitos) de um agendamento/orçamento.
+
+    É a base da busca de texto: no PostgreSQL há um índice GIN sobre to_tsvector('simple', texto)
+    e no SQLite uma tabela FTS5 de conteúdo externo mantida por triggers (migration 0006).
+    """
+    modelo = models.CharField(max_length=20, choices=RegistroExclusao.MODELO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    titulo = models.CharField(max_length=255)
+    texto = models.TextField()
+
+    class Meta:
+        verbose_name = "Documento de Busca"
+        verbose_name_plural = "Documentos de Busca"
+        constraints = [models.UniqueConstraint(fields=['modelo', 'objeto_id'], name='documento_busca_objeto')]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id}: {self.titulo}"
+
+class LembreteEnviado(models.Model):
+    """Marca de idempotência: um lembrete por agendamento, antecedência e canal"""
+    agendamento = models.ForeignKey(Agendamento, on_delete=models.CASCADE, related_name='lembretes')
+    antecedencia = models.CharField(max_length=10)
+    canal = models.CharField(max_length=10)
+    enviado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Lembrete Enviado"
+        verbose_name_plural = "Lembretes Enviados"
+        constraints = [
+            models.UniqueConstraint(fields=['agendamento', 'antecedencia', 'canal'], name='lembrete_unico'),
+        ]
+
+    def __str__(self):
+        return f"Lembrete {self.antecedencia} ({self.canal}) de {self.agendamento_id}"
+
+class NotificacaoStaff(models.Model):
+    """Item do próximo resumo para o staff (app/notificacoes.py); `enviada_em` nulo = pendente"""
+    TIPO_CHOICES = [
+        ('orcamento', 'Novo orçamento'),
+        ('agendamento', 'Novo agendamento'),
+        ('preco_final', 'Preço final enviado'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    texto = models.CharField(max_length=255)
+    criada_em = models.DateTimeField(default=timezone.now)
+    enviada_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Notificação do Staff"
+        verbose_name_plural = "Notificações do Staff"
+        indexes = [
+            # Só os pendentes: o índice fica pequeno mesmo com o histórico crescendo
+            models.Index(fields=['criada_em'], condition=models.Q(enviada_em__isnull=True),
+                         name='notificacao_staff_pendente'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.objeto_id}"
+
+# --- Arquivo (tabelas frias) ---
+# Mesmas colunas dos modelos quentes (mesmo id) mais `arquivado_em`; ver app/arquivamento.py.
+# Sem FK para Orcamento: o orçamento associado pode estar em qualquer uma das tabelas.
+
+class AgendamentoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    nome = models.CharField(max_length=255)
+    email = models.EmailField(db_index=True)
+    telefone = models.CharField(max_length=20)
+    data = models.DateField(db_index=True)
+    hora = models.TimeField()
+    mensagem = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=Agendamento.STATUS_CHOICES)
+    orcamento_associado_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    aceito_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recusado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    atualizado_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'agendamento_arquivado'
+        verbose_name = "Agendamento Arquivado"
+        verbose_name_plural = "Agendamentos Arquivados"
+
+    def __str__(self):
+        return f"{self.nome} - {self.data} {self.hora} (arquivado)"
+
+class OrcamentoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    nome = models.CharField(max_length=100)
+    telefone = models.CharField(max_length=20)
+    email = models.EmailField(db_index=True)
+    tipo_evento = models.CharField(max_length=20, choices=Orcamento.TIPO_EVENTO_CHOICES)
+    num_convidados = models.PositiveIntegerField()
+    local_evento = models.CharField(max_length=10)
+    pacote_selecionado = models.CharField(max_length=20)
+    servicos_adicionais = models.TextField(default='[]')
+    ideias = models.TextField(blank=True)
+    data_criacao = models.DateTimeField(db_index=True)
+    preco_final = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    atualizado_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Orçamento Arquivado"
+        verbose_name_plural = "Orçamentos Arquivados"
+
+    def __str__(self):
+        return f"Orçamento #{self.id} - {self.nome} (arquivado)"
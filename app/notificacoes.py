@@ -0,0 +1,268 @@
+# app/notificacoes.py
+"""Resumo dos pedidos novos para o staff: um e-mail só, e opcionalmente SMS/WhatsApp.
+
+Cada orçamento ou agendamento novo (e cada preço final enviado) grava uma
+NotificacaoStaff na mesma transação do pedido. O resumo sai quando o item pendente
+mais antigo passa de INTERVALO_SEGUNDOS ou quando os pendentes chegam a LIMITE_ITENS:
+o comando enviar_resumo_staff --loop cuida do intervalo, e o pedido que faz o resumo
+ficar devido já o enfileira depois do commit.
+
+Os itens são reservados (enviada_em preenchido) antes do envio com um UPDATE
+condicional: se dois processos disputarem o mesmo lote, só um envia. Basta um canal
+entregar para o lote contar como enviado; se todos falharem, a reserva é desfeita e o
+lote volta na próxima rodada.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Count, Min
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from . import fila_email, limitador
+from .lembretes import telefone_e164
+from .models import CONSTANTES_PACOTES, NotificacaoStaff
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACAO_PADRAO = {
+    'ATIVO': True,
+    'CANAIS': ['email'],
+    'TRANSPORTES': {
+        'email': 'app.notificacoes.TransporteEmail',
+        'sms': 'app.notificacoes.TransporteSMS',
+        'whatsapp': 'app.notificacoes.TransporteWhatsApp',
+    },
+    'DESTINATARIOS': [],  # vazio: e-mail de todos os staff ativos
+    'TELEFONES': [],  # SMS/WhatsApp
+    'INTERVALO_SEGUNDOS': 15 * 60,  # idade máxima do item pendente mais antigo
+    'LIMITE_ITENS': 10,
+    'MAXIMO_POR_RESUMO': 100,
+    'URL_SITE': '',  # com ela, os itens do e-mail viram links
+}
+
+ROTULOS = {
+    'orcamento': ('novo orçamento', 'novos orçamentos'),
+    'agendamento': ('novo agendamento', 'novos agendamentos'),
+    'preco_final': ('preço final enviado', 'preços finais enviados'),
+}
+
+class SemDestinatarios(Exception):
+    """Nenhum e-mail ou telefone para receber o resumo; os itens voltam para a próxima rodada"""
+
+
+# A tarefa só decide e despacha; o e-mail passa pelo limitador dentro do transporte
+fila = fila_email.FilaEmail(nome='fila-notificacoes', limitar=False)
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'NOTIFICACOES_STAFF', {}))
+    return configuracao
+
+
+# --- Registro dos itens ---
+
+def texto_orcamento(orcamento):
+    pacote = CONSTANTES_PACOTES.get(orcamento.pacote_selecionado, {}).get('nome', orcamento.pacote_selecionado)
+    return (f"{orcamento.nome}: {orcamento.get_tipo_evento_display()} para "
+            f"{orcamento.num_convidados} convidados, pacote {pacote}")
+
+
+def texto_agendamento(agendamento):
+    return f"{agendamento.nome}: visita em {agendamento.data:%d/%m/%Y} às {agendamento.hora:%H:%M}"
+
+
+def registrar(tipo, objeto_id, texto):
+    """Grava o item na transação corrente; depois do commit verifica se o resumo ficou devido"""
+    if not obter_configuracao()['ATIVO']:
+        return None
+    notificacao = NotificacaoStaff.objects.create(tipo=tipo, objeto_id=objeto_id, texto=texto[:255])
+    transaction.on_commit(verificar, robust=True)
+    return notificacao
+
+
+def registrar_pedido(instancia):
+    tipo = instancia._meta.model_name
+    texto = texto_orcamento(instancia) if tipo == 'orcamento' else texto_agendamento(instancia)
+    return registrar(tipo, instancia.pk, texto)
+
+
+# --- Quando enviar ---
+
+def resumo_devido(agora=None):
+    """Há pendentes e o limite de itens ou o intervalo do mais antigo foi atingido (usa o índice parcial)"""
+    configuracao = obter_configuracao()
+    agora = agora or timezone.now()
+    pendentes = NotificacaoStaff.objects.filter(enviada_em__isnull=True).aggregate(
+        total=Count('pk'), primeira=Min('criada_em'),
+    )
+    if not pendentes['total']:
+        return False
+    return (pendentes['total'] >= configuracao['LIMITE_ITENS']
+            or pendentes['primeira'] <= agora - timedelta(seconds=configuracao['INTERVALO_SEGUNDOS']))
+
+
+def verificar():
+    if resumo_devido():
+        fila.enfileirar(despachar_resumo)
+
+
+# --- Transportes ---
+
+def destinatarios():
+    configurados = obter_configuracao()['DESTINATARIOS']
+    if configurados:
+        return list(configurados)
+    return list(
+        get_user_model().objects.filter(is_staff=True, is_active=True).exclude(email='')
+        .order_by('email').values_list('email', flat=True)
+    )
+
+
+def contagem(itens):
+    """Ex.: '2 novos orçamentos e 1 novo agendamento'"""
+    quantidades = Counter(item.tipo for item in itens)
+    partes = [
+        f"{quantidades[tipo]} {singular if quantidades[tipo] == 1 else plural}"
+        for tipo, (singular, plural) in ROTULOS.items() if quantidades[tipo]
+    ]
+    return ', '.join(partes[:-1]) + ' e ' + partes[-1] if len(partes) > 1 else partes[0]
+
+
+def _url(item, url_site):
+    if not url_site:
+        return ''
+    if item.tipo == 'agendamento':
+        caminho = reverse('lista_agendamentos')
+    else:
+        caminho = reverse('detalhes_orcamento', args=[item.objeto_id])
+    return url_site.rstrip('/') + caminho
+
+
+class TransporteEmail:
+    def enviar(self, itens):
+        para = destinatarios()
+        if not para:
+            raise SemDestinatarios("configure NOTIFICACOES_STAFF['DESTINATARIOS'] ou o e-mail de um staff ativo")
+        url_site = obter_configuracao()['URL_SITE']
+        secoes = [
+            {
+                'titulo': plural.capitalize(),
+                'itens': [
+                    {'texto': item.texto, 'quando': timezone.localtime(item.criada_em), 'url': _url(item, url_site)}
+                    for item in itens if item.tipo == tipo
+                ],
+            }
+            for tipo, (_, plural) in ROTULOS.items()
+        ]
+        html_message = render_to_string('app/email_resumo_staff.html', {
+            'resumo': contagem(itens),
+            'secoes': [secao for secao in secoes if secao['itens']],
+        })
+        # Um e-mail para a equipe: conta só no limite do provedor
+        limitador.reservar_envio(None)
+        email = EmailMultiAlternatives(
+            subject=f"Resumo: {contagem(itens)} - Sabina Decorações",
+            body=strip_tags(html_message),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=para,
+        )
+        email.attach_alternative(html_message, 'text/html')
+        email.send(fail_silently=False)
+
+
+class TransporteSMS:
+    """SMS pelo Twilio para NOTIFICACOES_STAFF['TELEFONES'] (mesmas credenciais dos lembretes)"""
+
+    prefixo = ''
+    remetente_setting = 'TWILIO_NUMERO'
+
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.cliente = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self.remetente = getattr(settings, self.remetente_setting)
+
+    def enviar(self, itens):
+        telefones = obter_configuracao()['TELEFONES']
+        if not telefones:
+            raise SemDestinatarios("configure NOTIFICACOES_STAFF['TELEFONES']")
+        corpo = f"Sabina Decorações: {contagem(itens)}. Detalhes no e-mail de resumo."
+        for telefone in telefones:
+            self.cliente.messages.create(
+                to=self.prefixo + telefone_e164(telefone), from_=self.prefixo + self.remetente, body=corpo,
+            )
+
+
+class TransporteWhatsApp(TransporteSMS):
+    """WhatsApp pelo Twilio (remetente TWILIO_WHATSAPP_NUMERO, habilitado no Twilio)"""
+
+    prefixo = 'whatsapp:'
+    remetente_setting = 'TWILIO_WHATSAPP_NUMERO'
+
+
+class TransporteFalso:
+    """Guarda os resumos em memória (testes e ambiente local)"""
+
+    enviados = []
+
+    def enviar(self, itens):
+        TransporteFalso.enviados.append([(item.tipo, item.objeto_id) for item in itens])
+
+
+# --- Despacho ---
+
+def _reservar(agora, maximo):
+    with transaction.atomic():
+        itens = list(NotificacaoStaff.objects.filter(enviada_em__isnull=True).order_by('criada_em', 'pk')[:maximo])
+        reservados = NotificacaoStaff.objects.filter(
+            pk__in=[item.pk for item in itens], enviada_em__isnull=True,
+        ).update(enviada_em=agora)
+        if reservados != len(itens):
+            # Outro processo levou parte do lote; os restantes ficam para a próxima rodada
+            transaction.set_rollback(True)
+            return []
+    return itens
+
+
+def despachar_resumo(agora=None, forcar=False):
+    """Envia o resumo se devido (ou se `forcar`); retorna {'itens': n, 'canais': n, 'falhas': n}"""
+    configuracao = obter_configuracao()
+    agora = agora or timezone.now()
+    resultado = {'itens': 0, 'canais': 0, 'falhas': 0}
+    if not (forcar or resumo_devido(agora)):
+        return resultado
+    itens = _reservar(agora, configuracao['MAXIMO_POR_RESUMO'])
+    if not itens:
+        return resultado
+
+    for canal in configuracao['CANAIS']:
+        try:
+            import_string(configuracao['TRANSPORTES'][canal])().enviar(itens)
+        except limitador.LimiteExcedido:
+            resultado['falhas'] += 1
+            logger.info("Resumo do staff por %s adiado pelo limite de envio", canal)
+        except SemDestinatarios as e:
+            resultado['falhas'] += 1
+            logger.warning("Resumo do staff por %s sem destinatários: %s", canal, e)
+        except Exception:
+            resultado['falhas'] += 1
+            logger.exception("Falha no resumo do staff por %s", canal)
+        else:
+            resultado['canais'] += 1
+
+    if resultado['canais']:
+        resultado['itens'] = len(itens)
+        logger.info("Resumo do staff enviado com %s item(ns) por %s canal(is)", len(itens), resultado['canais'])
+    else:
+        NotificacaoStaff.objects.filter(pk__in=[item.pk for item in itens]).update(enviada_em=None)
+    return resultado
@@ -0,0 +1,92 @@
+# app/offline.py
+"""Manifesto do service worker (/sw.js) do site público.
+
+O service worker (template app/sw.js) usa três caches:
+- estáticos com hash no nome (manifesto do storage de estáticos) e o Bootstrap do CDN,
+  com versão no caminho: cache-first, porque a URL muda quando o conteúdo muda;
+- fotos da galeria: cache-first (cada upload ganha nome novo), até MAX_FOTOS_CACHE;
+- páginas públicas: stale-while-revalidate (a cópia guardada abre na hora e é atualizada
+  em segundo plano). O simulador é network-first: o formulário leva um carimbo assinado
+  com validade (app/protecao.py) que uma cópia antiga não passaria.
+
+Só entram no cache as páginas que o servidor marcou como públicas (ETag fraca de
+app/compressao.py); a resposta de quem está logado apaga a cópia guardada.
+
+O manifesto (URLs e versão) vai embutido no sw.js: quando uma foto entra ou sai, ou um
+estático muda de hash, o arquivo muda, o navegador instala a versão nova e ela apaga o
+que saiu do manifesto. Fica no cache do Django até a galeria mudar (signals).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from .models import FotoGaleria
+
+CONFIGURACAO_PADRAO = {
+    'ATIVO': True,  # desligado, o sw.js apaga as caches e se desregistra
+    'PAGINAS': ['home', 'inicio', 'sobre', 'galeria_fotos'],
+    'PAGINAS_REDE_PRIMEIRO': ['simulador_orcamento'],
+    'CDN': ['https://cdn.jsdelivr.net/npm/'],
+    'IGNORAR_ESTATICOS': ['admin/', 'rest_framework/'],
+    'MAX_FOTOS_CACHE': 80,
+    'MANIFESTO_TTL_SEGUNDOS': 3600,
+}
+
+# Mude ao alterar a lógica do sw.js: as caches de estáticos e fotos são refeitas
+VERSAO_SW = 1
+
+CHAVE_MANIFESTO = 'offline:manifesto'
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'OFFLINE', {}))
+    return configuracao
+
+
+def estaticos(configuracao):
+    """URLs dos estáticos com hash no nome (vazio se o storage não gera manifesto)"""
+    nomes = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    return sorted(
+        settings.STATIC_URL + nome for nome in nomes
+        if not any(nome.startswith(prefixo) for prefixo in configuracao['IGNORAR_ESTATICOS'])
+    )
+
+
+def fotos():
+    nomes = (
+        FotoGaleria.objects.filter(ativo=True).exclude(imagem='')
+        .order_by('-data_upload').values_list('imagem', flat=True)
+    )
+    return [default_storage.url(nome) for nome in nomes]
+
+
+def manifesto():
+    dados = cache.get(CHAVE_MANIFESTO)
+    if dados is None:
+        configuracao = obter_configuracao()
+        dados = {
+            'ativo': configuracao['ATIVO'],
+            'versao_sw': VERSAO_SW,
+            'paginas': [reverse(nome) for nome in configuracao['PAGINAS']],
+            'paginas_rede_primeiro': [reverse(nome) for nome in configuracao['PAGINAS_REDE_PRIMEIRO']],
+            'prefixo_estaticos': settings.STATIC_URL,
+            'estaticos': estaticos(configuracao),
+            'prefixo_fotos': default_storage.url(FotoGaleria._meta.get_field('imagem').upload_to),
+            'fotos': fotos(),
+            'max_fotos': configuracao['MAX_FOTOS_CACHE'],
+            'cdn': configuracao['CDN'],
+        }
+        dados['versao'] = hashlib.sha256(json.dumps(dados, sort_keys=True).encode()).hexdigest()[:16]
+        cache.add(CHAVE_MANIFESTO, dados, timeout=configuracao['MANIFESTO_TTL_SEGUNDOS'])
+    return dados
+
+
+def invalidar():
+    """Chamado depois do commit de qualquer alteração na galeria"""
+    cache.delete(CHAVE_MANIFESTO)
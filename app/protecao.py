@@ -0,0 +1,164 @@
+# app/protecao.py
+"""Proteção dos formulários públicos (simulador de orçamento e agendamento) contra abuso.
+
+O decorator `protegido_contra_abuso` barra o POST antes do formulário e do ORM:
+
+1. janela deslizante por IP no cache (não lê o corpo da requisição);
+2. honeypot (campo oculto que pessoas não preenchem) e carimbo de tempo assinado
+   (envios mais rápidos que TEMPO_MINIMO_SEGUNDOS depois de abrir a página são de robôs);
+3. janela deslizante por e-mail informado.
+
+Os bloqueios são contados em metricas.registro (app_requisicoes_bloqueadas_total).
+"""
+import hashlib
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import redirect
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CACHE = 'protecao'
+CAMPO_HONEYPOT = 'site'
+CAMPO_CARIMBO = 'carimbo_formulario'
+SAL_CARIMBO = 'app.protecao.carimbo'
+
+CONFIGURACAO_PADRAO = {
+    'ATIVA': True,
+    # (máximo de envios, janela em segundos)
+    'LIMITE_IP': (10, 600),
+    'LIMITE_EMAIL': (3, 3600),
+    'TEMPO_MINIMO_SEGUNDOS': 3,
+    'VALIDADE_CARIMBO_SEGUNDOS': 6 * 3600,
+    # Atrás de proxy (Railway), o IP do cliente vem no X-Forwarded-For
+    'CONFIAR_X_FORWARDED_FOR': False,
+    # Quantos proxies nossos acrescentam entradas ao X-Forwarded-For (contados da direita)
+    'PROXIES_CONFIAVEIS': 1,
+}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'PROTECAO', {}))
+    return configuracao
+
+
+# --- Janela deslizante ---
+
+def contar_na_janela(chave, limite, janela, agora=None):
+    """Registra uma ocorrência e diz se `chave` passou de `limite` na última `janela` (segundos).
+
+    Aproxima a janela deslizante com dois contadores fixos: o atual mais o anterior
+    ponderado pela parte dele que ainda cai dentro da janela. Retorna (bloqueado, espera).
+    """
+    agora = time.time() if agora is None else agora
+    indice, decorrido = divmod(agora, janela)
+    atual = f'{PREFIXO_CACHE}:{chave}:{int(indice)}'
+    anterior = f'{PREFIXO_CACHE}:{chave}:{int(indice) - 1}'
+    cache.add(atual, 0, timeout=janela * 2)
+    try:
+        contagem_atual = cache.incr(atual)
+    except ValueError:  # expirou entre o add e o incr
+        cache.set(atual, 1, timeout=janela * 2)
+        contagem_atual = 1
+    contagem_anterior = cache.get(anterior, 0)
+    estimativa = contagem_atual + contagem_anterior * (1 - decorrido / janela)
+    if estimativa > limite:
+        return True, math.ceil(janela - decorrido)
+    return False, 0
+
+
+def ip_cliente(request, configuracao):
+    if configuracao['CONFIAR_X_FORWARDED_FOR']:
+        encaminhado = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if encaminhado:
+            # As entradas da esquerda vêm do cliente e podem ser inventadas a cada envio;
+            # vale a que o primeiro proxy confiável acrescentou
+            return encaminhado[-min(configuracao['PROXIES_CONFIAVEIS'], len(encaminhado))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# --- Honeypot e carimbo ---
+
+def gerar_carimbo():
+    return signing.TimestampSigner(salt=SAL_CARIMBO).sign(str(int(time.time())))
+
+
+def verificar_carimbo(valor, configuracao, agora=None):
+    """Retorna o motivo do bloqueio ou None se o carimbo é válido e antigo o bastante"""
+    agora = time.time() if agora is None else agora
+    try:
+        emitido = int(signing.TimestampSigner(salt=SAL_CARIMBO).unsign(
+            valor or '', max_age=configuracao['VALIDADE_CARIMBO_SEGUNDOS'],
+        ))
+    except (signing.BadSignature, ValueError):
+        return 'carimbo_invalido'
+    if agora - emitido < configuracao['TEMPO_MINIMO_SEGUNDOS']:
+        return 'rapido_demais'
+    return None
+
+
+# --- Decorator ---
+
+def _bloquear(request, motivo, espera=None, destino_sucesso=None):
+    view = request.resolver_match.view_name if request.resolver_match else request.path
+    metricas.registro.registrar_bloqueio(view, motivo)
+    logger.warning("Envio bloqueado em %s: %s", view, motivo)
+    if espera is None:
+        # Robôs recebem a mesma resposta de um envio aceito (o redirect para destino_sucesso);
+        # carimbo vencido ou envio rápido demais ainda podem ser uma pessoa, que volta ao
+        # formulário com o aviso para tentar de novo
+        if motivo == 'honeypot':
+            return redirect(destino_sucesso or request.path)
+        messages.error(request, "Não foi possível enviar o formulário. Confira os dados e envie novamente.")
+        return redirect(request.path)
+    resposta = HttpResponse(
+        "Muitas tentativas em pouco tempo. Tente novamente em alguns minutos.", status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    resposta['Retry-After'] = str(espera)
+    return resposta
+
+
+def protegido_contra_abuso(campo_email='email', destino_sucesso=None):
+    """`destino_sucesso`: para onde a view redireciona depois de um envio aceito (nome de rota ou URL)"""
+    def decorator(view):
+        @wraps(view)
+        def protegida(request, *args, **kwargs):
+            configuracao = obter_configuracao()
+            if request.method != 'POST' or not configuracao['ATIVA']:
+                return view(request, *args, **kwargs)
+
+            nome_view = view.__name__
+            limite, janela = configuracao['LIMITE_IP']
+            bloqueado, espera = contar_na_janela(f'ip:{nome_view}:{ip_cliente(request, configuracao)}', limite, janela)
+            if bloqueado:
+                return _bloquear(request, 'limite_ip', espera)
+
+            if request.POST.get(CAMPO_HONEYPOT):
+                return _bloquear(request, 'honeypot', destino_sucesso=destino_sucesso)
+            motivo = verificar_carimbo(request.POST.get(CAMPO_CARIMBO), configuracao)
+            if motivo:
+                return _bloquear(request, motivo)
+
+            email = (request.POST.get(campo_email) or '').strip().lower()
+            if email:
+                limite, janela = configuracao['LIMITE_EMAIL']
+                # Hash: chave curta e segura para qualquer backend, sem guardar o e-mail no cache
+                chave = f'email:{nome_view}:{hashlib.sha256(email.encode()).hexdigest()[:32]}'
+                bloqueado, espera = contar_na_janela(chave, limite, janela)
+                if bloqueado:
+                    return _bloquear(request, 'limite_email', espera)
+
+            return view(request, *args, **kwargs)
+        return protegida
+    return decorator
@@ -0,0 +1,216 @@
+# app/resumos.py
+"""Rollups diários de orçamentos e agendamentos e o painel que os lê.
+
+O painel só consulta as tabelas de resumo; as tabelas brutas são lidas apenas para
+recalcular os dias afetados (ao salvar, pelos signals, ou pelo comando atualizar_resumos).
+O recalculo soma as tabelas quentes e o arquivo (app/arquivamento.py), então arquivar
+não muda os números do painel.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from . import arquivamento
+from .models import (
+    Agendamento, AgendamentoArquivado, Orcamento, RegistroExclusao, ResumoAgendamentosDia, ResumoOrcamentosDia,
+)
+
+CONFIGURACAO_PADRAO = {
+    'ATUALIZAR_AO_SALVAR': True,
+    # A atualização incremental relê o que mudou desde o último resumo menos esta margem,
+    # para não perder linhas de transações que ainda estavam abertas na rodada anterior.
+    'MARGEM_SEGUNDOS': 300,
+    'MESES_PAINEL': 12,
+}
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'RESUMOS', {}))
+    return configuracao
+
+
+def dia_local(momento):
+    return timezone.localtime(momento).date()
+
+
+# --- Recalculo ---
+
+def recalcular_orcamentos(dias=None):
+    """Reescreve os resumos de orçamentos dos `dias` informados (None = todos)"""
+    condicoes = {}
+    resumos = ResumoOrcamentosDia.objects.all()
+    if dias is not None:
+        dias = set(dias)
+        if not dias:
+            return
+        condicoes['data_criacao__gte'] = timezone.make_aware(datetime.combine(min(dias), time.min))
+        condicoes['data_criacao__lt'] = timezone.make_aware(datetime.combine(max(dias) + timedelta(days=1), time.min))
+        resumos = resumos.filter(dia__in=dias)
+    orcamentos = arquivamento.historico(Orcamento, campos=[
+        'data_criacao', 'tipo_evento', 'pacote_selecionado', 'num_convidados', 'servicos_adicionais', 'preco_final',
+    ], **condicoes)
+
+    grupos = defaultdict(lambda: {
+        'quantidade': 0, 'total_estimado': Decimal('0'), 'quantidade_com_preco': 0,
+        'total_estimado_com_preco': Decimal('0'), 'total_preco_final': Decimal('0'),
+    })
+    for orcamento in orcamentos:
+        dia = dia_local(orcamento.data_criacao)
+        if dias is not None and dia not in dias:
+            continue
+        estimado = Decimal(orcamento.calcular_orcamento_estimado())
+        grupo = grupos[(dia, orcamento.tipo_evento)]
+        grupo['quantidade'] += 1
+        grupo['total_estimado'] += estimado
+        if orcamento.preco_final is not None:
+            grupo['quantidade_com_preco'] += 1
+            grupo['total_estimado_com_preco'] += estimado
+            grupo['total_preco_final'] += orcamento.preco_final
+
+    with transaction.atomic():
+        resumos.delete()
+        ResumoOrcamentosDia.objects.bulk_create([
+            ResumoOrcamentosDia(dia=dia, tipo_evento=tipo_evento, **valores)
+            for (dia, tipo_evento), valores in grupos.items()
+        ])
+
+
+def recalcular_agendamentos(dias=None):
+    """Reescreve os resumos de agendamentos dos `dias` informados (None = todos)"""
+    condicoes = {}
+    resumos = ResumoAgendamentosDia.objects.all()
+    if dias is not None:
+        dias = set(dias)
+        if not dias:
+            return
+        condicoes['data__in'] = dias
+        resumos = resumos.filter(dia__in=dias)
+
+    contagens = defaultdict(lambda: {'total': 0, 'pendentes': 0, 'aceitos': 0, 'recusados': 0})
+    for modelo in (Agendamento, AgendamentoArquivado):
+        linhas = modelo.objects.filter(**condicoes).order_by().values('data').annotate(
+            total=Count('id'),
+            pendentes=Count('id', filter=Q(status='pendente')),
+            aceitos=Count('id', filter=Q(status='aceito')),
+            recusados=Count('id', filter=Q(status='recusado')),
+        )
+        for linha in linhas:
+            contagem = contagens[linha.pop('data')]
+            for chave, valor in linha.items():
+                contagem[chave] += valor
+    with transaction.atomic():
+        resumos.delete()
+        ResumoAgendamentosDia.objects.bulk_create([
+            ResumoAgendamentosDia(dia=dia, **valores) for dia, valores in contagens.items()
+        ])
+
+
+def agendar_recalculo(orcamentos=(), agendamentos=()):
+    """Recalcula os dias afetados depois do commit (erros não derrubam quem salvou)"""
+    if not obter_configuracao()['ATUALIZAR_AO_SALVAR']:
+        return
+    dias_orcamentos = {dia for dia in orcamentos if dia}
+    dias_agendamentos = {dia for dia in agendamentos if dia}
+    if dias_orcamentos:
+        transaction.on_commit(lambda: recalcular_orcamentos(dias_orcamentos), robust=True)
+    if dias_agendamentos:
+        transaction.on_commit(lambda: recalcular_agendamentos(dias_agendamentos), robust=True)
+
+
+def atualizar_resumos(completo=False):
+    """Atualiza os resumos. Incremental: só os dias com linhas alteradas ou excluídas desde o último resumo.
+
+    Retorna {'orcamentos': nº de dias, 'agendamentos': nº de dias} (None = reconstrução completa).
+    """
+    if completo:
+        recalcular_orcamentos()
+        recalcular_agendamentos()
+        return {'orcamentos': None, 'agendamentos': None}
+
+    margem = timedelta(seconds=obter_configuracao()['MARGEM_SEGUNDOS'])
+    resultado = {}
+    fuso = timezone.get_current_timezone()
+    fontes = (
+        ('orcamentos', Orcamento, ResumoOrcamentosDia, recalcular_orcamentos,
+         lambda qs: qs.annotate(dia=TruncDate('data_criacao', tzinfo=fuso)).values_list('dia', flat=True)),
+        ('agendamentos', Agendamento, ResumoAgendamentosDia, recalcular_agendamentos,
+         lambda qs: qs.values_list('data', flat=True)),
+    )
+    for nome, modelo, modelo_resumo, recalcular, dias_alterados in fontes:
+        marco = modelo_resumo.objects.aggregate(marco=Max('atualizado_em'))['marco']
+        if marco is None:
+            recalcular()
+            resultado[nome] = None
+            continue
+        dias = set(dias_alterados(modelo.objects.filter(atualizado_em__gt=marco - margem).order_by()).distinct())
+        # Linha excluída não aparece em atualizado_em: o tombstone guarda o dia dela
+        dias.update(
+            RegistroExclusao.objects.filter(
+                modelo=modelo._meta.model_name, excluido_em__gt=marco - margem, dia__isnull=False,
+            ).order_by().values_list('dia', flat=True).distinct()
+        )
+        recalcular(dias)
+        resultado[nome] = len(dias)
+    return resultado
+
+
+# --- Painel ---
+
+def _percentual(parte, todo):
+    return round(100 * parte / todo, 1) if todo else None
+
+
+def montar_painel(meses=None):
+    """Números do painel por mês, lidos só das tabelas de resumo"""
+    meses = meses or obter_configuracao()['MESES_PAINEL']
+    hoje = timezone.localdate()
+    inicio = hoje.replace(day=1)
+    for _ in range(meses - 1):
+        inicio = (inicio - timedelta(days=1)).replace(day=1)
+
+    tipos = dict(Orcamento.TIPO_EVENTO_CHOICES)
+    orcamentos = list(
+        ResumoOrcamentosDia.objects.filter(dia__gte=inicio)
+        .annotate(mes=TruncMonth('dia')).values('mes', 'tipo_evento')
+        .annotate(
+            quantidade=Sum('quantidade'),
+            total_estimado=Sum('total_estimado'),
+            quantidade_com_preco=Sum('quantidade_com_preco'),
+            total_estimado_com_preco=Sum('total_estimado_com_preco'),
+            total_preco_final=Sum('total_preco_final'),
+        ).order_by('-mes', 'tipo_evento')
+    )
+    for linha in orcamentos:
+        linha['tipo_evento_display'] = tipos.get(linha['tipo_evento'], linha['tipo_evento'])
+        linha['diferenca'] = linha['total_preco_final'] - linha['total_estimado_com_preco']
+        linha['taxa_fechamento'] = _percentual(linha['quantidade_com_preco'], linha['quantidade'])
+
+    agendamentos = list(
+        ResumoAgendamentosDia.objects.filter(dia__gte=inicio)
+        .annotate(mes=TruncMonth('dia')).values('mes')
+        .annotate(total=Sum('total'), pendentes=Sum('pendentes'), aceitos=Sum('aceitos'), recusados=Sum('recusados'))
+        .order_by('-mes')
+    )
+    for linha in agendamentos:
+        linha['taxa_aceite'] = _percentual(linha['aceitos'], linha['aceitos'] + linha['recusados'])
+
+    totais = {
+        'orcamentos': sum(linha['quantidade'] for linha in orcamentos),
+        'com_preco': sum(linha['quantidade_com_preco'] for linha in orcamentos),
+        'estimado_com_preco': sum((linha['total_estimado_com_preco'] for linha in orcamentos), Decimal('0')),
+        'preco_final': sum((linha['total_preco_final'] for linha in orcamentos), Decimal('0')),
+        'aceitos': sum(linha['aceitos'] for linha in agendamentos),
+        'recusados': sum(linha['recusados'] for linha in agendamentos),
+    }
+    totais['diferenca'] = totais['preco_final'] - totais['estimado_com_preco']
+    totais['taxa_fechamento'] = _percentual(totais['com_preco'], totais['orcamentos'])
+    totais['taxa_aceite'] = _percentual(totais['aceitos'], totais['aceitos'] + totais['recusados'])
+
+    return {'inicio': inicio, 'orcamentos': orcamentos, 'agendamentos': agendamentos, 'totais': totais}
@@ -0,0 +1,106 @@
+# app/roteamento.py
+"""Leituras numa réplica do banco, escritas sempre no primário.
+
+Só as views marcadas com @somente_leitura (ou classes com `somente_leitura = True`)
+leem da réplica, e só em GET/HEAD/OPTIONS. Ler o que acabou de gravar ("read your
+writes") é garantido de dois jeitos:
+
+- dentro da requisição: a primeira escrita passa as leituras seguintes para o primário;
+- entre requisições: quem escreveu recebe o cookie FIXAR_COOKIE e lê do primário por
+  FIXAR_SEGUNDOS (tempo acima do atraso típico de replicação).
+
+Sem o alias da réplica em DATABASES tudo vai para o primário.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+CONFIGURACAO_PADRAO = {
+    'REPLICA': 'replica',
+    'FIXAR_SEGUNDOS': 10,
+    'FIXAR_COOKIE': 'fixar_primario',
+}
+
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def obter_configuracao():
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    configuracao.update(getattr(settings, 'ROTEAMENTO', {}))
+    return configuracao
+
+
+@dataclass
+class EstadoRoteamento:
+    replica: str = None  # alias usado nas leituras (None = primário)
+    escreveu: bool = False
+
+
+_estado = contextvars.ContextVar('estado_roteamento', default=None)
+
+
+@contextmanager
+def requisicao():
+    """Estado de roteamento de uma requisição (fora dela, tudo vai para o primário)"""
+    estado = EstadoRoteamento()
+    token = _estado.set(estado)
+    try:
+        yield estado
+    finally:
+        _estado.reset(token)
+
+
+def somente_leitura(view):
+    """Marca a view como segura para ler da réplica"""
+    view.somente_leitura = True
+    return view
+
+
+def eh_somente_leitura(view_func):
+    classe = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)  # DRF / CBV
+    return getattr(view_func, 'somente_leitura', False) or getattr(classe, 'somente_leitura', False)
+
+
+def fixado_no_primario(request, configuracao):
+    try:
+        return float(request.COOKIES.get(configuracao['FIXAR_COOKIE'], 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def replica_configurada(configuracao=None):
+    return (configuracao or obter_configuracao())['REPLICA'] in connections.settings
+
+
+def usar_replica(request, view_func):
+    """Chamado pelo middleware: liga a réplica se a view e o método permitirem"""
+    estado = _estado.get()
+    if estado is None or request.method not in METODOS_LEITURA or not eh_somente_leitura(view_func):
+        return
+    configuracao = obter_configuracao()
+    if replica_configurada(configuracao) and not fixado_no_primario(request, configuracao):
+        estado.replica = configuracao['REPLICA']
+
+
+class RoteadorReplica:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        return estado.replica if estado else None
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado:
+            estado.escreveu = True
+            estado.replica = None
+        # Explícito: um objeto lido da réplica também é salvo no primário
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, obter_configuracao()['REPLICA']}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
@@ -0,0 +1,81 @@
+# app/serializers.py
+from rest_framework import serializers
+
+from .models import Agendamento, FotoGaleria, Orcamento
+
+
+class CamposDinamicosMixin:
+    """Permite pedir só alguns campos (?campos=id,nome) e informa quais colunas carregar.
+
+    `Meta.colunas` mapeia campos calculados para as colunas do modelo de que dependem;
+    campos comuns usam o próprio `source`. `Meta.relacionados` lista os FKs que precisam de
+    select_related quando o campo correspondente é pedido.
+    """
+
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos:
+            for nome in set(self.fields) - set(campos):
+                self.fields.pop(nome)
+
+    @classmethod
+    def campos_validos(cls, campos):
+        todos = cls.Meta.fields
+        return [campo for campo in campos if campo in todos] or list(todos)
+
+    @classmethod
+    def colunas_e_relacionados(cls, campos):
+        """Retorna (colunas para only(), FKs para select_related()) dos campos pedidos"""
+        colunas_extras = getattr(cls.Meta, 'colunas', {})
+        relacionados_por_campo = getattr(cls.Meta, 'relacionados', {})
+        colunas, relacionados = {'pk'}, set()
+        for campo in campos:
+            colunas.update(colunas_extras.get(campo, [campo]))
+            if campo in relacionados_por_campo:
+                relacionados.add(relacionados_por_campo[campo])
+        return sorted(colunas), sorted(relacionados)
+
+
+class AgendamentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    aceito_por = serializers.CharField(source='aceito_por.username', default=None, read_only=True)
+    recusado_por = serializers.CharField(source='recusado_por.username', default=None, read_only=True)
+
+    class Meta:
+        model = Agendamento
+        fields = ['id', 'nome', 'email', 'telefone', 'data', 'hora', 'mensagem', 'status',
+                  'orcamento_associado', 'aceito_por', 'recusado_por']
+        colunas = {
+            'aceito_por': ['aceito_por__username'],
+            'recusado_por': ['recusado_por__username'],
+        }
+        relacionados = {'aceito_por': 'aceito_por', 'recusado_por': 'recusado_por'}
+
+
+class OrcamentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    servicos = serializers.SerializerMethodField()
+    orcamento_estimado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Orcamento
+        fields = ['id', 'nome', 'telefone', 'email', 'tipo_evento', 'num_convidados', 'local_evento',
+                  'pacote_selecionado', 'servicos', 'ideias', 'data_criacao', 'preco_final', 'orcamento_estimado']
+        colunas = {
+            'servicos': ['servicos_adicionais'],
+            'orcamento_estimado': ['pacote_selecionado', 'num_convidados', 'servicos_adicionais'],
+        }
+
+    def get_servicos(self, orcamento):
+        return orcamento.get_servicos_list()
+
+    def get_orcamento_estimado(self, orcamento):
+        return orcamento.calcular_orcamento_estimado()
+
+
+class FotoGaleriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    categoria = serializers.CharField(source='categoria.nome', default=None, read_only=True)
+
+    class Meta:
+        model = FotoGaleria
+        fields = ['id', 'titulo', 'descricao', 'imagem', 'categoria', 'data_upload']
+        colunas = {'categoria': ['categoria__nome']}
+        relacionados = {'categoria': 'categoria'}
@@ -0,0 +1,82 @@
+# app/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import agenda, busca, documentos, notificacoes, offline, resumos
+from .models import Agendamento, FotoGaleria, Orcamento, RegistroExclusao
+
+
+@receiver(post_delete, sender=Agendamento)
+@receiver(post_delete, sender=Orcamento)
+def registrar_exclusao(sender, instance, **kwargs):
+    """Grava o tombstone que o feed de alterações entrega aos painéis (e o dia que atualizar_resumos refaz)"""
+    if sender is Agendamento:
+        dia = instance.__dict__.get('data')
+    else:
+        dia = resumos.dia_local(instance.data_criacao) if instance.__dict__.get('data_criacao') else None
+    RegistroExclusao.objects.create(modelo=sender._meta.model_name, objeto_id=instance.pk, dia=dia)
+
+
+@receiver(post_init, sender=Agendamento)
+def guardar_dia_original(sender, instance, **kwargs):
+    # Se a data da visita mudar, o resumo do dia antigo também precisa ser refeito.
+    # Lê de __dict__ para não disparar consulta em instâncias carregadas com only()/defer()
+    instance._dia_resumo_original = instance.__dict__.get('data')
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_delete, sender=Agendamento)
+def atualizar_resumo_agendamentos(sender, instance, **kwargs):
+    resumos.agendar_recalculo(agendamentos={instance.__dict__.get('data'), instance._dia_resumo_original})
+    instance._dia_resumo_original = instance.__dict__.get('data')
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_delete, sender=Agendamento)
+def atualizar_versao_agenda(sender, instance, **kwargs):
+    # Invalida a ETag do feed .ics
+    transaction.on_commit(agenda.marcar_alteracao, robust=True)
+
+
+@receiver(post_save, sender=Orcamento)
+@receiver(post_delete, sender=Orcamento)
+def atualizar_resumo_orcamentos(sender, instance, **kwargs):
+    if 'data_criacao' in instance.__dict__:
+        resumos.agendar_recalculo(orcamentos={resumos.dia_local(instance.data_criacao)})
+
+
+@receiver(post_save, sender=Orcamento)
+def gerar_pdf_orcamento(sender, instance, **kwargs):
+    # Deixa o PDF pronto para o download/e-mail; se a versão já existe, a tarefa não renderiza
+    if instance.__dict__.get('preco_final') is not None:
+        orcamento_id = instance.pk
+        transaction.on_commit(lambda: documentos.gerar_em_segundo_plano(orcamento_id), robust=True)
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_save, sender=Orcamento)
+def notificar_staff(sender, instance, created, raw=False, **kwargs):
+    # Pedido novo entra no próximo resumo do staff
+    if created and not raw:
+        notificacoes.registrar_pedido(instance)
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_save, sender=Orcamento)
+def indexar_busca(sender, instance, **kwargs):
+    transaction.on_commit(lambda: busca.indexar(instance), robust=True)
+
+
+@receiver(post_delete, sender=Agendamento)
+@receiver(post_delete, sender=Orcamento)
+def remover_busca(sender, instance, **kwargs):
+    modelo, objeto_id = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: busca.remover(modelo, objeto_id), robust=True)
+
+
+@receiver(post_save, sender=FotoGaleria)
+@receiver(post_delete, sender=FotoGaleria)
+def atualizar_manifesto_offline(sender, instance, **kwargs):
+    # O sw.js muda de versão e o navegador troca as fotos guardadas
+    transaction.on_commit(offline.invalidar, robust=True)
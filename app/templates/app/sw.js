@@ -0,0 +1,167 @@
+// Service worker do site público; o manifesto abaixo é gerado por app/offline.py
+'use strict';
+
+const MANIFESTO = {{ manifesto|safe }};
+const PREFIXO = 'sabina-';
+const CACHES = {
+    estaticos: PREFIXO + 'estaticos-v' + MANIFESTO.versao_sw,
+    fotos: PREFIXO + 'fotos-v' + MANIFESTO.versao_sw,
+    // As páginas citam os estáticos pelo hash: a cada manifesto novo começam do zero
+    paginas: PREFIXO + 'paginas-' + MANIFESTO.versao,
+};
+
+function endereco(url) {
+    return url.origin + url.pathname;
+}
+
+function enderecos(urls) {
+    return new Set(urls.map((url) => endereco(new URL(url, self.location.origin))));
+}
+
+const PAGINAS = enderecos(MANIFESTO.paginas);
+const REDE_PRIMEIRO = enderecos(MANIFESTO.paginas_rede_primeiro);
+const ESTATICOS = enderecos(MANIFESTO.estaticos);
+const FOTOS = enderecos(MANIFESTO.fotos);
+const PREFIXO_ESTATICOS = new URL(MANIFESTO.prefixo_estaticos, self.location.origin).href;
+const PREFIXO_FOTOS = new URL(MANIFESTO.prefixo_fotos, self.location.origin).href;
+const PAGINA_OFFLINE = MANIFESTO.paginas[0];
+
+// Página que o servidor marcou como igual para todo visitante (ETag fraca de app/compressao.py)
+function publica(resposta) {
+    return resposta.ok && !resposta.redirected && (resposta.headers.get('ETag') || '').startsWith('W/');
+}
+
+function doCdn(url) {
+    // Só com versão fixa no caminho (ex.: bootstrap@5.3.3)
+    return MANIFESTO.cdn.some((prefixo) => url.href.startsWith(prefixo)) && /@\d/.test(url.pathname);
+}
+
+async function limitar(cache, maximo) {
+    const chaves = await cache.keys();
+    for (const chave of chaves.slice(0, Math.max(chaves.length - maximo, 0))) {
+        await cache.delete(chave);
+    }
+}
+
+async function podar(nome, manter) {
+    const cache = await caches.open(nome);
+    for (const pedido of await cache.keys()) {
+        if (!manter(new URL(pedido.url))) {
+            await cache.delete(pedido);
+        }
+    }
+}
+
+// --- Estratégias ---
+
+async function revalidar(cache, pedido, guardavel, aguardar) {
+    const resposta = await fetch(pedido);
+    // Resposta que não pode ser guardada (ex.: visitante logado) também descarta a cópia antiga
+    const gravacao = guardavel(resposta)
+        ? cache.put(pedido, resposta.clone())
+        : cache.delete(pedido, {ignoreVary: true});
+    aguardar(gravacao.catch(() => null));
+    return resposta;
+}
+
+async function paginaOffline(cache) {
+    return (await cache.match(PAGINA_OFFLINE, {ignoreVary: true})) || Response.error();
+}
+
+async function cachePrimeiro(evento, nome, opcoes) {
+    const cache = await caches.open(nome);
+    const guardada = await cache.match(evento.request, {ignoreVary: true});
+    if (guardada) {
+        return guardada;
+    }
+    // Do CDN pede em modo CORS para não guardar resposta opaca (que conta vários MB na cota)
+    const resposta = opcoes.cors
+        ? await fetch(evento.request.url, {mode: 'cors', credentials: 'omit'}).catch(() => fetch(evento.request))
+        : await fetch(evento.request);
+    if (resposta.ok) {
+        evento.waitUntil(
+            cache.put(evento.request, resposta.clone())
+                .then(() => opcoes.maximo && limitar(cache, opcoes.maximo))
+                .catch(() => null)
+        );
+    }
+    return resposta;
+}
+
+async function guardadaEAtualizada(evento, nome, guardavel, navegacao) {
+    const cache = await caches.open(nome);
+    const guardada = await cache.match(evento.request, {ignoreVary: true});
+    const atualizacao = revalidar(cache, evento.request, guardavel, (promessa) => evento.waitUntil(promessa));
+    if (guardada) {
+        evento.waitUntil(atualizacao.catch(() => null));
+        return guardada;
+    }
+    return navegacao ? atualizacao.catch(() => paginaOffline(cache)) : atualizacao;
+}
+
+async function redePrimeiro(evento, nome) {
+    const cache = await caches.open(nome);
+    try {
+        return await revalidar(cache, evento.request, publica, (promessa) => evento.waitUntil(promessa));
+    } catch (erro) {
+        return (await cache.match(evento.request, {ignoreVary: true})) || paginaOffline(cache);
+    }
+}
+
+// --- Ciclo de vida ---
+
+self.addEventListener('install', (evento) => {
+    evento.waitUntil((async () => {
+        if (MANIFESTO.ativo) {
+            const cache = await caches.open(CACHES.paginas);
+            // Uma página que falhar não impede a instalação
+            await Promise.all(MANIFESTO.paginas.map((url) => (
+                revalidar(cache, new Request(url), publica, (promessa) => evento.waitUntil(promessa)).catch(() => null)
+            )));
+        }
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (evento) => {
+    evento.waitUntil((async () => {
+        const atuais = MANIFESTO.ativo ? Object.values(CACHES) : [];
+        for (const nome of await caches.keys()) {
+            if (nome.startsWith(PREFIXO) && !atuais.includes(nome)) {
+                await caches.delete(nome);
+            }
+        }
+        if (!MANIFESTO.ativo) {
+            await self.registration.unregister();
+            return;
+        }
+        // Estáticos com hash antigo e fotos que saíram da galeria
+        await podar(CACHES.estaticos, (url) => ESTATICOS.has(endereco(url)) || doCdn(url));
+        await podar(CACHES.fotos, (url) => FOTOS.has(endereco(url)));
+        await self.clients.claim();
+    })());
+});
+
+self.addEventListener('fetch', (evento) => {
+    const pedido = evento.request;
+    if (!MANIFESTO.ativo || pedido.method !== 'GET') {
+        return;
+    }
+    const url = new URL(pedido.url);
+    const atual = endereco(url);
+    if (pedido.mode === 'navigate') {
+        // Demais páginas (staff, admin) vão direto para a rede
+        if (PAGINAS.has(atual)) {
+            evento.respondWith(guardadaEAtualizada(evento, CACHES.paginas, publica, true));
+        } else if (REDE_PRIMEIRO.has(atual)) {
+            evento.respondWith(redePrimeiro(evento, CACHES.paginas));
+        }
+    } else if (ESTATICOS.has(atual) || doCdn(url)) {
+        evento.respondWith(cachePrimeiro(evento, CACHES.estaticos, {cors: url.origin !== self.location.origin}));
+    } else if (atual.startsWith(PREFIXO_FOTOS)) {
+        evento.respondWith(cachePrimeiro(evento, CACHES.fotos, {maximo: MANIFESTO.max_fotos}));
+    } else if (atual.startsWith(PREFIXO_ESTATICOS)) {
+        // Estático sem hash no nome (storage sem manifesto): abre o guardado e confere na rede
+        evento.respondWith(guardadaEAtualizada(evento, CACHES.paginas, (resposta) => resposta.ok, false));
+    }
+});
@@ -0,0 +1,18 @@
+from django import template
+from django.utils.html import format_html
+
+from app.protecao import CAMPO_CARIMBO, CAMPO_HONEYPOT, gerar_carimbo
+
+register = template.Library()
+
+
+@register.simple_tag
+def campos_protecao():
+    """Honeypot e carimbo de tempo exigidos por @protegido_contra_abuso"""
+    return format_html(
+        '<div style="position:absolute;left:-10000px;" aria-hidden="true">'
+        '<label for="id_{0}">Não preencha este campo</label>'
+        '<input type="text" name="{0}" id="id_{0}" tabindex="-1" autocomplete="off"></div>'
+        '<input type="hidden" name="{1}" value="{2}">',
+        CAMPO_HONEYPOT, CAMPO_CARIMBO, gerar_carimbo(),
+    )
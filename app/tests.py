@@ -1,3 +1,1600 @@
-from django.test import TestCase
+import csv
+import gc
+import gzip
+import importlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import runpy
+import tempfile
+import unittest
+from copy import deepcopy
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from time import perf_counter
+from unittest import mock
+import zipfile
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import LiveServerTestCase, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+
+from . import (
+    agenda, alteracoes, arquivamento, busca, calendario, compressao, diagnostico, documentos, fila_email, lembretes, limitador, logs as app_logs, metricas, notificacoes, offline,
+    protecao, resumos, roteamento,
+)
+from . import urls as app_urls
+from .mensagens import ArmazenamentoMensagens
+from .views import processar_agendamentos_em_massa, task_enviar_email_orcamento
+from .models import (
+    Agendamento, AgendamentoArquivado, CategoriaFoto, CONSTANTES_PACOTES, CONSTANTES_SERVICOS, DocumentoBusca, FotoGaleria,
+    LembreteEnviado, NotificacaoStaff, Orcamento, OrcamentoArquivado, RegistroExclusao, ResumoAgendamentosDia, ResumoOrcamentosDia,
+)
+
+# Sessão como em produção com Redis (sem REDIS_URL o padrão é o backend db)
+SESSAO_EM_CACHE = 'django.contrib.sessions.backends.cached_db'
+
+# Os testes rodam sem collectstatic: o storage de manifesto não acharia os estáticos
+ESTATICOS_SEM_MANIFESTO = override_settings(STORAGES={
+    **settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+# Sem as linhas INFO em JSON no console; quem precisa delas usa assertLogs
+LOGGERS_SILENCIADOS = ('app', 'app.desempenho')
+
+
+def setUpModule():
+    ESTATICOS_SEM_MANIFESTO.enable()
+    for nome in LOGGERS_SILENCIADOS:
+        logger = logging.getLogger(nome)
+        logger._nivel_original = logger.level
+        logger.setLevel(max(logger.level, logging.WARNING))
+
+
+def tearDownModule():
+    ESTATICOS_SEM_MANIFESTO.disable()
+    for nome in LOGGERS_SILENCIADOS:
+        logger = logging.getLogger(nome)
+        logger.setLevel(logger._nivel_original)
+
+
+# --- Diagnóstico de e-mail ---
+def sonda_falsa_ok(configuracao):
+    return True, "Sonda falsa ok"
+
+
+def sonda_falsa_erro(configuracao):
+    raise RuntimeError("sem rede")
+
+
+DIAGNOSTICO_FALSO = {
+    'AGENDADOR_ATIVO': False,
+    'SONDAS': {
+        'dns': {'funcao': 'app.tests.sonda_falsa_ok', 'intervalo': 300},
+        'conexao': {'funcao': 'app.tests.sonda_falsa_erro', 'intervalo': 300},
+        'envio': {'funcao': 'app.tests.sonda_falsa_ok', 'intervalo': None},
+    },
+}
+
+
+@override_settings(DIAGNOSTICO=DIAGNOSTICO_FALSO)
+class DiagnosticoEmailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+    def test_views_servem_resultados_do_cache(self):
+        resposta = self.client.get(reverse('diagnostico_email'))
+        self.assertContains(resposta, "aguardando a primeira verificação")
+
+        diagnostico.executar_sondas()
+
+        resposta = self.client.get(reverse('diagnostico_email'))
+        self.assertContains(resposta, "Sonda falsa ok")
+        self.assertContains(resposta, "Erro inesperado: sem rede")
+        self.assertContains(self.client.get(reverse('testar_email')), "Sonda falsa ok")
+
+    def test_envio_de_teste_so_sob_demanda(self):
+        self.assertIsNone(diagnostico.CONFIGURACAO_PADRAO['SONDAS']['envio']['intervalo'])
+        self.assertIsNone(diagnostico.obter_resultados(['envio'])['envio'])
+        self.assertContains(self.client.get(reverse('testar_email')), "Sonda falsa ok")
+        self.assertTrue(diagnostico.obter_resultados(['envio'])['envio']['sucesso'])
+
+    def test_resultado_registra_horario(self):
+        resultado = diagnostico.executar_sonda('dns')
+        self.assertTrue(resultado['sucesso'])
+        self.assertIsNotNone(resultado['verificado_em'])
+        self.assertEqual(diagnostico.obter_resultados(['dns'])['dns'], resultado)
+
+
+# --- Métricas de desempenho ---
+class DesempenhoMiddlewareTests(TestCase):
+    def setUp(self):
+        metricas.registro.limpar()
+        self.staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_metricas_agregadas_por_view(self):
+        self.client.get(reverse('lista_orcamentos'))
+        texto = self.client.get(reverse('metricas_prometheus')).content.decode()
+        self.assertIn('app_requisicoes_total{view="lista_orcamentos",status="200"} 1', texto)
+        self.assertRegex(texto, r'app_consultas_sql_total\{view="lista_orcamentos"\} [1-9]')
+        self.assertIn('app_template_duracao_segundos_total{view="lista_orcamentos"}', texto)
+
+    @override_settings(DESEMPENHO={'LIMIAR_LENTO_MS': 0, 'MAX_SQL_AMOSTRA': 50})
+    def test_requisicao_lenta_registra_sql(self):
+        with self.assertLogs('app.desempenho', level='WARNING') as logs:
+            self.client.get(reverse('lista_orcamentos'))
+        registro = logs.records[0].desempenho
+        self.assertEqual(registro['view'], 'lista_orcamentos')
+        self.assertTrue(any('SELECT' in consulta['sql'] for consulta in registro['sql']))
+
+
+# --- Logging estruturado ---
+class LogsEstruturadosTests(TestCase):
+    def _registro(self, mensagem, *args, **kwargs):
+        registro = logging.makeLogRecord({'name': 'app.teste', 'levelno': logging.INFO, 'levelname': 'INFO',
+                                          'msg': mensagem, 'args': args, **kwargs})
+        app_logs.FiltroCorrelacao().filter(registro)
+        return registro
+
+    def test_json_inclui_ids_de_correlacao_e_extras(self):
+        with app_logs.correlacionar(request_id='abc123', agendamento_id=7):
+            registro = self._registro("Agendamento %s aceito", 7, desempenho={'consultas': 3})
+        dados = json.loads(app_logs.FormatadorJSON().format(registro))
+        self.assertEqual(dados['mensagem'], "Agendamento 7 aceito")
+        self.assertEqual(dados['request_id'], 'abc123')
+        self.assertEqual(dados['agendamento_id'], 7)
+        self.assertEqual(dados['desempenho'], {'consultas': 3})
+
+    def test_handler_escreve_na_thread_do_listener(self):
+        saida = io.StringIO()
+        handler = app_logs.HandlerFilaAssincrono(stream=saida)
+        handler.setFormatter(app_logs.FormatadorJSON())
+        handler.addFilter(app_logs.FiltroCorrelacao())
+        with app_logs.correlacionar(orcamento_id=42):
+            handler.handle(self._registro("Orçamento %s enviado", 42))
+        handler.parar()
+        dados = json.loads(saida.getvalue())
+        self.assertEqual(dados['mensagem'], "Orçamento 42 enviado")
+        self.assertEqual(dados['orcamento_id'], 42)
+
+    def test_middleware_devolve_request_id(self):
+        resposta = self.client.get(reverse('inicio'), HTTP_X_REQUEST_ID='req-1')
+        self.assertEqual(resposta['X-Request-ID'], 'req-1')
+        self.assertEqual(len(self.client.get(reverse('inicio'))['X-Request-ID']), 32)
+
+
+# --- API REST ---
+@override_settings(SESSION_ENGINE=SESSAO_EM_CACHE)
+class ApiLeituraTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        semear_dados(120)
+        cls.staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        Agendamento.objects.filter(status='aceito').update(aceito_por=cls.staff)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_campos_esparsos_buscam_so_as_colunas_pedidas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('api-agendamento-list'), {'campos': 'id,status,aceito_por'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(set(resposta.json()['results'][0]), {'id', 'status', 'aceito_por'})
+        sql = consultas.captured_queries[-1]['sql']
+        self.assertNotIn('"mensagem"', sql)
+        self.assertIn('JOIN "auth_user"', sql)
+        self.assertEqual(len(consultas), 2)  # usuário e a página (a sessão vem do cache)
+
+    def test_paginacao_por_cursor(self):
+        primeira = self.client.get(reverse('api-orcamento-list'), {'tamanho': 50}).json()
+        segunda = self.client.get(primeira['next']).json()
+        ids = [o['id'] for o in primeira['results'] + segunda['results']]
+        self.assertEqual(len(ids), 100)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIn('orcamento_estimado', segunda['results'][0])
+
+    def test_get_condicional_devolve_304(self):
+        resposta = self.client.get(reverse('api-foto-list'))
+        repetida = self.client.get(reverse('api-foto-list'), HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_agendamentos_exigem_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-agendamento-list')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('api-foto-list')).status_code, 200)
+
+    def test_filtro_invalido_devolve_400(self):
+        resposta = self.client.get(reverse('api-agendamento-list'), {'data': 'abc'})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('data', resposta.json())
+        dia = Agendamento.objects.values_list('data', flat=True).first()
+        resposta = self.client.get(reverse('api-agendamento-list'), {'data': dia.isoformat()})
+        self.assertEqual({a['data'] for a in resposta.json()['results']}, {dia.isoformat()})
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-foto-list'), {'categoria': 'abc'}).status_code, 400)
+
+
+# --- Feed de alterações ---
+@override_settings(ALTERACOES={'ESTABILIZACAO_SEGUNDOS': 0, 'SSE_DURACAO': 0.2, 'SSE_INTERVALO': 0.1})
+class FeedAlteracoesTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def _orcamento(self, nome):
+        return Orcamento.objects.create(
+            nome=nome, telefone='(11) 98765-4321', email='a@example.com', tipo_evento='casamento',
+            num_convidados=50, local_evento='interno', pacote_selecionado='basico',
+        )
+
+    def test_entrega_so_o_que_mudou_desde_o_cursor_e_exclusoes(self):
+        primeiro = self._orcamento('Ana')
+        segundo = self._orcamento('Bia')
+        cursor = self.client.get(reverse('api-alteracoes')).json()['cursor']
+
+        segundo.preco_final = Decimal('4000.00')
+        segundo.save()
+        primeiro_id = primeiro.id
+        primeiro.delete()
+
+        dados = self.client.get(reverse('api-alteracoes'), {'desde': cursor}).json()
+        self.assertEqual([o['id'] for o in dados['orcamentos']], [segundo.id])
+        self.assertEqual(dados['excluidos'][0]['modelo'], 'orcamento')
+        self.assertEqual(dados['excluidos'][0]['id'], primeiro_id)
+        self.assertFalse(dados['mais'])
+
+    def test_paginas_nao_cortam_linhas_com_mesmo_horario(self):
+        for i in range(5):
+            self._orcamento(f'Cliente {i}')
+        mesmo_horario = timezone.now() - timedelta(minutes=1)
+        Orcamento.objects.filter(nome__in=['Cliente 1', 'Cliente 2', 'Cliente 3']).update(atualizado_em=mesmo_horario)
+
+        vistos, cursor = [], None
+        for _ in range(10):
+            dados = alteracoes.buscar_alteracoes(alteracoes.decodificar_cursor(cursor), limite=2)
+            vistos += [o.id for o in dados['orcamentos']]
+            cursor = dados['cursor']
+            if not dados['mais']:
+                break
+        self.assertEqual(sorted(vistos), sorted(Orcamento.objects.values_list('id', flat=True)))
+
+    def test_cursor_ida_e_volta_no_microssegundo(self):
+        for momento in (
+            timezone.make_aware(datetime(2026, 10, 19, 12, 30, 59, 999999)),
+            timezone.make_aware(datetime(2999, 12, 31, 23, 59, 59, 999999)),
+            timezone.make_aware(datetime(1969, 12, 31, 23, 59, 59, 1)),
+        ):
+            cursor = alteracoes.codificar_cursor(momento)
+            self.assertEqual(alteracoes.decodificar_cursor(cursor), momento)
+        self.assertTrue(alteracoes.codificar_cursor(timezone.make_aware(datetime(2026, 1, 1))).endswith('000000'))
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get(reverse('api-alteracoes'), {'desde': 'xyz'}).status_code, 400)
+
+    def test_limite_invalido_aponta_o_campo_limite(self):
+        for limite in ('-5', 'abc'):
+            resposta = self.client.get(reverse('api-alteracoes'), {'limite': limite})
+            self.assertEqual(resposta.status_code, 400)
+            self.assertEqual(list(resposta.json()), ['limite'])
+
+    def test_stream_sse(self):
+        self._orcamento('Ana')
+        resposta = self.client.get(reverse('api-alteracoes-stream'))
+        self.assertEqual(resposta['Content-Type'], 'text/event-stream')
+        corpo = b''.join(resposta.streaming_content).decode()
+        self.assertIn('event: alteracoes', corpo)
+        self.assertIn('"nome": "Ana"', corpo)
+
+
+# --- Ações em massa ---
+class AcaoEmMassaAgendamentosTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(self.staff)
+        self.dia = timezone.localdate() + timedelta(days=7)
+        if self.dia.weekday() == 6:
+            self.dia += timedelta(days=1)
+
+    def _agendamento(self, hora, status='pendente'):
+        return Agendamento.objects.create(
+            nome=f'Cliente {hora}', email='c@example.com', telefone='(11) 98765-4321',
+            data=self.dia, hora=time(*hora), status=status,
+        )
+
+    @mock.patch('app.fila_email.enfileirar')
+    def test_aceita_em_lote_validando_conflitos_em_memoria(self, enfileirar):
+        self._agendamento((10, 0), status='aceito')
+        conflita_com_existente = self._agendamento((10, 15))
+        livre = self._agendamento((14, 0))
+        conflita_com_selecao = self._agendamento((14, 20))
+        ids = [conflita_com_existente.pk, livre.pk, conflita_com_selecao.pk]
+
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('acao_em_massa_agendamentos'), {'acao': 'aceitar', 'agendamentos': ids})
+
+        self.assertEqual(Agendamento.objects.get(pk=livre.pk).status, 'aceito')
+        self.assertEqual(Agendamento.objects.get(pk=livre.pk).aceito_por, self.staff)
+        self.assertEqual(Agendamento.objects.get(pk=conflita_com_existente.pk).status, 'pendente')
+        self.assertEqual(Agendamento.objects.get(pk=conflita_com_selecao.pk).status, 'pendente')
+        enfileirar.assert_called_once()
+        self.assertEqual(enfileirar.call_args.kwargs['args'], (livre.pk, 'aceito'))
+        self.assertLessEqual(len(consultas), 9)
+
+    @mock.patch('app.fila_email.enfileirar')
+    def test_consultas_nao_crescem_com_a_selecao(self, _enfileirar):
+        ids = [self._agendamento((9 + i // 2, 30 * (i % 2))).pk for i in range(16)]
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('acao_em_massa_agendamentos'), {'acao': 'recusar', 'agendamentos': ids})
+        self.assertEqual(Agendamento.objects.filter(status='recusado').count(), 16)
+        self.assertLessEqual(len(consultas), 9)
+
+
+# --- Exportação ---
+class ExportacaoTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+        Orcamento.objects.create(
+            nome='Ana', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='aniversario',
+            num_convidados=30, local_evento='interno', pacote_selecionado='basico', preco_final=Decimal('1234.50'),
+        )
+        Orcamento.objects.create(
+            nome='Bia', telefone='(11) 91234-5678', email='bia@example.com', tipo_evento='casamento',
+            num_convidados=80, local_evento='interno', pacote_selecionado='basico',
+        )
+
+    def test_csv_em_streaming_respeita_filtro(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('exportar_orcamentos'), {'formato': 'csv', 'tipo_evento': 'aniversario'})
+            self.assertTrue(resposta.streaming)
+            linhas = list(csv.reader(b''.join(resposta.streaming_content).decode('utf-8-sig').splitlines()))
+        self.assertEqual(linhas[0][0], 'ID')
+        self.assertEqual(len(linhas), 2)
+        self.assertEqual(linhas[1][1], 'Ana')
+        self.assertEqual(linhas[1][-1], '1234.50')
+        self.assertLessEqual(len(consultas), 3)
+
+    def test_xlsx_e_um_zip_valido(self):
+        resposta = self.client.get(reverse('exportar_orcamentos'), {'formato': 'xlsx'})
+        arquivo = zipfile.ZipFile(io.BytesIO(b''.join(resposta.streaming_content)))
+        self.assertIsNone(arquivo.testzip())
+        planilha = arquivo.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('Ana', planilha)
+        self.assertIn('Bia', planilha)
+        self.assertIn('attachment', resposta['Content-Disposition'])
+
+    def test_texto_que_vira_formula_sai_prefixado(self):
+        Orcamento.objects.filter(nome='Ana').update(nome='=HYPERLINK("http://x")', ideias='@SOMA(A1)')
+        resposta = self.client.get(reverse('exportar_orcamentos'), {'formato': 'csv', 'tipo_evento': 'aniversario'})
+        linha = list(csv.reader(b''.join(resposta.streaming_content).decode('utf-8-sig').splitlines()))[1]
+        self.assertEqual(linha[1], '\'=HYPERLINK("http://x")')
+        self.assertEqual(linha[9], "'@SOMA(A1)")
+        self.assertEqual(linha[3], '(11) 98765-4321')
+
+        # No XLSX a célula é inlineStr (nunca avaliada): o texto sai sem o apóstrofo
+        resposta = self.client.get(reverse('exportar_orcamentos'), {'formato': 'xlsx', 'tipo_evento': 'aniversario'})
+        planilha = zipfile.ZipFile(io.BytesIO(b''.join(resposta.streaming_content))).read('xl/worksheets/sheet1.xml')
+        textos = [t.text for t in ElementTree.fromstring(planilha).iter(
+            '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t'
+        )]
+        self.assertIn('=HYPERLINK("http://x")', textos)
+        self.assertIn('@SOMA(A1)', textos)
+
+    def test_xlsx_remove_caracteres_de_controle(self):
+        Orcamento.objects.filter(nome='Ana').update(nome='Ana\x00\x08\x1f', ideias='linha 1\nlinha 2\x0b-')
+        resposta = self.client.get(reverse('exportar_orcamentos'), {'formato': 'xlsx', 'tipo_evento': 'aniversario'})
+        planilha = zipfile.ZipFile(io.BytesIO(b''.join(resposta.streaming_content))).read('xl/worksheets/sheet1.xml')
+        textos = [t.text for t in ElementTree.fromstring(planilha).iter(
+            '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t'
+        )]
+        self.assertIn('Ana', textos)
+        self.assertIn('linha 1\nlinha 2-', textos)
+
+
+# --- Resumos analíticos ---
+class ResumosAnaliticosTests(TestCase):
+    def setUp(self):
+        self.dia = timezone.localdate() + timedelta(days=7)
+        if self.dia.weekday() == 6:
+            self.dia += timedelta(days=1)
+
+    def _orcamento(self, **campos):
+        return Orcamento.objects.create(**{
+            'nome': 'Ana', 'telefone': '(11) 98765-4321', 'email': 'ana@example.com', 'tipo_evento': 'casamento',
+            'num_convidados': 10, 'local_evento': 'interno', 'pacote_selecionado': 'basico', **campos,
+        })
+
+    def test_reconstrucao_completa_agrega_por_dia_e_tipo(self):
+        fechado = self._orcamento(preco_final=Decimal('5000.00'))
+        self._orcamento()
+        self._orcamento(tipo_evento='infantil')
+        resumos.atualizar_resumos(completo=True)
+
+        resumo = ResumoOrcamentosDia.objects.get(tipo_evento='casamento')
+        estimado = Decimal(fechado.calcular_orcamento_estimado())
+        self.assertEqual(resumo.quantidade, 2)
+        self.assertEqual(resumo.quantidade_com_preco, 1)
+        self.assertEqual(resumo.total_estimado, 2 * estimado)
+        self.assertEqual(resumo.total_preco_final - resumo.total_estimado_com_preco, Decimal('5000.00') - estimado)
+        self.assertEqual(ResumoOrcamentosDia.objects.get(tipo_evento='infantil').quantidade, 1)
+
+        # Incremental: só o dia alterado é relido
+        self._orcamento(tipo_evento='infantil')
+        self.assertEqual(resumos.atualizar_resumos(), {'orcamentos': 1, 'agendamentos': None})
+        self.assertEqual(ResumoOrcamentosDia.objects.get(tipo_evento='infantil').quantidade, 2)
+
+    def test_incremental_refaz_o_dia_de_linhas_excluidas(self):
+        self._orcamento()
+        infantil = self._orcamento(tipo_evento='infantil')
+        agendamento = Agendamento.objects.create(
+            nome='Bia', email='bia@example.com', telefone='(11) 98765-4321', data=self.dia, hora=time(10, 0),
+        )
+        resumos.atualizar_resumos(completo=True)
+
+        # Sem os callbacks do commit, como quando o recalculo ao salvar está desligado ou falhou
+        infantil.delete()
+        agendamento.delete()
+        self.assertEqual(resumos.atualizar_resumos(), {'orcamentos': 1, 'agendamentos': 1})
+        self.assertFalse(ResumoOrcamentosDia.objects.filter(tipo_evento='infantil').exists())
+        self.assertEqual(ResumoOrcamentosDia.objects.get(tipo_evento='casamento').quantidade, 1)
+        self.assertFalse(ResumoAgendamentosDia.objects.filter(dia=self.dia).exists())
+
+    def test_salvar_recalcula_dia_antigo_e_novo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            agendamento = Agendamento.objects.create(
+                nome='Bia', email='bia@example.com', telefone='(11) 98765-4321', data=self.dia, hora=time(10, 0),
+            )
+        self.assertEqual(ResumoAgendamentosDia.objects.get(dia=self.dia).pendentes, 1)
+
+        agendamento = Agendamento.objects.get(pk=agendamento.pk)
+        agendamento.data = self.dia + timedelta(days=1)
+        agendamento.status = 'aceito'
+        with self.captureOnCommitCallbacks(execute=True):
+            agendamento.save()
+        self.assertFalse(ResumoAgendamentosDia.objects.filter(dia=self.dia).exists())
+        self.assertEqual(ResumoAgendamentosDia.objects.get(dia=agendamento.data).aceitos, 1)
+
+    def test_painel_le_somente_resumos(self):
+        self._orcamento(preco_final=Decimal('100.00'))
+        resumos.atualizar_resumos(completo=True)
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('painel_analitico'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['totais']['orcamentos'], 1)
+        tabelas_brutas = (Orcamento._meta.db_table, Agendamento._meta.db_table)
+        for consulta in consultas:
+            self.assertFalse(any(f'"{tabela}"' in consulta['sql'] for tabela in tabelas_brutas), consulta['sql'])
+
+
+# --- Busca de texto ---
+class BuscaTests(TestCase):
+    def setUp(self):
+        dia = timezone.localdate() + timedelta(days=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agendamento = Agendamento.objects.create(
+                nome='José Conceição', email='jose@example.com', telefone='(11) 98765-4321',
+                data=dia, hora=time(10, 0), mensagem='Quero ver arranjos de girassóis',
+            )
+            self.orcamento = Orcamento.objects.create(
+                nome='Ana Paula', telefone='(21) 91234-5678', email='ana@example.com', tipo_evento='casamento',
+                num_convidados=50, local_evento='interno', pacote_selecionado='basico', ideias='Tema rústico com balões',
+            )
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+
+    def _buscar(self, termo, **parametros):
+        resposta = self.client.get(reverse('api-busca'), {'q': termo, **parametros})
+        self.assertEqual(resposta.status_code, 200)
+        return [(r['modelo'], r['id']) for r in resposta.json()['resultados']]
+
+    def test_ignora_acentos_e_casa_prefixos(self):
+        esperado = [('agendamento', self.agendamento.pk)]
+        self.assertEqual(self._buscar('jose conceicao'), esperado)
+        self.assertEqual(self._buscar('CONCEIÇ'), esperado)
+        self.assertEqual(self._buscar('girassois'), esperado)
+        self.assertEqual(self._buscar('rustico'), [('orcamento', self.orcamento.pk)])
+
+    def test_telefone_normalizado(self):
+        esperado = [('orcamento', self.orcamento.pk)]
+        self.assertEqual(self._buscar('91234-5678'), esperado)
+        self.assertEqual(self._buscar('+55 (21) 91234-5678'), esperado)
+        self.assertEqual(self._buscar('21912345678'), esperado)
+
+    @mock.patch('app.busca._fts_sqlite', return_value=False)
+    def test_sem_fts_usa_texto_normalizado(self, _fts):
+        self.assertEqual(self._buscar('balo tema'), [('orcamento', self.orcamento.pk)])
+
+    def test_filtro_por_modelo_e_exclusao(self):
+        self.assertEqual(self._buscar('example', modelo='orcamento'), [('orcamento', self.orcamento.pk)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.orcamento.delete()
+        self.assertEqual(self._buscar('ana paula'), [])
+
+    def test_admin_usa_indice(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'senha')
+        self.client.force_login(admin)
+        resposta = self.client.get(reverse('admin:app_agendamento_changelist'), {'q': 'conceicao'})
+        self.assertEqual(list(resposta.context['cl'].result_list), [self.agendamento])
+
+    def test_migration_indexa_como_a_app(self):
+        # A migration 0006 tem uma cópia congelada da normalização; hoje ela deve bater com app/busca.py
+        from django.apps import apps
+
+        migration = importlib.import_module('app.migrations.0006_busca')
+        esperado = {(d.modelo, d.objeto_id): (d.titulo, d.texto) for d in DocumentoBusca.objects.all()}
+        DocumentoBusca.objects.all().delete()
+        migration.indexar_existentes(apps, None, tamanho_lote=1)
+        obtido = {(d.modelo, d.objeto_id): (d.titulo, d.texto) for d in DocumentoBusca.objects.all()}
+        self.assertEqual(obtido, esperado)
+        self.assertEqual(len(obtido), 2)
+
+
+# --- Lembretes de visita ---
+@override_settings(LEMBRETES={
+    'CANAIS': ['email', 'sms'],
+    'TRANSPORTES': {'email': 'app.lembretes.TransporteFalso', 'sms': 'app.lembretes.TransporteFalso'},
+})
+class LembretesTests(TestCase):
+    def setUp(self):
+        lembretes.TransporteFalso.enviados = []
+        dia = timezone.localdate() + timedelta(days=7)
+        if dia.weekday() == 6:
+            dia += timedelta(days=1)
+        self.aceito = Agendamento.objects.create(
+            nome='Ana', email='ana@example.com', telefone='(11) 98765-4321', data=dia, hora=time(10, 0), status='aceito',
+        )
+        Agendamento.objects.create(
+            nome='Bia', email='bia@example.com', telefone='(11) 98765-4321', data=dia, hora=time(11, 0),
+        )
+        self.visita = self.aceito.data_hora()
+
+    def test_envia_uma_vez_por_antecedencia_e_canal(self):
+        resultado = lembretes.despachar_lembretes(agora=self.visita - timedelta(hours=20))
+        self.assertEqual(resultado, {'enviados': 2, 'adiados': 0, 'falhas': 0})
+        self.assertEqual(lembretes.TransporteFalso.enviados, [(self.aceito.pk, '24h')] * 2)
+
+        # Rodar de novo na mesma janela não reenvia
+        self.assertEqual(lembretes.despachar_lembretes(agora=self.visita - timedelta(hours=19))['enviados'], 0)
+
+        lembretes.despachar_lembretes(agora=self.visita - timedelta(hours=1))
+        self.assertEqual(LembreteEnviado.objects.filter(antecedencia='2h').count(), 2)
+        self.assertEqual(lembretes.despachar_lembretes(agora=self.visita - timedelta(minutes=30))['enviados'], 0)
+
+    def test_fora_da_janela_ou_ja_passou(self):
+        self.assertEqual(lembretes.despachar_lembretes(agora=self.visita - timedelta(days=2))['enviados'], 0)
+        self.assertEqual(lembretes.despachar_lembretes(agora=self.visita + timedelta(minutes=1))['enviados'], 0)
+
+    def test_falha_libera_nova_tentativa(self):
+        with mock.patch.object(lembretes.TransporteFalso, 'enviar', side_effect=RuntimeError('fora do ar')):
+            resultado = lembretes.despachar_lembretes(agora=self.visita - timedelta(hours=20))
+        self.assertEqual(resultado, {'enviados': 0, 'adiados': 0, 'falhas': 2})
+        self.assertFalse(LembreteEnviado.objects.exists())
+        self.assertEqual(lembretes.despachar_lembretes(agora=self.visita - timedelta(hours=20))['enviados'], 2)
+
+
+# --- Resumo de pedidos para o staff ---
+@override_settings(NOTIFICACOES_STAFF={
+    'CANAIS': ['email', 'whatsapp'],
+    'TRANSPORTES': {'email': 'app.notificacoes.TransporteFalso', 'whatsapp': 'app.notificacoes.TransporteFalso'},
+    'INTERVALO_SEGUNDOS': 15 * 60,
+    'LIMITE_ITENS': 2,
+})
+class NotificacoesStaffTests(TestCase):
+    def setUp(self):
+        notificacoes.TransporteFalso.enviados = []
+        self.dia = timezone.localdate() + timedelta(days=7)
+        if self.dia.weekday() == 6:
+            self.dia += timedelta(days=1)
+
+    def criar_orcamento(self):
+        return Orcamento.objects.create(
+            nome='Ana', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='casamento',
+            num_convidados=80, local_evento='interno', pacote_selecionado='basico',
+        )
+
+    def criar_agendamento(self):
+        return Agendamento.objects.create(
+            nome='Bia', email='bia@example.com', telefone='(11) 91234-5678', data=self.dia, hora=time(10, 0),
+        )
+
+    @mock.patch('app.notificacoes.fila.enfileirar')
+    def test_limite_de_itens_dispara_um_resumo_so(self, enfileirar):
+        with self.captureOnCommitCallbacks(execute=True):
+            orcamento = self.criar_orcamento()
+        enfileirar.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            agendamento = self.criar_agendamento()
+        enfileirar.assert_called_once_with(notificacoes.despachar_resumo)
+
+        self.assertEqual(notificacoes.despachar_resumo(), {'itens': 2, 'canais': 2, 'falhas': 0})
+        esperado = [('orcamento', orcamento.pk), ('agendamento', agendamento.pk)]
+        self.assertEqual(notificacoes.TransporteFalso.enviados, [esperado, esperado])
+        self.assertFalse(NotificacaoStaff.objects.filter(enviada_em__isnull=True).exists())
+        self.assertEqual(notificacoes.despachar_resumo()['itens'], 0)
+
+    def test_intervalo_do_item_mais_antigo(self):
+        self.criar_agendamento()
+        agora = timezone.now()
+        self.assertEqual(notificacoes.despachar_resumo(agora=agora)['itens'], 0)
+        self.assertEqual(notificacoes.despachar_resumo(agora=agora + timedelta(minutes=16))['itens'], 1)
+
+    def test_falha_em_todos_os_canais_devolve_os_itens(self):
+        self.criar_agendamento()
+        with mock.patch.object(notificacoes.TransporteFalso, 'enviar', side_effect=RuntimeError('fora do ar')):
+            resultado = notificacoes.despachar_resumo(forcar=True)
+        self.assertEqual(resultado, {'itens': 0, 'canais': 0, 'falhas': 2})
+        self.assertTrue(NotificacaoStaff.objects.filter(enviada_em__isnull=True).exists())
+        self.assertEqual(notificacoes.despachar_resumo(forcar=True)['itens'], 1)
+
+    @override_settings(NOTIFICACOES_STAFF={'CANAIS': ['email'], 'URL_SITE': 'https://sabina.example.com/'})
+    def test_email_consolidado_para_o_staff(self):
+        get_user_model().objects.create_user('equipe', 'equipe@example.com', 'senha', is_staff=True)
+        get_user_model().objects.create_user('cliente', 'cliente@example.com', 'senha')
+        orcamento = self.criar_orcamento()
+        self.criar_agendamento()
+        self.criar_agendamento()
+        cache.clear()
+
+        self.assertEqual(notificacoes.despachar_resumo(forcar=True)['itens'], 3)
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.to, ['equipe@example.com'])
+        self.assertIn('1 novo orçamento e 2 novos agendamentos', email.subject)
+        html = email.alternatives[0][0]
+        self.assertIn(f'https://sabina.example.com/orcamentos/{orcamento.pk}/', html)
+        self.assertIn('Bia: visita em', html)
+
+    @override_settings(NOTIFICACOES_STAFF={'CANAIS': ['email']})
+    def test_sem_email_de_staff_os_itens_ficam_pendentes(self):
+        get_user_model().objects.create_user('equipe', '', 'senha', is_staff=True)
+        self.criar_agendamento()
+
+        self.assertEqual(notificacoes.despachar_resumo(forcar=True), {'itens': 0, 'canais': 0, 'falhas': 1})
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(NotificacaoStaff.objects.filter(enviada_em__isnull=True).exists())
+
+    @override_settings(NOTIFICACOES_STAFF={'CANAIS': ['sms', 'whatsapp'], 'TELEFONES': []})
+    def test_sem_telefones_os_itens_ficam_pendentes(self):
+        self.criar_agendamento()
+        cliente = mock.Mock()
+        with mock.patch.dict('sys.modules', {'twilio': mock.Mock(), 'twilio.rest': mock.Mock(Client=cliente)}):
+            resultado = notificacoes.despachar_resumo(forcar=True)
+        self.assertEqual(resultado, {'itens': 0, 'canais': 0, 'falhas': 2})
+        cliente.return_value.messages.create.assert_not_called()
+        self.assertTrue(NotificacaoStaff.objects.filter(enviada_em__isnull=True).exists())
+
+
+# --- Limite de envio de e-mail ---
+@override_settings(LIMITE_EMAIL={
+    'PROVEDOR': {'capacidade': 3, 'por_segundo': 1.0},
+    'DESTINATARIO': {'capacidade': 2, 'por_segundo': 0.1},
+})
+class LimitadorEmailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_balde_por_destinatario_e_provedor(self):
+        agora = 1000.0
+        regras_ana, regras_bia = limitador.regras_email('ana@example.com'), limitador.regras_email('BIA@example.com ')
+        self.assertEqual(limitador.consumir(regras_ana, agora), 0)
+        self.assertEqual(limitador.consumir(regras_ana, agora), 0)
+        # Ana esgotou o próprio balde: o próximo token sai em 10s
+        self.assertAlmostEqual(limitador.consumir(regras_ana, agora), 10.0)
+        # Bia ainda pode, até o balde do provedor (3) acabar
+        self.assertEqual(limitador.consumir(regras_bia, agora), 0)
+        self.assertAlmostEqual(limitador.consumir(regras_bia, agora), 1.0)
+        # Tokens voltam com o tempo
+        self.assertEqual(limitador.consumir(regras_bia, agora + 1), 0)
+
+    def test_fila_adia_em_vez_de_falhar(self):
+        executadas = []
+        fila = fila_email.FilaEmail()
+        tarefas = [
+            fila_email.Tarefa(0, i, executadas.append, (i,), 'ana@example.com') for i in range(3)
+        ]
+        resultados = [fila.processar(tarefa) for tarefa in tarefas]
+        self.assertEqual(resultados, [True, True, False])
+        self.assertEqual(executadas, [0, 1])
+        self.assertEqual(fila.pendentes(), 1)
+        self.assertEqual(tarefas[2].adiamentos, 1)
+
+
+@override_settings(PROTECAO={'LIMITE_IP': (3, 600), 'LIMITE_EMAIL': (2, 3600)})
+class ProtecaoFormulariosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metricas.registro.limpar()
+        self.url = reverse('simulador_orcamento')
+
+    def _dados(self, **extras):
+        # Carimbo emitido 10s atrás: passa do tempo mínimo de preenchimento
+        with mock.patch('app.protecao.time.time', return_value=timezone.now().timestamp() - 10):
+            carimbo = protecao.gerar_carimbo()
+        dados = {
+            'nome': 'Cliente', 'telefone': '11999990000', 'email': 'cliente@example.com',
+            'tipoEvento': 'casamento', 'numeroConvidados': '50', 'pacoteSelecionado': 'basico',
+            protecao.CAMPO_CARIMBO: carimbo,
+        }
+        dados.update(extras)
+        return dados
+
+    def test_formulario_traz_campos_de_protecao(self):
+        resposta = self.client.get(self.url)
+        self.assertContains(resposta, f'name="{protecao.CAMPO_HONEYPOT}"')
+        self.assertContains(resposta, f'name="{protecao.CAMPO_CARIMBO}"')
+
+    def test_honeypot_e_carimbo(self):
+        configuracao = protecao.obter_configuracao()
+        carimbo = protecao.gerar_carimbo()
+        agora = timezone.now().timestamp()
+        self.assertEqual(protecao.verificar_carimbo(carimbo, configuracao, agora), 'rapido_demais')
+        self.assertIsNone(protecao.verificar_carimbo(carimbo, configuracao, agora + 5))
+        self.assertEqual(protecao.verificar_carimbo('adulterado', configuracao, agora), 'carimbo_invalido')
+
+        resposta = self.client.post(self.url, self._dados(**{protecao.CAMPO_HONEYPOT: 'http://spam'}))
+        self.assertRedirects(resposta, self.url)
+        resposta = self.client.post(self.url, self._dados(**{protecao.CAMPO_CARIMBO: carimbo}))
+        self.assertRedirects(resposta, self.url)
+        self.assertFalse(Orcamento.objects.exists())
+
+        texto = metricas.registro.exportar_prometheus()
+        self.assertIn('app_requisicoes_bloqueadas_total{view="simulador_orcamento",motivo="honeypot"} 1', texto)
+        self.assertIn('app_requisicoes_bloqueadas_total{view="simulador_orcamento",motivo="rapido_demais"} 1', texto)
+
+    def test_honeypot_redireciona_como_o_envio_aceito(self):
+        # O agendamento aceito vai para o início; o robô barrado no honeypot também
+        resposta = self.client.post(reverse('cria_agendamento'), self._dados(**{protecao.CAMPO_HONEYPOT: 'http://spam'}))
+        self.assertRedirects(resposta, reverse('inicio'), fetch_redirect_response=False)
+        self.assertFalse(Agendamento.objects.exists())
+        # Quem pode ser uma pessoa (envio rápido demais) volta ao formulário com o aviso
+        resposta = self.client.post(reverse('cria_agendamento'), self._dados(**{protecao.CAMPO_CARIMBO: protecao.gerar_carimbo()}))
+        self.assertRedirects(resposta, reverse('cria_agendamento'), fetch_redirect_response=False)
+
+    def test_limites_por_email_e_ip(self):
+        for _ in range(2):
+            self.assertRedirects(self.client.post(self.url, self._dados()), self.url)
+        resposta = self.client.post(self.url, self._dados())
+        self.assertEqual(resposta.status_code, 429)
+        self.assertTrue(int(resposta['Retry-After']) > 0)
+        self.assertEqual(Orcamento.objects.count(), 2)
+
+        # Outro e-mail, mesmo IP: o limite por IP (3) barra antes de ler o formulário
+        resposta = self.client.post(self.url, self._dados(email='outro@example.com'))
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(Orcamento.objects.count(), 2)
+        # GET nunca é limitado
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(PROTECAO={'LIMITE_IP': (3, 600), 'CONFIAR_X_FORWARDED_FOR': True, 'PROXIES_CONFIAVEIS': 1})
+    def test_x_forwarded_for_forjado_nao_escapa_do_limite_por_ip(self):
+        # O robô inventa um IP novo a cada envio; o proxy acrescenta o IP real à direita
+        for numero in range(3):
+            resposta = self.client.post(
+                self.url, self._dados(email=f'robo{numero}@example.com'),
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{numero}, 203.0.113.7',
+            )
+            self.assertRedirects(resposta, self.url)
+        resposta = self.client.post(
+            self.url, self._dados(email='robo9@example.com'), HTTP_X_FORWARDED_FOR='10.0.0.9, 203.0.113.7',
+        )
+        self.assertEqual(resposta.status_code, 429)
+
+        configuracao = {'CONFIAR_X_FORWARDED_FOR': True, 'PROXIES_CONFIAVEIS': 2}
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.7, 10.1.1.1')
+        self.assertEqual(protecao.ip_cliente(request, configuracao), '203.0.113.7')
+
+
+# --- Sessões e mensagens ---
+@override_settings(PROTECAO={'ATIVA': False})
+class SessoesMensagensTests(TestCase):
+    def test_visitante_anonimo_nao_consulta_o_banco(self):
+        url = reverse('simulador_orcamento')
+        resposta = self.client.post(url, {
+            'nome': 'Cliente', 'telefone': '11999990000', 'email': 'cliente@example.com',
+            'tipoEvento': 'casamento', 'numeroConvidados': '50', 'pacoteSelecionado': 'basico',
+        })
+        self.assertRedirects(resposta, url, fetch_redirect_response=False)
+
+        # A mensagem de sucesso vem no cookie: nem sessão nem outra consulta
+        with self.assertNumQueries(0):
+            resposta = self.client.get(url)
+        self.assertContains(resposta, 'recebido com sucesso')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('sobre'))
+        self.assertFalse(Session.objects.exists())
+
+    def test_transbordo_sem_sessao_fica_no_cookie(self):
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda request: None).process_request(request)
+        armazenamento = ArmazenamentoMensagens(request)
+        for i in range(10):
+            armazenamento.add(messages.ERROR, f'{i} ' + 'x' * 400)
+        resposta = HttpResponse()
+        armazenamento.update(resposta)
+
+        self.assertTrue(request.session.is_empty())
+        self.assertFalse(Session.objects.exists())
+        self.assertIn('messages', resposta.cookies)
+
+    @override_settings(SESSION_ENGINE=SESSAO_EM_CACHE)
+    def test_sessao_do_staff_vem_do_cache(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(reverse('lista_agendamentos')).status_code, 200)
+        self.assertFalse(any(Session._meta.db_table in consulta['sql'] for consulta in consultas))
+
+
+# --- Compressão e GET condicional ---
+class CompressaoTests(TestCase):
+    def test_pagina_publica_gzip_com_etag_fraca(self):
+        original = self.client.get(reverse('sobre'))
+        resposta = self.client.get(reverse('sobre'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resposta['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(resposta.content), original.content)
+        self.assertLess(len(resposta.content), len(original.content))
+        self.assertIn('Accept-Encoding', resposta['Vary'])
+        self.assertTrue(resposta['ETag'].startswith('W/"'))
+        self.assertEqual(resposta['ETag'], original['ETag'])
+
+    def test_pagina_inalterada_devolve_304(self):
+        etag = self.client.get(reverse('sobre'))['ETag']
+        resposta = self.client.get(reverse('sobre'), HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual(resposta.content, b'')
+
+    def test_pagina_do_staff_nao_ganha_etag(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+        resposta = self.client.get(reverse('lista_orcamentos'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(resposta.has_header('ETag'))
+        self.assertEqual(resposta['Content-Encoding'], 'gzip')
+
+    def test_brotli_quando_disponivel(self):
+        brotli_falso = mock.Mock(compress=lambda dados, quality: b'br')
+        with mock.patch.object(compressao, 'brotli', brotli_falso):
+            self.assertEqual(compressao.escolher_codificacao('gzip, br'), 'br')
+            self.assertEqual(compressao.escolher_codificacao('gzip, br;q=0'), 'gzip')
+            resposta = self.client.get(reverse('sobre'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(resposta['Content-Encoding'], 'br')
+        self.assertEqual(resposta.content, b'br')
+        with mock.patch.object(compressao, 'brotli', None):
+            self.assertEqual(compressao.escolher_codificacao('br'), None)
+            self.assertEqual(compressao.escolher_codificacao('*'), 'gzip')
+
+    def test_ignora_streaming_e_respostas_curtas(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        curta = compressao.processar(request, HttpResponse('ok'))
+        self.assertFalse(curta.has_header('Content-Encoding'))
+        streaming = compressao.processar(request, StreamingHttpResponse(iter(['x' * 5000])))
+        self.assertFalse(streaming.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(streaming.streaming_content), b'x' * 5000)
+
+
+# Sem a proteção (a carga é um robô) e sem as tarefas em segundo plano disputando o banco
+@override_settings(PROTECAO={'ATIVA': False}, NOTIFICACOES_STAFF={'ATIVO': False})
+@mock.patch('app.fila_email.enfileirar')
+class CargaFunilTests(LiveServerTestCase):
+    def carga(self, duracao=0.5):
+        with tempfile.TemporaryDirectory() as temporario:
+            saida = Path(temporario) / 'relatorio.json'
+            call_command(
+                'carga_funil', url=self.live_server_url, concorrencia='1', duracao=duracao, saida=str(saida),
+                stdout=io.StringIO(),
+            )
+            return json.loads(saida.read_text())[self.live_server_url]['1']
+
+    def test_funil_completo_sem_erros(self, _enfileirar):
+        resultado = self.carga()
+        self.assertGreater(resultado['funis_por_s'], 0)
+        self.assertEqual(resultado['taxa_erros'], 0.0)
+        self.assertEqual(Agendamento.objects.count(), resultado['etapas']['agendamento_post']['n'])
+
+    def test_formulario_recusado_conta_como_erro(self, _enfileirar):
+        with mock.patch('app.views.AgendamentoForm.is_valid', return_value=False):
+            resultado = self.carga(duracao=0.2)
+        etapa = resultado['etapas']['agendamento_post']
+        self.assertGreater(etapa['n'], 0)
+        self.assertEqual(etapa['detalhes_erros'], {'formulario_recusado': etapa['n']})
+        self.assertEqual(resultado['funis_por_s'], 0)
+
+
+# unittest.TestCase: o TestCase do Django barra conexões de aliases fora de DATABASES, e o
+# comando registra os seus (arquivos SQLite temporários) durante a execução
+class BenchmarkBancoTests(unittest.TestCase):
+    def test_compara_variantes_do_sqlite_em_arquivos_temporarios(self):
+        saida = io.StringIO()
+        call_command('benchmark_banco', duracao=0.1, threads=2, stdout=saida)
+        texto = saida.getvalue()
+        self.assertIn('sqlite_padrao:', texto)
+        self.assertIn('sqlite_ajustado:', texto)
+        self.assertNotIn('sqlite_padrao', connections.settings)
+
+    def test_banco_configurado_exige_confirmacao(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch('app.management.commands.benchmark_banco.executar_carga') as executar_carga:
+            with self.assertRaisesRegex(CommandError, '--confirmar'):
+                call_command('benchmark_banco', duracao=0.1, stdout=io.StringIO())
+        executar_carga.assert_not_called()
+
+
+class PerfilInicializacaoTests(TestCase):
+    def test_views_nao_importam_modulos_sob_demanda(self):
+        from .management.commands.perfil_inicializacao import medir_importacoes
+
+        total, por_modulo, importacoes = medir_importacoes(['app.views'], 'sabina_decor.settings')
+        self.assertGreater(total, 0)
+        self.assertIn('app.views', por_modulo)
+        importados = {nome for nome, _, _, _ in importacoes}
+        for modulo in (
+            'app.api', 'app.diagnostico', 'rest_framework.serializers', 'app.alteracoes', 'app.calendario',
+            'app.exportacao',
+        ):
+            self.assertNotIn(modulo, importados)
+
+    def test_gunicorn_carrega_o_urlconf_no_preload(self):
+        ganchos = runpy.run_path(str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'))
+        for preload in (False, True):
+            servidor = mock.Mock(cfg=mock.Mock(preload_app=preload))
+            with mock.patch('django.urls.get_resolver') as get_resolver:
+                ganchos['when_ready'](servidor)
+            self.assertEqual(get_resolver.called, preload)
+
+
+class BancoSQLiteTests(TestCase):
+    def test_pragmas_aplicados_na_conexao(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+# --- Réplica de leitura ---
+class RoteamentoReplicaTests(TestCase):
+    """Um segundo arquivo SQLite faz o papel da réplica; como nada é replicado para ele,
+    ler da réplica aparece como "não vê o que o primário acabou de gravar"."""
+
+    databases = '__all__'  # inclui o alias 'replica', registrado em setUpClass
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temporario = tempfile.TemporaryDirectory()
+        configuracao = deepcopy(connections['default'].settings_dict)
+        configuracao['NAME'] = str(Path(cls.temporario.name) / 'replica.sqlite3')
+        connections.settings['replica'] = configuracao
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.temporario.cleanup()
+
+    def setUp(self):
+        self.dia = timezone.localdate() + timedelta(days=7)
+        if self.dia.weekday() == 6:
+            self.dia += timedelta(days=1)
+        self.agendamento = Agendamento.objects.create(
+            nome='Cliente', email='c@example.com', telefone='(11) 98765-4321', data=self.dia, hora=time(10, 0),
+        )
+        self.url = reverse('api_verificar_disponibilidade') + f'?data={self.dia:%Y-%m-%d}'
+
+    def test_leitura_publica_vai_para_a_replica(self):
+        self.assertEqual(self.client.get(self.url).json(), {'ocupados': []})
+        self.assertFalse(Agendamento.objects.using('replica').exists())
+
+    @mock.patch('app.fila_email.enfileirar')
+    def test_quem_escreveu_le_do_primario(self, enfileirar):
+        staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(staff)
+        resposta = self.client.get(reverse('aceitar_agendamento', args=[self.agendamento.pk]))
+        self.assertIn('fixar_primario', resposta.cookies)
+
+        self.assertEqual(self.client.get(self.url).json(), {'ocupados': ['10:00']})
+        # Outro visitante, sem escrita recente, continua na réplica
+        self.assertEqual(self.client_class().get(self.url).json(), {'ocupados': []})
+
+    def test_escrita_no_meio_da_requisicao_le_do_primario(self):
+        with roteamento.requisicao() as estado:
+            estado.replica = 'replica'
+            self.assertFalse(Agendamento.objects.filter(pk=self.agendamento.pk).exists())
+            Agendamento.objects.filter(pk=self.agendamento.pk).update(status='aceito')
+            self.assertTrue(Agendamento.objects.filter(pk=self.agendamento.pk, status='aceito').exists())
+            self.assertTrue(estado.escreveu)
+
+
+# --- Arquivamento de histórico ---
+@override_settings(DIAGNOSTICO=DIAGNOSTICO_FALSO)
+class ArquivamentoTests(TestCase):
+    def setUp(self):
+        hoje = timezone.localdate()
+        self.antigo = timezone.now() - timedelta(days=800)
+        self.orcamentos = Orcamento.objects.bulk_create([
+            Orcamento(
+                nome=f'Cliente {i}', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='casamento',
+                num_convidados=10, local_evento='interno', pacote_selecionado='basico', data_criacao=self.antigo,
+                preco_final=Decimal('900.00') if i == 0 else None,
+            )
+            for i in range(3)
+        ])
+        self.recente = Orcamento.objects.create(
+            nome='Recente', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='infantil',
+            num_convidados=10, local_evento='interno', pacote_selecionado='basico',
+        )
+        # Agendamentos antigos entram por bulk_create (save() recusa datas passadas)
+        self.agendamentos = Agendamento.objects.bulk_create([
+            Agendamento(
+                nome='Ana', email='ana@example.com', telefone='(11) 98765-4321', data=hoje - timedelta(days=400 + i),
+                hora=time(10, 0), status='aceito',
+            )
+            for i in range(4)
+        ])
+        # Visita futura ligada a um orçamento antigo: o orçamento não pode sair da tabela quente
+        dia = hoje + timedelta(days=7)
+        if dia.weekday() == 6:
+            dia += timedelta(days=1)
+        self.futuro = Agendamento.objects.create(
+            nome='Ana', email='ana@example.com', telefone='(11) 98765-4321', data=dia, hora=time(10, 0),
+            orcamento_associado=self.orcamentos[2],
+        )
+
+    def test_move_o_que_passou_do_horizonte(self):
+        resumos.atualizar_resumos(completo=True)
+        campos = ('dia', 'tipo_evento', 'quantidade', 'quantidade_com_preco', 'total_estimado', 'total_preco_final')
+        orcamentos_antes = list(ResumoOrcamentosDia.objects.order_by('dia', 'tipo_evento').values_list(*campos))
+        campos_agendamentos = ('dia', 'total', 'pendentes', 'aceitos', 'recusados')
+        agendamentos_antes = list(ResumoAgendamentosDia.objects.order_by('dia').values_list(*campos_agendamentos))
+
+        resultado = arquivamento.arquivar(pausa=0)
+
+        self.assertEqual(resultado, {'agendamentos': 4, 'orcamentos': 2})
+        self.assertEqual(set(Agendamento.objects.values_list('pk', flat=True)), {self.futuro.pk})
+        self.assertEqual(
+            set(Orcamento.objects.values_list('pk', flat=True)), {self.orcamentos[2].pk, self.recente.pk},
+        )
+        self.assertEqual(AgendamentoArquivado.objects.count(), 4)
+        self.assertEqual(OrcamentoArquivado.objects.get(pk=self.orcamentos[0].pk).preco_final, Decimal('900.00'))
+        self.assertEqual(RegistroExclusao.objects.filter(modelo='agendamento').count(), 4)
+
+        # Os resumos reconstruídos do zero continuam contando o que foi arquivado
+        resumos.atualizar_resumos(completo=True)
+        self.assertEqual(
+            list(ResumoOrcamentosDia.objects.order_by('dia', 'tipo_evento').values_list(*campos)), orcamentos_antes,
+        )
+        self.assertEqual(
+            list(ResumoAgendamentosDia.objects.order_by('dia').values_list(*campos_agendamentos)), agendamentos_antes,
+        )
+
+        # Rodar de novo não encontra nada
+        self.assertEqual(arquivamento.arquivar(pausa=0), {'agendamentos': 0, 'orcamentos': 0})
+
+    def test_incremental_por_lotes(self):
+        self.assertEqual(arquivamento.arquivar(lote=3, max_lotes=1, pausa=0)['agendamentos'], 3)
+        self.assertEqual(Agendamento.objects.count(), 2)
+        self.assertEqual(arquivamento.arquivar(lote=3, max_lotes=1, pausa=0)['agendamentos'], 1)
+
+    def test_leitura_unificada(self):
+        arquivamento.arquivar(pausa=0)
+
+        orcamento = arquivamento.obter(Orcamento, self.orcamentos[0].pk)
+        self.assertTrue(orcamento.arquivado)
+        self.assertEqual(orcamento.nome, 'Cliente 0')
+        self.assertFalse(arquivamento.obter(Orcamento, self.recente.pk).arquivado)
+        with self.assertRaises(Orcamento.DoesNotExist):
+            arquivamento.obter(Orcamento, 999999)
+
+        historico = arquivamento.historico_cliente('ANA@example.com')
+        self.assertEqual(len(historico['agendamentos']), 5)
+        self.assertEqual(historico['agendamentos'][0].pk, self.futuro.pk)
+        self.assertEqual(len(historico['orcamentos']), 4)
+
+        staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.client.force_login(staff)
+        resposta = self.client.get(reverse('detalhes_orcamento', args=[self.orcamentos[0].pk]))
+        self.assertContains(resposta, 'Arquivado')
+        resposta = self.client.get(reverse('api-historico'), {'email': 'ana@example.com'})
+        self.assertEqual(sum(item['arquivado'] for item in resposta.json()['agendamentos']), 4)
+        self.assertEqual(self.client.get(reverse('api-historico')).status_code, 400)
+
+
+# --- Agenda (.ics) ---
+@override_settings(DIAGNOSTICO=DIAGNOSTICO_FALSO)
+class AgendaIcsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        self.url = agenda.url_feed(self.staff)
+        self.dia = timezone.localdate() + timedelta(days=7)
+        if self.dia.weekday() == 6:
+            self.dia += timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aceito = Agendamento.objects.create(
+                nome='Ana; Maria', email='ana@example.com', telefone='(11) 98765-4321', data=self.dia,
+                hora=time(10, 0), status='aceito', mensagem='Levar catálogo',
+            )
+            Agendamento.objects.create(
+                nome='Pendente', email='p@example.com', telefone='(11) 98765-4321', data=self.dia, hora=time(15, 0),
+            )
+
+    def test_feed_so_com_visitas_aceitas(self):
+        resposta = self.client.get(self.url)
+        self.assertEqual(resposta['Content-Type'], 'text/calendar; charset=utf-8')
+        conteudo = b''.join(resposta.streaming_content).decode()
+        self.assertEqual(conteudo.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f'UID:agendamento-{self.aceito.pk}@testserver', conteudo)
+        self.assertIn('SUMMARY:Visita: Ana\\; Maria', conteudo)
+        self.assertNotIn('Pendente', conteudo)
+        self.assertTrue(all(len(linha.encode()) <= 75 for linha in conteudo.split('\r\n')))
+        self.assertIn('private', resposta['Cache-Control'])
+
+    def test_token_invalido_ou_senha_trocada(self):
+        outro = reverse('agenda_ics', kwargs={'usuario_id': self.staff.pk, 'token': '0' * 32})
+        self.assertEqual(self.client.get(outro).status_code, 404)
+        self.staff.set_password('nova-senha')
+        self.staff.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @mock.patch('app.fila_email.enfileirar')
+    def test_304_sem_ler_agendamentos(self, _enfileirar):
+        resposta = self.client.get(self.url)
+        etag, ultima_alteracao = resposta['ETag'], resposta['Last-Modified']
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+        self.assertFalse(any(Agendamento._meta.db_table in consulta['sql'] for consulta in consultas))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=ultima_alteracao).status_code, 304)
+
+        # Sem o marcador no cache (reinício) a versão vem do banco e continua a mesma
+        cache.delete(agenda.CHAVE_VERSAO)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            processar_agendamentos_em_massa([self.aceito.pk], 'recusado', self.staff)
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        self.assertNotIn('BEGIN:VEVENT', b''.join(resposta.streaming_content).decode())
+
+
+# --- PDF do orçamento ---
+def usar_media_temporaria(alvo):
+    """MEDIA_ROOT num diretório temporário durante o teste (ou a classe, se `alvo` for a classe)"""
+    media = tempfile.TemporaryDirectory()
+    if isinstance(alvo, type):
+        alvo.addClassCleanup(media.cleanup)
+        alvo.enterClassContext(override_settings(MEDIA_ROOT=media.name))
+    else:
+        alvo.addCleanup(media.cleanup)
+        alvo.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+
+@override_settings(DIAGNOSTICO=DIAGNOSTICO_FALSO)
+class DocumentosOrcamentoTests(TestCase):
+    def setUp(self):
+        # Um storage por teste: o SQLite reaproveita o id do orçamento depois do rollback
+        usar_media_temporaria(self)
+        self.orcamento = Orcamento.objects.create(
+            nome='Ana', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='casamento',
+            num_convidados=80, local_evento='externo', pacote_selecionado='basico',
+            servicos_adicionais='["dj"]', preco_final=Decimal('4321.00'),
+        )
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+
+    def test_renderiza_uma_vez_por_versao(self):
+        with mock.patch('app.documentos.renderizar', wraps=documentos.renderizar) as renderizar:
+            primeiro = documentos.obter_pdf(self.orcamento)
+            self.assertEqual(documentos.obter_pdf(Orcamento.objects.get(pk=self.orcamento.pk)), primeiro)
+            self.assertEqual(renderizar.call_count, 1)
+
+            self.orcamento.nome = 'Ana Maria'  # fora da versão
+            self.assertEqual(documentos.caminho(self.orcamento), primeiro)
+            self.orcamento.preco_final = Decimal('5000.00')
+            novo = documentos.obter_pdf(self.orcamento)
+            self.assertEqual(renderizar.call_count, 2)
+
+        self.assertNotEqual(novo, primeiro)
+        self.assertFalse(default_storage.exists(primeiro))
+        with default_storage.open(novo) as arquivo:
+            conteudo = arquivo.read()
+        self.assertTrue(conteudo.startswith(b'%PDF-1.4'))
+        self.assertTrue(conteudo.endswith(b'%%EOF\n'))
+        self.assertIn('(Preço final: R$ 5.000,00)'.encode('cp1252'), conteudo)
+
+    def test_download_do_storage_com_etag(self):
+        url = reverse('orcamento_pdf', args=[self.orcamento.pk])
+        with mock.patch('app.documentos.renderizar', wraps=documentos.renderizar) as renderizar:
+            for _ in range(2):
+                resposta = self.client.get(url)
+                self.assertEqual(resposta['Content-Type'], 'application/pdf')
+                self.assertTrue(b''.join(resposta.streaming_content).startswith(b'%PDF'))
+                resposta.close()
+            self.assertEqual(renderizar.call_count, 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 304)
+
+        self.orcamento.preco_final = None
+        self.orcamento.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pdf_gerado_ao_salvar_e_anexado_ao_email(self):
+        with mock.patch('app.documentos.fila.enfileirar') as enfileirar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.orcamento.save()
+        enfileirar.assert_called_once()
+        tarefa, args = enfileirar.call_args.args[0], enfileirar.call_args.kwargs['args']
+        tarefa(*args)
+        self.assertTrue(default_storage.exists(documentos.caminho(self.orcamento)))
+
+        with mock.patch('app.documentos.renderizar') as renderizar:
+            task_enviar_email_orcamento(self.orcamento.pk, 4321.0)
+        renderizar.assert_not_called()
+        nome, conteudo, tipo = mail.outbox[0].attachments[0]
+        self.assertEqual((nome, tipo), (f'orcamento-{self.orcamento.pk}.pdf', 'application/pdf'))
+        self.assertTrue(conteudo.startswith(b'%PDF'))
+
+
+# --- Calendário de agendamentos ---
+class CalendarioTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', password='senha', is_staff=True))
+        self.dia = date(2030, 5, 14)
+        self.fechado = Orcamento.objects.create(
+            nome='Ana', telefone='(11) 98765-4321', email='ana@example.com', tipo_evento='casamento',
+            num_convidados=10, local_evento='interno', pacote_selecionado='basico', preco_final=Decimal('900.00'),
+        )
+
+    def _agendamentos(self, quantidade, dia, **campos):
+        Agendamento.objects.bulk_create([
+            Agendamento(nome=f'Cliente {i}', email='c@example.com', telefone='(11) 98765-4321', data=dia,
+                        hora=time(9 + i % 9, 0), **campos)
+            for i in range(quantidade)
+        ])
+
+    def _mes(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('calendario_agendamentos'), {'mes': '2030-05'})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta, len(consultas)
+
+    def test_mes_com_numero_constante_de_consultas(self):
+        self._agendamentos(2, self.dia, status='aceito', orcamento_associado=self.fechado)
+        self._agendamentos(1, self.dia, status='pendente')
+        resposta, poucas = self._mes()
+
+        celula = next(d for semana in resposta.context['semanas'] for d in semana if d['data'] == self.dia)
+        self.assertEqual((celula['total'], celula['aceito'], celula['pendente']), (3, 2, 1))
+        self.assertEqual(celula['orcamentos_fechados'], 2)
+        self.assertEqual(resposta.context['semanas'][0][0]['data'].weekday(), 6)  # começa no domingo
+
+        for dia in range(1, 29):
+            self._agendamentos(5, date(2030, 5, dia), status='recusado')
+        resposta, muitas = self._mes()
+        self.assertEqual(muitas, poucas)
+        self.assertEqual(resposta.context['totais']['total'], 3 + 28 * 5)
+
+    def test_detalhe_do_dia_sob_demanda(self):
+        self._agendamentos(2, self.dia, status='aceito', orcamento_associado=self.fechado)
+        resposta = self.client.get(reverse('calendario_dia', args=['2030-05-14']))
+        agendamentos = resposta.json()['agendamentos']
+        self.assertEqual([a['hora'] for a in agendamentos], ['09:00', '10:00'])
+        self.assertEqual(agendamentos[0]['preco_final'], '900.00')
+        self.assertEqual(self.client.get(reverse('calendario_dia', args=['14-05-2030'])).status_code, 400)
+
+        # Mês inválido cai no mês atual
+        resposta = self.client.get(reverse('calendario_agendamentos'), {'mes': 'abc'})
+        self.assertEqual(resposta.context['inicio'], timezone.localdate().replace(day=1))
+
+
+# --- Service worker do site público ---
+class ServiceWorkerTests(TestCase):
+    def setUp(self):
+        usar_media_temporaria(self)
+        cache.clear()
+
+    def criar_foto(self, titulo='Mesa posta'):
+        with self.captureOnCommitCallbacks(execute=True):
+            foto = FotoGaleria(titulo=titulo)
+            foto.imagem.save('mesa.jpg', ContentFile(b'jpg'))
+        return foto
+
+    def test_sw_embute_manifesto_e_responde_304(self):
+        foto = self.criar_foto()
+        resposta = self.client.get(reverse('service_worker'))
+        self.assertEqual(resposta['Content-Type'], 'application/javascript; charset=utf-8')
+        self.assertEqual(resposta['Service-Worker-Allowed'], '/')
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        corpo = resposta.content.decode()
+        self.assertIn(foto.imagem.url, corpo)
+        self.assertIn(json.dumps(reverse('sobre')), corpo)
+
+        with self.assertNumQueries(0):
+            repetida = self.client.get(reverse('service_worker'), HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_versao_acompanha_a_galeria(self):
+        versao = offline.manifesto()['versao']
+        foto = self.criar_foto()
+        manifesto = offline.manifesto()
+        self.assertNotEqual(manifesto['versao'], versao)
+        self.assertEqual(manifesto['fotos'], [foto.imagem.url])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            foto.ativo = False
+            foto.save()
+        self.assertEqual(offline.manifesto()['fotos'], [])
+
+    def test_so_estaticos_com_hash_do_manifesto(self):
+        storage = mock.Mock(hashed_files={
+            'logo.png': 'logo.1a2b3c.png', 'admin/css/base.css': 'admin/css/base.4d5e6f.css',
+        })
+        with mock.patch.object(offline, 'staticfiles_storage', storage):
+            self.assertEqual(offline.manifesto()['estaticos'], ['/static/logo.1a2b3c.png'])
+        self.assertEqual(offline.estaticos(offline.obter_configuracao()), [])
+
+    def test_manifesto_do_storage_de_producao_lista_estaticos_com_hash(self):
+        estaticos = tempfile.TemporaryDirectory()
+        self.addCleanup(estaticos.cleanup)
+        producao = {**settings.STORAGES, 'staticfiles': {
+            'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+        }}
+        with override_settings(STORAGES=producao, STATIC_ROOT=estaticos.name):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            urls = offline.manifesto()['estaticos']
+        self.assertTrue(any(re.fullmatch(r'/static/logo_oficial\.[0-9a-f]{12}\.png', url) for url in urls))
+        self.assertFalse(any(url.startswith('/static/admin/') for url in urls))
+
+    def test_paginas_publicas_registram_e_login_limpa(self):
+        self.assertContains(self.client.get(reverse('sobre')), "serviceWorker.register('/sw.js')")
+        get_user_model().objects.create_user('staff', password='senha', is_staff=True)
+        resposta = self.client.post(reverse('login'), {'username': 'staff', 'password': 'senha'})
+        self.assertEqual(resposta['Clear-Site-Data'], '"storage"')
+        self.assertEqual(self.client.get(reverse('custom_logout'))['Clear-Site-Data'], '"storage"')
+
+
+# --- Benchmark e regressão de consultas por rota ---
+# Volume e repetições podem ser ajustados por variável de ambiente para rodadas mais pesadas.
+VOLUME_BENCHMARK = int(os.environ.get('BENCHMARK_VOLUME', 2000))
+REPETICOES_BENCHMARK = int(os.environ.get('BENCHMARK_REPETICOES', 5))
+TOLERANCIA_LATENCIA = float(os.environ.get('BENCHMARK_TOLERANCIA', 3.0))
+# Folga absoluta: rotas de 1-2 ms oscilam mais que 3x com qualquer ruído da máquina
+FOLGA_LATENCIA_MS = float(os.environ.get('BENCHMARK_FOLGA_MS', 50.0))
+ARQUIVO_BASELINE = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+# Latência depende da máquina: só é comparada com o baseline quando pedida (rodada dedicada)
+COMPARAR_LATENCIA = bool(os.environ.get('BENCHMARK_LATENCIA'))
+
+# Teto absoluto de consultas por rota (nome da URL). Toda rota de app/urls.py precisa estar aqui.
+# Medido como em produção com Redis: a sessão do staff vem do cache (cached_db) e não entra na conta.
+ORCAMENTO_CONSULTAS = {
+    'home': 1,
+    'inicio': 1,
+    'login': 1,
+    'custom_logout': 3,
+    'sobre': 1,
+    'service_worker': 1,  # fotos da galeria quando o manifesto falta no cache
+    'galeria_fotos': 3,
+    'simulador_orcamento': 1,
+    'cria_agendamento': 1,
+    'lista_agendamentos': 2,
+    'edita_agendamento': 2,
+    'deleta_agendamento': 2,
+    'aceitar_agendamento': 7,
+    'recusar_agendamento': 5,
+    'acao_em_massa_agendamentos': 6,
+    'exportar_agendamentos': 1,
+    'calendario_agendamentos': 2,  # usuário + uma agregação para o mês inteiro
+    'calendario_dia': 2,
+    'api_verificar_disponibilidade': 1,
+    'agenda_ics': 3,  # usuário do token + versão da agenda quando falta no cache
+    'lista_orcamentos': 3,
+    'painel_analitico': 3,
+    'exportar_orcamentos': 1,
+    'detalhes_orcamento': 2,
+    'orcamento_pdf': 2,
+    'editar_preco_final': 2,
+    'excluir_orcamento': 2,
+    'adicionar_foto': 2,
+    'excluir_foto': 2,
+    'gerenciar_galeria': 3,
+    'diagnostico_email': 1,
+    'testar_email': 1,
+    'metricas_prometheus': 1,
+    'api-root': 1,
+    'api-agendamento-list': 2,
+    'api-agendamento-detail': 2,
+    'api-orcamento-list': 2,
+    'api-orcamento-detail': 2,
+    'api-foto-list': 2,
+    'api-foto-detail': 2,
+    'api-alteracoes': 7,
+    'api-alteracoes-stream': 1,
+    'api-busca': 4,  # inclui a verificação da tabela FTS, feita uma vez por processo
+    'api-historico': 7,
+}
+
+# Método e dados das rotas que não são um GET simples
+REQUISICAO_ROTA = {
+    'api_verificar_disponibilidade': ('get', {'data': (timezone.localdate() + timedelta(days=7)).isoformat()}),
+    'acao_em_massa_agendamentos': ('post', {'acao': 'recusar', 'agendamentos': list(range(1, 51))}),
+    'api-busca': ('get', {'q': 'cliente 1'}),
+    'api-historico': ('get', {'email': 'cliente1@example.com'}),
+}
+
+
+def semear_dados(volume, semente=42):
+    """Cria agendamentos, orçamentos e fotos em volume realista via bulk_create"""
+    aleatorio = random.Random(semente)
+    hoje = timezone.localdate()
+    categorias = CategoriaFoto.objects.bulk_create(
+        [CategoriaFoto(nome=nome) for nome in ('Casamentos', 'Aniversários', 'Corporativo', 'Infantil')]
+    )
+    orcamentos = Orcamento.objects.bulk_create([
+        Orcamento(
+            nome=f'Cliente {i}',
+            telefone='(11) 98765-4321',
+            email=f'cliente{i}@example.com',
+            tipo_evento=aleatorio.choice(Orcamento.TIPO_EVENTO_CHOICES)[0],
+            num_convidados=aleatorio.randint(20, 300),
+            local_evento=aleatorio.choice(['interno', 'externo']),
+            pacote_selecionado=aleatorio.choice(list(CONSTANTES_PACOTES)),
+            servicos_adicionais=json.dumps(aleatorio.sample(list(CONSTANTES_SERVICOS), aleatorio.randint(0, 3))),
+            ideias='Decoração com flores e luzes',
+            data_criacao=timezone.now() - timedelta(days=aleatorio.randint(0, 720)),
+            preco_final=aleatorio.choice([None, Decimal('3500.00'), Decimal('7200.50')]),
+        )
+        for i in range(volume)
+    ], batch_size=500)
+    Agendamento.objects.bulk_create([
+        Agendamento(
+            nome=f'Cliente {i}',
+            email=f'cliente{i}@example.com',
+            telefone='(11) 98765-4321',
+            data=hoje + timedelta(days=aleatorio.randint(-365, 365)),
+            hora=time(aleatorio.randint(9, 17), aleatorio.choice([0, 30])),
+            mensagem='Gostaria de conhecer o espaço',
+            status=aleatorio.choice(['pendente', 'aceito', 'recusado']),
+            orcamento_associado=aleatorio.choice([None, aleatorio.choice(orcamentos)]),
+        )
+        for i in range(volume)
+    ], batch_size=500)
+    FotoGaleria.objects.bulk_create([
+        FotoGaleria(
+            titulo=f'Foto {i}',
+            descricao='Evento decorado',
+            imagem=f'galeria/image{i % 17 + 1}.jpg',
+            categoria=aleatorio.choice(categorias),
+            ativo=aleatorio.random() > 0.1,
+        )
+        for i in range(volume // 4)
+    ], batch_size=500)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+@override_settings(DIAGNOSTICO=DIAGNOSTICO_FALSO, SESSION_ENGINE=SESSAO_EM_CACHE)
+class BenchmarkRotasTests(TestCase):
+    """Percorre todas as rotas de app/urls.py com dados em volume e compara com o baseline.
+
+    Falha quando uma rota passa do seu teto em ORCAMENTO_CONSULTAS ou executa mais consultas
+    que no baseline. Com BENCHMARK_LATENCIA=1, também quando fica com p95 acima de
+    TOLERANCIA_LATENCIA vezes o baseline (e FOLGA_LATENCIA_MS acima dele).
+    Para regravar o baseline (na mesma máquina da comparação, num commit só para isso):
+    BENCHMARK_ATUALIZAR_BASELINE=1 python manage.py test app.tests.BenchmarkRotasTests
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        usar_media_temporaria(cls)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        semear_dados(VOLUME_BENCHMARK)
+        busca.reindexar()
+        cls.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'senha')
+        cls.argumentos = {
+            'pk': Agendamento.objects.values_list('pk', flat=True).first(),
+            'orcamento_id': Orcamento.objects.values_list('pk', flat=True).first(),
+            'foto_id': FotoGaleria.objects.values_list('pk', flat=True).first(),
+        }
+        cls.argumentos_rota = {
+            'api-orcamento-detail': {'pk': cls.argumentos['orcamento_id']},
+            'api-foto-detail': {'pk': FotoGaleria.objects.filter(ativo=True).values_list('pk', flat=True).first()},
+            'agenda_ics': {'usuario_id': cls.admin.pk, 'token': agenda.gerar_token(cls.admin)},
+            'calendario_dia': {'dia': Agendamento.objects.values_list('data', flat=True).first().isoformat()},
+            'orcamento_pdf': {
+                'orcamento_id': Orcamento.objects.filter(preco_final__isnull=False).values_list('pk', flat=True).first(),
+            },
+        }
+
+    def _rotas(self, padroes=None, rotas=None):
+        rotas = {} if rotas is None else rotas
+        for padrao in app_urls.urlpatterns if padroes is None else padroes:
+            if isinstance(padrao, URLResolver):
+                self._rotas(padrao.url_patterns, rotas)
+            elif padrao.name and padrao.name not in rotas:
+                nomes = padrao.pattern.converters or padrao.pattern.regex.groupindex
+                argumentos = {**self.argumentos, **self.argumentos_rota.get(padrao.name, {})}
+                rotas[padrao.name] = reverse(padrao.name, kwargs={nome: argumentos[nome] for nome in nomes})
+        return rotas
+
+    def _medir(self, nome, url):
+        self.client.force_login(self.admin)
+        metodo, dados = REQUISICAO_ROTA.get(nome, ('get', None))
+        # Como no timeit: sem coleta de lixo durante a medição, para uma pausa do GC
+        # (que depende do que os outros testes alocaram) não virar latência da rota
+        gc.collect()
+        gc.disable()
+        try:
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = perf_counter()
+                resposta = getattr(self.client, metodo)(url, dados)
+                duracao_ms = (perf_counter() - inicio) * 1000
+        finally:
+            gc.enable()
+        self.assertLess(resposta.status_code, 400, url)
+        return len(consultas), duracao_ms
+
+    @mock.patch('app.fila_email.enfileirar')
+    def test_orcamento_de_consultas_e_latencia(self, _enfileirar):
+        resultados = {}
+        for nome, url in self._rotas().items():
+            medicoes = [self._medir(nome, url) for _ in range(REPETICOES_BENCHMARK)]
+            latencias = [duracao for _, duracao in medicoes]
+            resultados[nome] = {
+                'consultas': max(n for n, _ in medicoes),
+                'p50_ms': round(percentil(latencias, 50), 2),
+                'p95_ms': round(percentil(latencias, 95), 2),
+                'p99_ms': round(percentil(latencias, 99), 2),
+            }
+
+        if os.environ.get('BENCHMARK_ATUALIZAR_BASELINE'):
+            ARQUIVO_BASELINE.write_text(json.dumps(resultados, indent=2, sort_keys=True) + '\n')
+
+        baseline = json.loads(ARQUIVO_BASELINE.read_text()) if ARQUIVO_BASELINE.exists() else {}
+        falhas = []
+        for nome, resultado in resultados.items():
+            if nome not in ORCAMENTO_CONSULTAS:
+                falhas.append(f"{nome}: rota sem orçamento de consultas definido")
+                continue
+            if resultado['consultas'] > ORCAMENTO_CONSULTAS[nome]:
+                falhas.append(f"{nome}: {resultado['consultas']} consultas (teto {ORCAMENTO_CONSULTAS[nome]})")
+            referencia = baseline.get(nome)
+            if referencia is None:
+                continue
+            if resultado['consultas'] > referencia['consultas']:
+                falhas.append(f"{nome}: {resultado['consultas']} consultas (baseline {referencia['consultas']})")
+            if not COMPARAR_LATENCIA:
+                continue
+            limite_p95 = max(referencia['p95_ms'] * TOLERANCIA_LATENCIA, referencia['p95_ms'] + FOLGA_LATENCIA_MS)
+            if resultado['p95_ms'] > limite_p95:
+                falhas.append(f"{nome}: p95 {resultado['p95_ms']} ms (baseline {referencia['p95_ms']} ms)")
+        self.assertFalse(falhas, "\n".join(falhas))
@@ -1,5 +1,6 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
+from .api import AlteracoesView, BuscaView, HistoricoView, router as api_router
 
 urlpatterns = [
     path('', views.inicio, name='home'),
@@ -13,6 +14,7 @@ urlpatterns = [
     path('sobre/', views.sobre, name='sobre'),
     path('galeria/', views.galeria_fotos, name='galeria_fotos'),
     path('simulador/', views.simulador_orcamento, name='simulador_orcamento'),
+    path('sw.js', views.service_worker, name='service_worker'),
     
     # Agendamentos
     path('criar/', views.criar_agendamento, name='cria_agendamento'),
@@ -21,10 +23,19 @@ urlpatterns = [
     path('deletar/<int:pk>/', views.deletar_agendamento, name='deleta_agendamento'),
     path('aceitar/<int:pk>/', views.aceitar_agendamento, name='aceitar_agendamento'),
     path('recusar/<int:pk>/', views.recusar_agendamento, name='recusar_agendamento'),
+    path('agendamentos/calendario/', views.calendario_agendamentos, name='calendario_agendamentos'),
+    path('agendamentos/calendario/<str:dia>/', views.calendario_dia, name='calendario_dia'),
+    path('agendamentos/exportar/', views.exportar_agendamentos, name='exportar_agendamentos'),
+    path('agendamentos/em-massa/', views.acao_em_massa_agendamentos, name='acao_em_massa_agendamentos'),
+    path('agenda/<int:usuario_id>/<str:token>/visitas.ics', views.agenda_ics, name='agenda_ics'),
+    path('api/disponibilidade/', views.api_verificar_disponibilidade, name='api_verificar_disponibilidade'),
     
     # Orçamentos
     path('orcamentos/', views.lista_orcamentos, name='lista_orcamentos'),
+    path('painel/', views.painel_analitico, name='painel_analitico'),
+    path('orcamentos/exportar/', views.exportar_orcamentos, name='exportar_orcamentos'),
     path('orcamentos/<int:orcamento_id>/', views.detalhes_orcamento, name='detalhes_orcamento'),
+    path('orcamentos/<int:orcamento_id>/pdf/', views.orcamento_pdf, name='orcamento_pdf'),
     path('orcamentos/<int:orcamento_id>/editar-preco/', views.editar_preco_final, name='editar_preco_final'),
     path('orcamentos/<int:orcamento_id>/excluir/', views.excluir_orcamento, name='excluir_orcamento'),
     
@@ -33,6 +44,18 @@ urlpatterns = [
     path('galeria/excluir/<int:foto_id>/', views.excluir_foto, name='excluir_foto'),
     path('galeria/gerenciar/', views.gerenciar_galeria, name='gerenciar_galeria'),
     
+    # API REST (somente leitura)
+    path('api/v1/alteracoes/', AlteracoesView.as_view(), name='api-alteracoes'),
+    path('api/v1/alteracoes/stream/', views.alteracoes_stream, name='api-alteracoes-stream'),
+    path('api/v1/busca/', BuscaView.as_view(), name='api-busca'),
+    path('api/v1/historico/', HistoricoView.as_view(), name='api-historico'),
+    path('api/v1/', include(api_router.urls)),
+
+    # Diagnóstico (admin)
+    path('diagnostico/email/', views.diagnostico_email, name='diagnostico_email'),
+    path('diagnostico/email/teste/', views.testar_email, name='testar_email'),
+    path('diagnostico/metricas/', views.metricas_prometheus, name='metricas_prometheus'),
+
     # Autenticação
     path('logout/', views.logout_personalizado, name='custom_logout'),
 ]
\ No newline at end of file
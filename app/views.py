@@ -1,12 +1,12 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import partial
 import json
-import threading
 import time
-import socket
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, send_mail
 from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import logout
@@ -14,36 +14,28 @@ from django.contrib import messages
 from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import authenticate, get_user_model, login
 from django.contrib.auth.forms import AuthenticationForm
+from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.core.serializers.json import DjangoJSONEncoder
 import logging
 
 # Importações dos Models e Constantes
 from .models import Agendamento, Orcamento, FotoGaleria, CategoriaFoto, CONSTANTES_PACOTES, CONSTANTES_SERVICOS
 from .forms import AgendamentoForm, FotoGaleriaForm
+from .protecao import protegido_contra_abuso
+from .roteamento import somente_leitura
+# Os módulos de cada funcionalidade (exportação, agenda, PDF, API/DRF, sondas...) são importados
+# dentro das views que os usam, para ficarem fora do import de app.views no boot
+# (ver `manage.py perfil_inicializacao`).
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
-# Controle de rate limiting para e-mails
-_last_email_time = 0
-_email_count = 0
-
 # --- Funções de Email ---
-def testar_conexao_email():
-    """Testa a conexão com o servidor de e-mail"""
-    try:
-        send_mail(
-            subject='Teste de Conexão - Sabina Decorações',
-            message='Teste de conexão bem-sucedido.',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.DEFAULT_FROM_EMAIL],
-            fail_silently=False,
-        )
-        return True, "Conexão bem-sucedida"
-    except Exception as e:
-        return False, f"Falha na conexão: {str(e)}"
-
 def enviar_email_agendamento_servico(agendamento, tipo):
     """Envia e-mail de agendamento COM TEMPLATE HTML"""
     
@@ -79,29 +71,100 @@ def enviar_email_agendamento_servico(agendamento, tipo):
             fail_silently=False
         )
         
-        print(f"✅ E-mail {tipo} enviado via Gmail para {agendamento.email}")
+        logger.info("E-mail %s enviado para %s", tipo, agendamento.email)
         return True, "E-mail enviado com sucesso"
         
     except Exception as e:
         error_msg = f"Erro ao enviar e-mail: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error("Erro ao enviar e-mail %s para %s: %s", tipo, agendamento.email, e)
         return False, error_msg
 
 def enviar_email_agendamento_background(agendamento_id, tipo):
-    """Função background com proteção contra loops"""
+    """Tarefa da fila de e-mails (app/fila_email.py), que já respeitou o limite de envio"""
     try:
         agendamento = Agendamento.objects.get(id=agendamento_id)
         success, message = enviar_email_agendamento_servico(agendamento, tipo)
         
-        if not success and "Rate limit" not in message:
-            logger.warning(f"Falha e-mail: {message}")
+        if not success:
+            logger.warning("Falha e-mail: %s", message)
             
     except Agendamento.DoesNotExist:
-        logger.warning(f"Agendamento {agendamento_id} não existe")
-    except Exception as e:
-        logger.warning(f"Erro inesperado: {str(e)}")
+        logger.warning("Agendamento %s não existe", agendamento_id)
+    except Exception:
+        logger.exception("Erro inesperado ao enviar e-mail do agendamento %s", agendamento_id)
+
+def enfileirar_email_agendamento(agendamento, tipo):
+    from . import fila_email
+
+    fila_email.enfileirar(
+        enviar_email_agendamento_background,
+        args=(agendamento.id, tipo),
+        destinatario=agendamento.email,
+        agendamento_id=agendamento.id,
+    )
+
+def processar_agendamentos_em_massa(ids, acao, usuario):
+    """Aceita ou recusa vários agendamentos numa única transação.
+
+    As regras de Agendamento.clean() são checadas em memória: uma consulta traz os
+    selecionados e outra os já aceitos nas mesmas datas, e cada aceite entra na lista
+    de aceitos antes de validar o próximo (conflitos dentro da própria seleção).
+    Retorna (ids atualizados, lista de (agendamento, mensagem de erro)).
+    """
+    from . import agenda, resumos
+
+    if acao not in ('aceito', 'recusado'):
+        raise ValueError(f"Ação inválida: {acao}")
+
+    with transaction.atomic():
+        selecionados = list(
+            Agendamento.objects.select_for_update().filter(pk__in=ids).order_by('data', 'hora')
+        )
+        aceitos = []
+        if acao == 'aceito':
+            aceitos = list(
+                Agendamento.objects.filter(status='aceito', data__in={a.data for a in selecionados})
+                .exclude(pk__in=[a.pk for a in selecionados])
+            )
+
+        agora = timezone.now()
+        atualizados, erros = [], []
+        for agendamento in selecionados:
+            agendamento.status = acao
+            try:
+                agendamento.validar_dia_e_horario()
+                agendamento.validar_data_passada()
+                if acao == 'aceito':
+                    agendamento.validar_conflito(aceitos)
+            except ValidationError as e:
+                erros.append((agendamento, " | ".join(e.messages)))
+                continue
+            if acao == 'aceito':
+                agendamento.aceito_por, agendamento.recusado_por = usuario, None
+                aceitos.append(agendamento)
+            else:
+                agendamento.recusado_por, agendamento.aceito_por = usuario, None
+            agendamento.atualizado_em = agora  # bulk_update não aplica auto_now
+            atualizados.append(agendamento)
+
+        Agendamento.objects.bulk_update(
+            atualizados, ['status', 'aceito_por', 'recusado_por', 'atualizado_em'], batch_size=200
+        )
+        atualizados_ids = [a.pk for a in atualizados]
+        # bulk_update não dispara post_save: os resumos dos dias afetados são agendados aqui
+        resumos.agendar_recalculo(agendamentos={a.data for a in atualizados})
+        transaction.on_commit(agenda.marcar_alteracao, robust=True)
+        # Um e-mail por agendamento na fila; o limitador espaça a rajada
+        for agendamento in atualizados:
+            transaction.on_commit(partial(enfileirar_email_agendamento, agendamento, acao))
+
+    logger.info("Ação em massa '%s': %s atualizados, %s com erro", acao, len(atualizados_ids), len(erros))
+    return atualizados_ids, erros
 
 # --- Funções Auxiliares ---
+def eh_administrador(usuario):
+    return usuario.is_authenticated and usuario.is_staff
+
 def converter_preco_input(valor_str):
     """Converte string 'R$ 1.200,50' para float 1200.50"""
     if not valor_str:
@@ -114,6 +177,8 @@ def converter_preco_input(valor_str):
 
 def task_enviar_email_orcamento(orcamento_id, preco_final_float):
     """Envia e-mail com orçamento final"""
+    from . import documentos, notificacoes
+
     try:
         orcamento = Orcamento.objects.get(id=orcamento_id)
         preco_final_formatado_br = f"{preco_final_float:.2f}".replace('.', ',')
@@ -146,53 +211,46 @@ def task_enviar_email_orcamento(orcamento_id, preco_final_float):
         email_content = render_to_string('app/email_orcamento_final.html', dados_orcamento)
         plain_message = strip_tags(email_content)
    
-        send_mail(
+        email = EmailMultiAlternatives(
             subject=f"Preço Final Definido - Orçamento #{orcamento.id} - Sabina Decorações",
-            message=plain_message,
-            html_message=email_content,
+            body=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[orcamento.email],
-            fail_silently=False,
+            to=[orcamento.email],
         )
+        email.attach_alternative(email_content, 'text/html')
+        # PDF da versão atual (já gerado ao salvar o preço; só renderiza aqui se faltar)
+        try:
+            with default_storage.open(documentos.obter_pdf(orcamento)) as arquivo:
+                email.attach(documentos.nome_arquivo(orcamento), arquivo.read(), 'application/pdf')
+        except Exception:
+            logger.exception("PDF do orçamento #%s indisponível; e-mail segue sem anexo", orcamento.id)
+        email.send(fail_silently=False)
 
-        if hasattr(settings, 'EMAIL_DESTINO') and settings.EMAIL_DESTINO:
-            send_mail(
-                subject=f"Cópia: Preço Final Enviado - Orçamento #{orcamento.id}",
-                message=f"Preço final de R$ {preco_final_formatado_br} enviado para {orcamento.nome}.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[settings.EMAIL_DESTINO], 
-                fail_silently=False,
-            )
-            
-        logger.warning(f"E-mail orçamento #{orcamento.id} enviado")
+        # A cópia para o staff sai no próximo resumo (app/notificacoes.py)
+        notificacoes.registrar('preco_final', orcamento.id, f"{orcamento.nome}: R$ {preco_final_formatado_br}")
 
-    except Exception as e:
-        logger.warning(f"Erro e-mail orçamento: {str(e)}")
+        logger.info("E-mail orçamento #%s enviado", orcamento.id)
+
+    except Exception:
+        logger.exception("Erro e-mail orçamento #%s", orcamento_id)
 
 # --- Views de Diagnóstico ---
+# As sondas rodam em segundo plano (app/diagnostico.py); aqui só lemos o último resultado do cache.
+def _formatar_resultado(nome, resultado):
+    if resultado is None:
+        return f"⏳ {nome}: aguardando a primeira verificação"
+    icone = "✅" if resultado['sucesso'] else "❌"
+    verificado_em = timezone.localtime(resultado['verificado_em']).strftime('%d/%m/%Y %H:%M:%S')
+    return f"{icone} {resultado['mensagem']} (verificado em {verificado_em})"
+
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
 def diagnostico_email(request):
     """View para diagnóstico completo do problema de e-mail"""
-    diagnostics = []
-    
-    # Teste de DNS
-    try:
-        socket.gethostbyname('smtp.gmail.com')
-        diagnostics.append("✅ DNS do Gmail resolvido")
-    except Exception as e:
-        diagnostics.append(f"❌ Falha no DNS: {e}")
-    
-    # Teste de conectividade de rede
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(10)
-        result = sock.connect_ex(('smtp.gmail.com', 587))
-        sock.close()
-        if result == 0:
-            diagnostics.append("✅ Conexão com smtp.gmail.com:587")
-        else:
-            diagnostics.append(f"❌ Falha na conexão (código: {result})")
-    except Exception as e:
-        diagnostics.append(f"❌ Erro de socket: {e}")
+    from . import diagnostico
+
+    diagnostico.iniciar_agendador()
+    resultados = diagnostico.obter_resultados(['dns', 'conexao'])
+    diagnostics = [_formatar_resultado(nome, resultado) for nome, resultado in resultados.items()]
     
     # Verificar configurações
     diagnostics.append(f"📧 EMAIL_HOST: {getattr(settings, 'EMAIL_HOST', 'Não definido')}")
@@ -202,16 +260,21 @@ def diagnostico_email(request):
     
     return HttpResponse("<br>".join(diagnostics))
 
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
 def testar_email(request):
-    """View temporária para testar configuração de e-mail"""
-    try:
-        success, message = testar_conexao_email()
-        if success:
-            return HttpResponse("✅ " + message)
-        else:
-            return HttpResponse("❌ " + message)
-    except Exception as e:
-        return HttpResponse(f"❌ Erro no teste: {str(e)}")
+    """Envia agora o e-mail de teste e mostra o resultado (a sonda de envio só roda sob demanda)"""
+    from . import diagnostico
+
+    diagnostico.iniciar_agendador()
+    resultado = diagnostico.executar_sonda('envio')
+    return HttpResponse(_formatar_resultado('envio', resultado))
+
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def metricas_prometheus(request):
+    """Métricas de desempenho por view, no formato texto do Prometheus"""
+    from . import metricas
+
+    return HttpResponse(metricas.registro.exportar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # --- Views de Autenticação ---
 def login_personalizado(request):
@@ -222,25 +285,50 @@ def login_personalizado(request):
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
             login(request, form.get_user())
-            return redirect(next_url)
+            return _limpar_service_worker(redirect(next_url))
     else:
         form = AuthenticationForm()
     return render(request, 'app/login.html', {'form': form, 'next_url': next_url})
 
-def eh_administrador(usuario):
-    return usuario.is_authenticated and usuario.is_staff
-
 def logout_personalizado(request):
     logout(request)
-    return redirect('inicio')
+    return _limpar_service_worker(redirect('inicio'))
+
+def _limpar_service_worker(response):
+    from . import offline
+
+    # Quem entra ou sai não deve ver páginas guardadas pelo service worker com o estado anterior
+    if offline.obter_configuracao()['ATIVO']:
+        response['Clear-Site-Data'] = '"storage"'
+    return response
 
 # --- Views Públicas ---
+@somente_leitura
+def service_worker(request):
+    """sw.js com o manifesto de cache embutido (ver app/offline.py)"""
+    from . import offline
+
+    manifesto = offline.manifesto()
+    etag = f'"{manifesto["versao"]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            render_to_string('app/sw.js', {'manifesto': json.dumps(manifesto)}),
+            content_type='application/javascript; charset=utf-8',
+        )
+    response['ETag'] = etag
+    response['Service-Worker-Allowed'] = '/'
+    # O navegador confere o sw.js a cada navegação; o 304 sai do manifesto em cache
+    patch_cache_control(response, no_cache=True)
+    return response
+
 def inicio(request):
     return render(request, 'app/inicio.html')
 
 def sobre(request):
     return render(request, 'app/sobre.html')
 
+@somente_leitura
 def galeria_fotos(request):
     try:
         fotos = FotoGaleria.objects.filter(ativo=True).select_related('categoria').order_by('-data_upload')
@@ -254,7 +342,7 @@ def galeria_fotos(request):
         return render(request, 'app/galeria_fotos.html', context)
         
     except Exception as e:
-        logger.warning(f"Erro galeria: {e}")
+        logger.warning("Erro galeria: %s", e, exc_info=True)
         fotos_fallback = [
             {
                 "id": 1,
@@ -270,7 +358,10 @@ def galeria_fotos(request):
         }
         return render(request, 'app/galeria_fotos.html', context)
 
+@protegido_contra_abuso(destino_sucesso='simulador_orcamento')
 def simulador_orcamento(request):
+    from . import logs
+
     tipos_evento = [{'valor': k, 'nome': v} for k, v in Orcamento.TIPO_EVENTO_CHOICES]
 
     pacotes = []
@@ -321,6 +412,8 @@ def simulador_orcamento(request):
             )
             orcamento.full_clean()
             orcamento.save()
+            with logs.correlacionar(orcamento_id=orcamento.id):
+                logger.info("Novo pedido de orçamento recebido (%s)", orcamento.tipo_evento)
             
             messages.success(request, "Seu pedido de orçamento foi recebido com sucesso! Analisaremos suas informações e entraremos em contato em breve.")
             return redirect('simulador_orcamento')
@@ -346,12 +439,17 @@ def simulador_orcamento(request):
         'servicos_adicionais': servicos_adicionais
     })
 
+@protegido_contra_abuso(destino_sucesso='inicio')
 def criar_agendamento(request):
+    from . import logs
+
     if request.method == 'POST':
         formulario = AgendamentoForm(request.POST)
         if formulario.is_valid():
             try:
-                formulario.save()
+                agendamento = formulario.save()
+                with logs.correlacionar(agendamento_id=agendamento.id):
+                    logger.info("Novo agendamento solicitado para %s %s", agendamento.data, agendamento.hora)
                 messages.success(request, "Seu agendamento foi solicitado com sucesso!")
                 return redirect('inicio')
             except ValidationError as e:
@@ -371,6 +469,7 @@ def criar_agendamento(request):
         
     return render(request, 'app/cria_agendamento.html', {'form': formulario})
 
+@somente_leitura
 def api_verificar_disponibilidade(request):
     data_str = request.GET.get('data')
     if not data_str:
@@ -392,10 +491,80 @@ def api_verificar_disponibilidade(request):
         return JsonResponse({'error': 'Formato de data inválido'}, status=400)
 
 # --- Views de Administração ---
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def alteracoes_stream(request):
+    """Server-sent events com as alterações de agendamentos/orçamentos.
+
+    Cada conexão dura no máximo ALTERACOES['SSE_DURACAO'] segundos; o EventSource do
+    navegador reconecta sozinho enviando o último cursor em Last-Event-ID.
+    """
+    from . import alteracoes
+    from .api import consultar_alteracoes
+
+    configuracao = alteracoes.obter_configuracao()
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    try:
+        alteracoes.decodificar_cursor(cursor)
+    except alteracoes.CursorInvalido as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    def eventos(cursor):
+        fim = time.monotonic() + configuracao['SSE_DURACAO']
+        yield f"retry: {configuracao['SSE_INTERVALO'] * 1000}\n\n"
+        while time.monotonic() < fim:
+            dados = consultar_alteracoes(cursor)
+            if dados['agendamentos'] or dados['orcamentos'] or dados['excluidos']:
+                yield f"id: {dados['cursor']}\nevent: alteracoes\ndata: {json.dumps(dados, cls=DjangoJSONEncoder)}\n\n"
+            else:
+                yield ": ping\n\n"
+            cursor = dados['cursor']
+            if not dados['mais']:
+                time.sleep(configuracao['SSE_INTERVALO'])
+
+    response = StreamingHttpResponse(eventos(cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@somente_leitura
 @user_passes_test(eh_administrador, login_url='/admin/login/')
 def lista_agendamentos(request):
-    agendamentos = Agendamento.objects.all().order_by('-data', '-hora')
-    return render(request, 'app/lista_agendamentos.html', {'agendamentos': agendamentos})
+    from . import agenda, exportacao
+
+    agendamentos = exportacao.filtrar_agendamentos(request.GET)
+    return render(request, 'app/lista_agendamentos.html', {
+        'agendamentos': agendamentos,
+        'url_agenda': request.build_absolute_uri(agenda.url_feed(request.user)),
+    })
+
+@somente_leitura
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def calendario_agendamentos(request):
+    """Mês (?mes=AAAA-MM) com as contagens por dia; os agendamentos do dia vêm de calendario_dia"""
+    from . import calendario
+
+    hoje = timezone.localdate()
+    try:
+        ano, mes = (int(parte) for parte in request.GET.get('mes', '').split('-'))
+        if not 1900 <= ano <= 2999:
+            raise ValueError(ano)
+        date(ano, mes, 1)
+    except ValueError:
+        ano, mes = hoje.year, hoje.month
+    return render(request, 'app/calendario_agendamentos.html', calendario.montar_mes(ano, mes))
+
+@somente_leitura
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def calendario_dia(request, dia):
+    from . import calendario
+
+    try:
+        dia = date.fromisoformat(dia)
+    except ValueError:
+        return JsonResponse({'error': "Data inválida"}, status=400)
+    return JsonResponse(
+        {'data': dia.isoformat(), 'agendamentos': calendario.visitas_do_dia(dia)}, encoder=DjangoJSONEncoder,
+    )
 
 @user_passes_test(eh_administrador, login_url='/admin/login/')
 def editar_agendamento(request, pk):
@@ -437,13 +606,7 @@ def aceitar_agendamento(request, pk):
         agendamento.clean() 
         agendamento.save()
         
-        # Use thread com daemon=True
-        email_thread = threading.Thread(
-            target=enviar_email_agendamento_background, 
-            args=(agendamento.id, 'aceito'),
-            daemon=True
-        )
-        email_thread.start()
+        enfileirar_email_agendamento(agendamento, 'aceito')
         
         messages.success(request, "Agendamento aceito! E-mail de confirmação está sendo enviado.")
         
@@ -469,12 +632,7 @@ def recusar_agendamento(request, pk):
         agendamento.aceito_por = None
         agendamento.save()
 
-        email_thread = threading.Thread(
-            target=enviar_email_agendamento_background, 
-            args=(agendamento.id, 'recusado'),
-            daemon=True
-        )
-        email_thread.start()
+        enfileirar_email_agendamento(agendamento, 'recusado')
 
         messages.success(request, "Agendamento recusado. E-mail está sendo enviado.")
         
@@ -483,9 +641,26 @@ def recusar_agendamento(request, pk):
         
     return redirect('lista_agendamentos')
 
+@user_passes_test(eh_administrador, login_url='/admin/login/')
+@require_POST
+def acao_em_massa_agendamentos(request):
+    acao = {'aceitar': 'aceito', 'recusar': 'recusado'}.get(request.POST.get('acao'))
+    ids = [int(pk) for pk in request.POST.getlist('agendamentos') if pk.isdigit()]
+    if not acao or not ids:
+        messages.error(request, "Selecione ao menos um agendamento e uma ação.")
+        return redirect('lista_agendamentos')
+
+    atualizados, erros = processar_agendamentos_em_massa(ids, acao, request.user)
+    if atualizados:
+        verbo = "aceitos" if acao == 'aceito' else "recusados"
+        messages.success(request, f"{len(atualizados)} agendamento(s) {verbo}. Os e-mails estão sendo enviados.")
+    for agendamento, erro in erros:
+        messages.error(request, f"{agendamento.nome} ({agendamento.data:%d/%m/%Y} {agendamento.hora:%H:%M}): {erro}")
+    return redirect('lista_agendamentos')
+
 @user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
 def gerenciar_galeria(request):
-    fotos = FotoGaleria.objects.all().order_by('-data_upload')
+    fotos = FotoGaleria.objects.select_related('categoria').order_by('-data_upload')
     categorias = CategoriaFoto.objects.all()
     return render(request, 'app/gerenciar_galeria.html', {'fotos': fotos, 'categorias': categorias})
 
@@ -511,13 +686,12 @@ def excluir_foto(request, foto_id):
         return redirect('gerenciar_galeria')
     return render(request, 'app/excluir_foto.html', {'foto': foto})
 
+@somente_leitura
 @user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
 def lista_orcamentos(request):
-    orcamentos = Orcamento.objects.all().order_by('-data_criacao')
-    
-    tipo_evento_filtro = request.GET.get('tipo_evento')
-    if tipo_evento_filtro:
-        orcamentos = orcamentos.filter(tipo_evento=tipo_evento_filtro)
+    from . import exportacao
+
+    orcamentos = exportacao.filtrar_orcamentos(request.GET)
     
     context = {
         'orcamentos': orcamentos,
@@ -526,9 +700,79 @@ def lista_orcamentos(request):
     }
     return render(request, 'app/lista_orcamentos.html', context)
 
+def _resposta_exportacao(formato, nome_arquivo, titulos, linhas):
+    from . import exportacao
+
+    gerador, content_type = exportacao.FORMATOS.get(formato, exportacao.FORMATOS['csv'])
+    response = StreamingHttpResponse(gerador(titulos, linhas), content_type=content_type)
+    extensao = formato if formato in exportacao.FORMATOS else 'csv'
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.{extensao}"'
+    return response
+
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def exportar_orcamentos(request):
+    """Exporta os orçamentos (mesmos filtros da lista) em ?formato=csv|xlsx"""
+    from . import exportacao
+
+    orcamentos = exportacao.filtrar_orcamentos(request.GET)
+    titulos = [titulo for titulo, _ in exportacao.COLUNAS_ORCAMENTO]
+    nome_arquivo = f"orcamentos_{timezone.localdate():%Y%m%d}"
+    return _resposta_exportacao(request.GET.get('formato'), nome_arquivo, titulos,
+                                exportacao.linhas_orcamentos(orcamentos))
+
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def exportar_agendamentos(request):
+    """Exporta os agendamentos (filtro opcional ?status=) em ?formato=csv|xlsx"""
+    from . import exportacao
+
+    agendamentos = exportacao.filtrar_agendamentos(request.GET)
+    titulos = [titulo for titulo, _ in exportacao.COLUNAS_AGENDAMENTO]
+    nome_arquivo = f"agendamentos_{timezone.localdate():%Y%m%d}"
+    return _resposta_exportacao(request.GET.get('formato'), nome_arquivo, titulos,
+                                exportacao.linhas_agendamentos(agendamentos))
+
+def agenda_ics(request, usuario_id, token):
+    """Feed .ics das visitas aceitas; autenticado pelo token do link (ver app/agenda.py)"""
+    from . import agenda
+
+    usuario = get_user_model().objects.filter(pk=usuario_id, is_active=True, is_staff=True).only('password').first()
+    if usuario is None or not agenda.verificar_token(usuario, token):
+        raise Http404("Agenda não encontrada")
+
+    hoje = timezone.localdate()
+    versao = agenda.versao_atual()
+    etag = agenda.etag(versao, hoje)
+    ultima_alteracao = int(versao.timestamp())
+    # 304 sem ler a tabela de agendamentos
+    response = get_conditional_response(request, etag=etag, last_modified=ultima_alteracao)
+    if response is None:
+        response = StreamingHttpResponse(
+            agenda.gerar_ics(agenda.visitas(hoje), request.get_host().split(':')[0]),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="visitas.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_alteracao)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@somente_leitura
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def painel_analitico(request):
+    """Conversão e receita por mês; lê só as tabelas de resumo (ver app/resumos.py)"""
+    from . import resumos
+
+    return render(request, 'app/painel_analitico.html', resumos.montar_painel())
+
 @user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
 def detalhes_orcamento(request, orcamento_id):
-    orcamento = get_object_or_404(Orcamento, id=orcamento_id)
+    # Orçamentos arquivados continuam consultáveis aqui (somente leitura)
+    from . import arquivamento
+
+    try:
+        orcamento = arquivamento.obter(Orcamento, orcamento_id)
+    except Orcamento.DoesNotExist:
+        raise Http404("Orçamento não encontrado")
     orcamento_estimado = orcamento.calcular_orcamento_estimado()
     
     servicos_display = orcamento.get_servicos_detalhados()
@@ -540,8 +784,35 @@ def detalhes_orcamento(request, orcamento_id):
     }
     return render(request, 'app/detalhes_orcamento.html', context)
 
+@user_passes_test(eh_administrador, login_url=settings.LOGIN_URL)
+def orcamento_pdf(request, orcamento_id):
+    """PDF do orçamento final, servido do storage (gerado uma vez por versão)"""
+    from . import arquivamento, documentos
+
+    try:
+        orcamento = arquivamento.obter(Orcamento, orcamento_id)
+    except Orcamento.DoesNotExist:
+        raise Http404("Orçamento não encontrado")
+    if orcamento.preco_final is None:
+        raise Http404("Orçamento ainda sem preço final")
+
+    etag = f'"{documentos.versao(orcamento)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(
+            default_storage.open(documentos.obter_pdf(orcamento)),
+            content_type='application/pdf',
+            filename=documentos.nome_arquivo(orcamento),
+            as_attachment=request.GET.get('baixar') == '1',
+        )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 @user_passes_test(lambda u: u.is_superuser, login_url='/login/') 
 def editar_preco_final(request, orcamento_id):
+    from . import fila_email
+
     orcamento = get_object_or_404(Orcamento, id=orcamento_id)
     
     pacotes_disponiveis = [{'nome': v['nome'], 'descricao': v['descricao'], 'valor': k} for k, v in CONSTANTES_PACOTES.items()]
@@ -559,12 +830,12 @@ def editar_preco_final(request, orcamento_id):
                     orcamento.save()
                     
                     if enviar_email:
-                        email_thread = threading.Thread(
-                            target=task_enviar_email_orcamento,
+                        fila_email.enfileirar(
+                            task_enviar_email_orcamento,
                             args=(orcamento.id, preco_final_float),
-                            daemon=True
+                            destinatario=orcamento.email,
+                            orcamento_id=orcamento.id,
                         )
-                        email_thread.start()
                         messages.success(request, f"Preço final salvo! O e-mail para {orcamento.email} está sendo enviado em segundo plano.")
                     else:
                         messages.success(request, "Preço final salvo com sucesso! (Opção de enviar e-mail desmarcada)")
@@ -0,0 +1,48 @@
+# gunicorn.conf.py
+"""Configuração do gunicorn (lida automaticamente a partir da raiz do projeto).
+
+As migrações rodam na fase `release` do Procfile, não a cada boot do `web`.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'sabina_decor.wsgi:application'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# gthread: várias threads por worker seguram o stream SSE e a espera do banco/e-mail
+# sem prender o worker inteiro, como acontece com o worker sync padrão.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Importa o Django uma vez no master e os workers nascem por fork (boot e memória menores).
+# Threads da aplicação (fila de e-mail, diagnóstico) começam sob demanda em cada worker.
+preload_app = True
+
+# Recicla workers aos poucos; o jitter evita que todos reiniciem juntos
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+
+def _aquecer_urlconf():
+    # Importa views, API e DRF pelo URLconf, em vez de no primeiro pedido de cada worker
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def when_ready(server):
+    # Roda no master, depois do preload e antes do fork dos workers
+    if server.cfg.preload_app:
+        _aquecer_urlconf()
+
+
+def post_fork(server, worker):
+    # Conexões abertas no master durante o preload não podem ser compartilhadas
+    from django.db import connections
+
+    connections.close_all()
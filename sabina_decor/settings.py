@@ -37,24 +37,41 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     # Libs de terceiros
     'widget_tweaks',
+    'rest_framework',
     # Seus apps
     'app',
 ]
 
 # --- LOGGING ---
+# Handler assíncrono (app/logs.py): a requisição só enfileira, um QueueListener formata e escreve.
+# LOG_FORMATO=json (padrão, uma linha JSON com request_id/agendamento_id/orcamento_id) ou simple.
+LOG_FORMATO = config('LOG_FORMATO', default='json')
+# INFO em produção; com DEBUG só avisos, para o console do runserver não virar um fluxo de JSON
+# (os testes baixam os loggers do app para WARNING em app/tests.py)
+LOG_LEVEL_PADRAO = 'WARNING' if DEBUG else 'INFO'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'correlacao': {
+            '()': 'app.logs.FiltroCorrelacao',
+        },
+    },
     'formatters': {
         'simple': {
-            'format': '{levelname} {message}',
+            'format': '{levelname} [{request_id}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'app.logs.FormatadorJSON',
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            '()': 'app.logs.HandlerFilaAssincrono',
+            'formatter': LOG_FORMATO,
+            'filters': ['correlacao'],
         },
     },
     'root': {
@@ -69,15 +86,128 @@ LOGGING = {
         },
         'app': {
             'handlers': ['console'],
-            'level': 'WARNING',
+            'level': config('LOG_LEVEL', default=LOG_LEVEL_PADRAO),
+            'propagate': False,
+        },
+        # Uma linha por requisição (view, tempo, SQL, templates, cache)
+        'app.desempenho': {
+            'handlers': ['console'],
+            'level': config('LOG_DESEMPENHO_LEVEL', default=LOG_LEVEL_PADRAO),
             'propagate': False,
         },
     },
 }
 
+# --- API REST ---
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+}
+
+# --- FEED DE ALTERAÇÕES ---
+# Cada conexão SSE ocupa um worker: mantenha a duração curta (o navegador reconecta sozinho).
+ALTERACOES = {
+    'SSE_DURACAO': config('ALTERACOES_SSE_DURACAO', default=55, cast=int),
+}
+
+# --- RESUMOS ANALÍTICOS ---
+# Com ATUALIZAR_AO_SALVAR desligado, rode `manage.py atualizar_resumos` periodicamente
+# (e `--completo` de vez em quando, fora do horário comercial).
+RESUMOS = {
+    'ATUALIZAR_AO_SALVAR': config('RESUMOS_ATUALIZAR_AO_SALVAR', default=True, cast=bool),
+}
+
+# --- LIMITE DE ENVIO DE E-MAIL ---
+# Token bucket (app/limitador.py) guardado no cache: só vale entre workers com um cache compartilhado.
+# E-mails acima do limite esperam na fila (app/fila_email.py) em vez de falhar.
+LIMITE_EMAIL = {
+    'PROVEDOR': {'capacidade': 10, 'por_segundo': config('LIMITE_EMAIL_POR_MINUTO', default=30, cast=int) / 60},
+    'DESTINATARIO': {'capacidade': 3, 'por_segundo': 1 / 600},
+}
+
+# --- PROTEÇÃO DOS FORMULÁRIOS PÚBLICOS ---
+# Limites por IP e por e-mail, honeypot e tempo mínimo de preenchimento (app/protecao.py).
+# Os contadores ficam no cache: com o LocMem padrão valem por worker do gunicorn.
+PROTECAO = {
+    'ATIVA': config('PROTECAO_ATIVA', default=True, cast=bool),
+    'CONFIAR_X_FORWARDED_FOR': config('PROTECAO_CONFIAR_X_FORWARDED_FOR', default=not DEBUG, cast=bool),
+    'PROXIES_CONFIAVEIS': config('PROTECAO_PROXIES_CONFIAVEIS', default=1, cast=int),
+}
+
+# --- ARQUIVAMENTO ---
+# `manage.py arquivar_historico` (agendado, ex.: diário) move o que passou do horizonte
+# para as tabelas de arquivo; o histórico continua consultável (app/arquivamento.py).
+ARQUIVAMENTO = {
+    'HORIZONTE_AGENDAMENTOS_DIAS': config('ARQUIVAR_AGENDAMENTOS_APOS_DIAS', default=365, cast=int),
+    'HORIZONTE_ORCAMENTOS_DIAS': config('ARQUIVAR_ORCAMENTOS_APOS_DIAS', default=730, cast=int),
+}
+
+# --- COMPRESSÃO DAS RESPOSTAS ---
+# gzip/brotli do HTML e JSON das views e ETag fraca nas páginas públicas (app/compressao.py).
+# Brotli só é usado com o pacote `brotli` instalado.
+COMPRESSAO = {
+    'ATIVA': config('COMPRESSAO_ATIVA', default=True, cast=bool),
+    'MINIMO_BYTES': config('COMPRESSAO_MINIMO_BYTES', default=1024, cast=int),
+}
+
+# --- SERVICE WORKER DO SITE PÚBLICO ---
+# /sw.js guarda páginas públicas, estáticos e fotos da galeria no navegador (app/offline.py).
+# Os estáticos só são cache-first com nomes com hash (storage com manifesto); sem ele,
+# são conferidos na rede a cada uso. Desligado, o sw.js já instalado se remove sozinho.
+OFFLINE = {
+    'ATIVO': config('OFFLINE_ATIVO', default=True, cast=bool),
+}
+
+# --- AGENDA (.ics) ---
+# Link pessoal de cada staff na lista de agendamentos (app/agenda.py)
+AGENDA_ICS = {
+    'DIAS_PASSADOS': config('AGENDA_ICS_DIAS_PASSADOS', default=30, cast=int),
+}
+
+# --- LEMBRETES DE VISITA ---
+# Rodar com `manage.py enviar_lembretes --loop` (processo separado, ex.: worker no Procfile).
+# Para SMS, inclua 'sms' em LEMBRETES_CANAIS e preencha as credenciais do Twilio.
+LEMBRETES = {
+    'CANAIS': config('LEMBRETES_CANAIS', default='email', cast=Csv()),
+}
+TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
+TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
+TWILIO_NUMERO = config('TWILIO_NUMERO', default='')
+TWILIO_WHATSAPP_NUMERO = config('TWILIO_WHATSAPP_NUMERO', default='')
+
+# --- RESUMO DE PEDIDOS PARA O STAFF ---
+# Um e-mail com os orçamentos/agendamentos novos quando o mais antigo passa do intervalo
+# ou os pendentes chegam ao limite (app/notificacoes.py). Rodar `manage.py enviar_resumo_staff --loop`.
+# Sem destinatários configurados, vai para o e-mail de todos os staff ativos.
+NOTIFICACOES_STAFF = {
+    'ATIVO': config('NOTIFICACOES_STAFF_ATIVO', default=True, cast=bool),
+    'CANAIS': config('NOTIFICACOES_STAFF_CANAIS', default='email', cast=Csv()),
+    'DESTINATARIOS': config('NOTIFICACOES_STAFF_DESTINATARIOS', default='', cast=Csv()),
+    'TELEFONES': config('NOTIFICACOES_STAFF_TELEFONES', default='', cast=Csv()),
+    'INTERVALO_SEGUNDOS': config('NOTIFICACOES_STAFF_INTERVALO_MINUTOS', default=15, cast=int) * 60,
+    'LIMITE_ITENS': config('NOTIFICACOES_STAFF_LIMITE_ITENS', default=10, cast=int),
+    'URL_SITE': config('SITE_URL', default=''),
+}
+
+# --- DESEMPENHO ---
+# Requisições acima do limiar registram o SQL executado (até MAX_SQL_AMOSTRA consultas)
+DESEMPENHO = {
+    'LIMIAR_LENTO_MS': config('DESEMPENHO_LIMIAR_LENTO_MS', default=500, cast=int),
+    'MAX_SQL_AMOSTRA': 50,
+}
+
 MIDDLEWARE = [
+    'app.middleware.CorrelacaoMiddleware',
+    'app.middleware.DesempenhoMiddleware',
+    'app.middleware.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    'app.middleware.ReplicaLeituraMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,12 +237,101 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sabina_decor.wsgi.application'
 
 # --- BANCO DE DADOS ---
+# Conexões persistentes (reaproveitadas entre requisições do mesmo worker/thread) com
+# health check antes do reuso. `manage.py benchmark_banco` compara as configurações.
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}')
+        default=config('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+        conn_health_checks=True,
     )
 }
 
+# SQLite: WAL deixa leituras seguirem durante uma escrita; synchronous=NORMAL é seguro com
+# WAL; `timeout` espera a trava em vez de falhar com "database is locked"; IMMEDIATE pega
+# a trava de escrita no BEGIN e evita o deadlock de duas transações promovendo leitura→escrita.
+SQLITE_OPCOES = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).update(SQLITE_OPCOES)
+elif config('DB_POOL', default=False, cast=bool):
+    # Pool nativo do Django 5.1: exige psycopg 3 (psycopg[pool]) no lugar do psycopg2
+    # e não convive com conexões persistentes
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX', default=10, cast=int),
+    }
+
+# Réplica de leitura (opcional): views @somente_leitura leem dela em GET (app/roteamento.py)
+if config('DATABASE_REPLICA_URL', default=''):
+    DATABASES['replica'] = dj_database_url.config(
+        env='DATABASE_REPLICA_URL',
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    if DATABASES['replica']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES['replica'].setdefault('OPTIONS', {}).update(SQLITE_OPCOES)
+DATABASE_ROUTERS = ['app.roteamento.RoteadorReplica']
+ROTEAMENTO = {
+    'REPLICA': 'replica',
+    # Após escrever, o navegador lê do primário por este tempo (acima do atraso de replicação)
+    'FIXAR_SEGUNDOS': config('REPLICA_FIXAR_SEGUNDOS', default=10, cast=int),
+}
+
+# --- CACHE E SESSÕES ---
+# Com REDIS_URL (exige o pacote redis) o cache é compartilhado entre os workers: limites de
+# e-mail e de formulários, sondas e sessões. Sem ele, LocMem por processo.
+REDIS_URL = config('REDIS_URL', default='')
+SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', default=60 * 60 * 24 * 14, cast=int)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'sabina',
+        },
+        'sessoes': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'sessao',
+            'TIMEOUT': SESSION_COOKIE_AGE,
+        },
+    }
+else:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sabina'},
+        'sessoes': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sessoes',
+            'TIMEOUT': SESSION_COOKIE_AGE,
+        },
+    }
+
+# Com Redis, cached_db: leitura da sessão vem do cache (o banco só é lido quando o cache perde
+# a chave) e a escrita vai para os dois, então um restart do cache não desloga ninguém.
+# Sem ele, db: o LocMem é por worker e a sessão gravada num worker não invalidaria a dos outros
+# (um logout continuaria valendo no cache de outro processo).
+# Alternativa sem servidor: SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'sessoes'
+# Mensagens no cookie; a sessão só é usada se o visitante já tiver uma (app/mensagens.py)
+MESSAGE_STORAGE = 'app.mensagens.ArmazenamentoMensagens'
+
 # --- VALIDAÇÃO DE SENHA ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -131,7 +350,12 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Nomes com hash e cópias .gz/.br geradas no collectstatic; o manifesto também alimenta o
+# service worker (app/offline.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # --- ARQUIVOS DE MÍDIA (Uploads) ---
 MEDIA_URL = '/media/'
@@ -153,6 +377,12 @@ ANYMAIL = {
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# --- DIAGNÓSTICO DE E-MAIL ---
+# Sondas de DNS/SMTP/envio rodam em segundo plano; as views só leem o último resultado.
+DIAGNOSTICO = {
+    'AGENDADOR_ATIVO': config('DIAGNOSTICO_AGENDADOR_ATIVO', default=True, cast=bool),
+}
+
 # COMENTE ESTAS LINHAS ABAIXO PARA O E-MAIL SAIR DE VERDADE:
 # if DEBUG:
 #     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'